@@ -0,0 +1,95 @@
+"""
+Redis round-trips and wall time for one search round (5 queries):
+per-query ``@cached`` calls vs the batched ``fn.many`` path.
+
+Uses fakeredis behind a thin proxy that counts every command / pipeline
+flush as one round-trip and sleeps RTT_MS to mimic a network hop.
+
+    PYTHONPATH=src python benchmarks/bench_cache_batch.py [rounds] [rtt_ms]
+"""
+
+import asyncio, sys, time
+
+import fakeredis.aioredis
+
+from agent import cache
+
+QUERIES = 5
+
+
+class _CountingRedis:
+    """Forward to fakeredis; one round-trip per command or pipeline."""
+
+    def __init__(self, rtt: float):
+        self._r = fakeredis.aioredis.FakeRedis()
+        self.rtt = rtt
+        self.trips = 0
+
+    def __getattr__(self, name):
+        target = getattr(self._r, name)
+
+        async def _call(*a, **kw):
+            self.trips += 1
+            await asyncio.sleep(self.rtt)
+            return await target(*a, **kw)
+
+        return _call
+
+    def pipeline(self, transaction=True):
+        outer, pipe = self, self._r.pipeline(transaction=transaction)
+
+        class _Pipe:
+            def __getattr__(self, name):
+                return getattr(pipe, name)
+
+            async def execute(self):
+                outer.trips += 1
+                await asyncio.sleep(outer.rtt)
+                return await pipe.execute()
+
+        return _Pipe()
+
+
+@cache.cached(ttl=60)
+async def _provider(q: str):
+    await asyncio.sleep(0.001)
+    return [q]
+
+
+async def _round_single(qs):
+    return await asyncio.gather(*(_provider(q) for q in qs))
+
+
+async def _round_batch(qs):
+    return await _provider.many(qs)
+
+
+async def _measure(label, fn, rounds, rtt):
+    r = _CountingRedis(rtt)
+    cache._pool = r
+    cold = warm = 0.0
+    for i in range(rounds):
+        qs = [f"{label}-{i}-{j}" for j in range(QUERIES)]
+        cache._l1.clear()
+        t0 = time.perf_counter()
+        await fn(qs)  # all misses
+        cold += time.perf_counter() - t0
+        cache._l1.clear()  # force the warm pass to L2
+        t0 = time.perf_counter()
+        await fn(qs)  # all L2 hits
+        warm += time.perf_counter() - t0
+    print(
+        f"{label:<8} round-trips/round={r.trips / rounds:5.1f}  "
+        f"cold={cold / rounds * 1000:6.2f} ms  warm={warm / rounds * 1000:6.2f} ms"
+    )
+
+
+async def main(rounds: int, rtt_ms: float):
+    await _measure("single", _round_single, rounds, rtt_ms / 1000)
+    await _measure("batch", _round_batch, rounds, rtt_ms / 1000)
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rtt = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    asyncio.run(main(rounds, rtt))
@@ -0,0 +1,60 @@
+"""
+Redis footprint and hot-key decode CPU for a typical 5-snippet search
+result: legacy JSON vs the v1 binary format (plain / zlib / zstd).
+
+    PYTHONPATH=src python benchmarks/bench_cache_encoding.py [iterations]
+"""
+
+import json, sys, timeit
+
+from langchain_core.documents import Document
+
+from agent import cache
+
+SNIPPETS = [
+    "Argentina won the 2022 FIFA World Cup final against France 4-2 on penalties "
+    "after a 3-3 draw at Lusail Stadium.",
+    "Lionel Messi scored twice in the final and was named the tournament's best "
+    "player, collecting the Golden Ball for a second time.",
+    "Kylian Mbappé became only the second man to score a hat-trick in a World Cup "
+    "final, finishing as the competition's top scorer with eight goals.",
+    "Emiliano Martínez saved Kingsley Coman's spot-kick in the shoot-out and later "
+    "received the Golden Glove award as best goalkeeper.",
+    "The Qatar tournament was the first World Cup held in November and December, "
+    "moved from the usual mid-year slot because of summer heat.",
+]
+DOCS = [
+    Document(
+        page_content=text,
+        metadata={"title": f"World Cup final report {i}", "url": f"https://news.example.com/wc/{i}"},
+    )
+    for i, text in enumerate(SNIPPETS)
+]
+
+
+def _legacy_encode(docs):
+    return json.dumps(
+        [{"content": d.page_content, **d.metadata} for d in docs]
+    ).encode()
+
+
+def _row(label, raw, n):
+    secs = timeit.timeit(lambda: cache._maybe_decode(raw), number=n)
+    print(f"{label:<14} {len(raw):6d} B   decode {secs / n * 1e6:7.2f} µs")
+
+
+def main(n: int):
+    _row("legacy json", _legacy_encode(DOCS), n)
+    for codec, name in (
+        (cache._CODEC_NONE, "msgpack"),
+        (cache._CODEC_ZLIB, "msgpack+zlib"),
+        (cache._CODEC_ZSTD, "msgpack+zstd"),
+    ):
+        if codec == cache._CODEC_ZSTD and cache.zstd is None:
+            continue
+        cache._CODEC, cache.COMPRESS_MIN = codec, 0
+        _row(name, cache._maybe_encode(DOCS), n)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,100 @@
+"""
+Per-question latency: fresh ClientSession per query vs pooled sessions.
+
+Spins up a local aiohttp stub that answers in Bing's JSON shape, then
+fires QUERIES concurrent searches per "question" (what ``search_node``
+does) through both code paths and prints p50/p99 per question.
+
+    PYTHONPATH=src python benchmarks/bench_http_pool.py [questions]
+
+Note: the stub speaks plain HTTP on localhost, so the gain shown here is
+TCP set-up + connector overhead only; against real HTTPS endpoints the
+TLS handshake and DNS lookup make the difference considerably larger.
+"""
+
+import asyncio, sys, time
+import statistics
+
+import aiohttp
+from aiohttp import web
+
+from agent import tools
+from agent.http_pool import close_sessions
+
+QUERIES = 5
+STUB_DELAY = 0.002  # simulated provider think-time
+
+
+async def _stub(request: web.Request) -> web.Response:
+    await asyncio.sleep(STUB_DELAY)
+    q = request.query.get("q", "")
+    return web.json_response(
+        {
+            "webPages": {
+                "value": [
+                    {"name": f"{q} {i}", "url": f"https://x/{q}/{i}", "snippet": q}
+                    for i in range(5)
+                ]
+            }
+        }
+    )
+
+
+async def _per_query_session(url: str, query: str):
+    """The pre-pool behaviour: new session (and connection) every call."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, params={"q": query, "count": 5}) as resp:
+            return await resp.json()
+
+
+async def _pooled(query: str):
+    return await tools._bing_search(query)
+
+
+def _pct(samples, p):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(p * len(s)))]
+
+
+async def _measure(label, fn, n_questions):
+    lat = []
+    for i in range(n_questions):
+        t0 = time.perf_counter()
+        await asyncio.gather(*(fn(f"q{i}-{j}") for j in range(QUERIES)))
+        lat.append((time.perf_counter() - t0) * 1000)
+    print(
+        f"{label:<22} p50={_pct(lat, .50):6.2f} ms  p99={_pct(lat, .99):6.2f} ms  "
+        f"mean={statistics.mean(lat):6.2f} ms"
+    )
+    return lat
+
+
+async def main(n_questions: int):
+    app = web.Application()
+    app.router.add_get("/search", _stub)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    url = f"http://127.0.0.1:{port}/search"
+
+    tools.BING_KEY = "bench"
+    tools.BING_ENDPOINT = url
+
+    try:
+        base = await _measure(
+            "session per query", lambda q: _per_query_session(url, q), n_questions
+        )
+        pooled = await _measure("pooled session", _pooled, n_questions)
+        print(
+            f"gain: p50 {_pct(base, .5) - _pct(pooled, .5):+.2f} ms, "
+            f"p99 {_pct(base, .99) - _pct(pooled, .99):+.2f} ms per question"
+        )
+    finally:
+        await close_sessions()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 300))
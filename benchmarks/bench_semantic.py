@@ -0,0 +1,94 @@
+"""
+Semantic cache on a synthetic paraphrase set: lookup latency, hit-rate on
+paraphrases of indexed questions, and false hits on unseen questions that
+share the template but not the subject.
+
+    PYTHONPATH=src python benchmarks/bench_semantic.py [subjects] [threshold]
+"""
+
+import random, statistics, sys, time
+
+from agent import semantic
+
+TEMPLATES = [
+    ("What is {s}?", ["what's {s}", "Explain {s}", "can you tell me what {s} is",
+                      "{s} - what is it?", "WHAT IS {s}??"]),
+    ("How does {s} work?", ["how {s} works", "explain how {s} works",
+                            "How does {s} actually work", "how do {s} work?"]),
+    ("What are the benefits of {s}?", ["benefits of {s}", "what are {s} benefits",
+                                       "Why use {s}? benefits",
+                                       "what are the main benefits of {s}"]),
+    ("Who invented {s}?", ["who created {s}", "who invented the {s}",
+                           "{s} inventor?", "Who was the inventor of {s}"]),
+]
+SUBJECTS = [
+    "retrieval augmented generation", "vector databases", "the transformer",
+    "gradient descent", "kubernetes", "rust ownership", "quantum computing",
+    "the printing press", "bitcoin", "http/2", "garbage collection",
+    "the telephone", "photosynthesis", "solar panels", "lithium batteries",
+    "python generators", "redis streams", "the jet engine", "crispr",
+    "nuclear fusion", "the world wide web", "public key cryptography",
+    "the bloom filter", "the raft consensus algorithm", "graph neural networks",
+    "the diesel engine", "wind turbines", "the internet protocol",
+    "container images", "webassembly", "the hubble telescope", "vaccines",
+    "mrna vaccines", "the steam engine", "electric cars", "3d printing",
+    "the lightbulb", "tcp congestion control", "reinforcement learning",
+    "the radio", "desalination", "carbon capture", "the microwave oven",
+    "the barcode", "bluetooth", "gps", "the compass", "the refrigerator",
+]
+
+
+def _typo(text: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2 :]
+
+
+def build(n_subjects: int, rng: random.Random):
+    subjects = (SUBJECTS * (n_subjects // len(SUBJECTS) + 1))[:n_subjects]
+    subjects = [s if i < len(SUBJECTS) else f"{s} {i}" for i, s in enumerate(subjects)]
+    seen, unseen = subjects[::2], subjects[1::2]
+    canon, queries, negatives = [], [], []
+    for s in seen:
+        for tmpl, paras in TEMPLATES:
+            c = tmpl.format(s=s)
+            canon.append(c)
+            for p in paras:
+                p = p.format(s=s)
+                queries.append((rng.random() < 0.2 and _typo(p, rng) or p, c))
+    for s in unseen:
+        for tmpl, paras in TEMPLATES:
+            negatives.append(rng.choice(paras).format(s=s))
+    return canon, queries, negatives
+
+
+def main(n_subjects: int, threshold: float):
+    rng = random.Random(7)
+    canon, queries, negatives = build(n_subjects, rng)
+    semantic.THRESHOLD = threshold
+    semantic.reset()
+    for c in canon:
+        semantic.remember("bench", c)
+
+    lat, right, wrong = [], 0, 0
+    for q, expected in queries:
+        t0 = time.perf_counter()
+        got = semantic.nearest("bench", q)
+        lat.append(time.perf_counter() - t0)
+        right += got == expected
+        wrong += got is not None and got != expected
+    false_hits = sum(semantic.nearest("bench", q) is not None for q in negatives)
+
+    lat_us = sorted(x * 1e6 for x in lat)
+    p95 = lat_us[int(0.95 * (len(lat_us) - 1))]
+    print(f"index size     {len(canon):6d} questions  (dim {semantic.DIM}, threshold {threshold})")
+    print(f"lookup         p50 {statistics.median(lat_us):7.1f} µs   p95 {p95:7.1f} µs")
+    print(f"paraphrase hit {right / len(queries):6.1%}  ({right}/{len(queries)})")
+    print(f"wrong match    {wrong / len(queries):6.1%}")
+    print(f"false hit      {false_hits / len(negatives):6.1%}  on {len(negatives)} unseen questions")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else semantic.THRESHOLD,
+    )
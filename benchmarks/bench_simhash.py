@@ -0,0 +1,90 @@
+"""
+SimHash near-duplicate detection on synthetic search snippets: per-doc
+fingerprint + dedup cost, and how many edited copies of a story collapse
+(recall) without merging distinct stories (false merges).
+
+    PYTHONPATH=src python benchmarks/bench_simhash.py [rounds] [max_distance]
+"""
+
+import random, sys, time
+
+from agent import fingerprint
+
+WORDS = (
+    "government announced new policy energy market prices rose sharply after "
+    "report showed growth slowed quarter analysts expect central bank rates "
+    "inflation climate summit leaders agreed emissions targets researchers "
+    "discovered protein structure vaccine trial results published journal "
+    "company shares fell profit warning investors league champions final "
+    "scored penalty stadium record crowd election candidates debate voters "
+    "polls opened city council approved budget transport network expansion"
+).split()
+
+
+def _story(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(30, 45))).capitalize() + "."
+
+
+def _edit(text: str, rng: random.Random) -> str:
+    """What another outlet / query does to the same snippet."""
+    words = text.rstrip(".").split()
+    kind = rng.randrange(4)
+    if kind == 0:  # casing + punctuation
+        return text.upper().replace(" ", ", ", 2) + "!"
+    if kind == 1:  # byline prefix
+        return "Reuters - " + text
+    if kind == 2:  # truncated "..." snippet
+        return " ".join(words[: len(words) - 4]) + " ..."
+    i = rng.randrange(len(words))  # one word changed
+    words[i] = rng.choice(WORDS)
+    return " ".join(words) + "."
+
+
+def _round(rng: random.Random, n_stories: int):
+    """One search round: a few stories, each returned 1-4 times."""
+    docs, story_of = [], []
+    for s_id in range(n_stories):
+        s = _story(rng)
+        for text in [s] + [_edit(s, rng) for _ in range(rng.randint(0, 3))]:
+            docs.append(text)
+            story_of.append(s_id)
+    order = list(range(len(docs)))
+    rng.shuffle(order)
+    return [docs[i] for i in order], [story_of[i] for i in order]
+
+
+def main(n_rounds: int, max_distance: int):
+    rng = random.Random(11)
+    rounds = [_round(rng, 10) for _ in range(n_rounds)]
+    fingerprint.simhash.cache_clear()
+
+    n = dups = collapsed = lost = 0
+    fp_secs = dedup_secs = 0.0
+    for docs, story_of in rounds:
+        t0 = time.perf_counter()
+        fps = [fingerprint.simhash(d) for d in docs]
+        t1 = time.perf_counter()
+        kept = fingerprint.unique(fps, max_distance)
+        t2 = time.perf_counter()
+        fp_secs += t1 - t0
+        dedup_secs += t2 - t1
+
+        stories = set(story_of)
+        n += len(docs)
+        dups += len(docs) - len(stories)
+        collapsed += len(docs) - len(kept)
+        lost += len(stories) - len({story_of[i] for i in kept})
+
+    print(f"docs            {n:6d}  ({n_rounds} rounds, max distance {max_distance})")
+    print(f"fingerprint     {fp_secs / n * 1e6:7.1f} µs/doc")
+    print(f"dedup           {dedup_secs / n * 1e6:7.1f} µs/doc")
+    print(f"recall          {(collapsed - lost) / dups:7.1%}  of {dups} near-duplicates collapsed")
+    print(f"false merges    {lost:6d}  distinct stories lost")
+    print(f"dedup ratio     {collapsed / n:7.1%}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else fingerprint.MAX_DISTANCE,
+    )
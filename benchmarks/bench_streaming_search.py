@@ -0,0 +1,72 @@
+"""
+search_node latency with a heavy-tailed stub provider: wait-for-all
+(``asyncio.gather``) vs the opt-in streaming mode with early exit.
+
+Each stub query takes a log-normal ~60 ms, but 10 % of them hit a
+Pareto tail (a slow shard, a retry chain) of up to a couple of seconds.
+
+    PYTHONPATH=src python benchmarks/bench_streaming_search.py [rounds]
+"""
+
+import asyncio, random, statistics, sys, time
+
+from langchain_core.documents import Document
+
+from agent import nodes
+
+QUERIES = [f"query {i}" for i in range(5)]
+DOCS_PER_QUERY = 5
+
+
+def _latency(rng: random.Random) -> float:
+    if rng.random() < 0.10:
+        return min(0.3 * rng.paretovariate(1.5), 3.0)
+    return rng.lognormvariate(-2.8, 0.35)  # median ≈ 60 ms
+
+
+def _stub(rng: random.Random):
+    async def web_search(q: str):
+        await asyncio.sleep(_latency(rng))
+        return [
+            Document(
+                page_content=f"Result {j} for {q}: {rng.random()} distinct finding number {j}.",
+                metadata={"title": q, "url": f"https://stub/{q}/{j}/{rng.random()}"},
+            )
+            for j in range(DOCS_PER_QUERY)
+        ]
+
+    return web_search
+
+
+async def _round(i: int) -> tuple:
+    state = {"question": f"benchmark question {i}", "queries": QUERIES, "iter": 0}
+    t0 = time.perf_counter()
+    out = await nodes.search_node(state)
+    return time.perf_counter() - t0, len(out["issued"])
+
+
+def _run(streaming: bool, rounds: int):
+    nodes.web_search = _stub(random.Random(3))  # same latency draws per mode
+    nodes.SEARCH_STREAMING = streaming
+
+    async def _all():
+        return [await _round(i) for i in range(rounds)]
+
+    res = asyncio.run(_all())
+    lat = sorted(r[0] * 1000 for r in res)
+    p95 = lat[int(0.95 * (len(lat) - 1))]
+    issued = statistics.mean(r[1] for r in res)
+    label = "streaming" if streaming else "gather"
+    print(f"{label:<10} p50 {statistics.median(lat):7.1f} ms   p95 {p95:7.1f} ms   "
+          f"queries used {issued:.1f}/{len(QUERIES)}")
+    return p95
+
+
+def main(rounds: int):
+    base = _run(False, rounds)
+    fast = _run(True, rounds)
+    print(f"p95 reduction {1 - fast / base:.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,58 @@
+"""
+Per-request telemetry overhead of each export mode, measured on the
+offline pipeline (stub LLM, mock search) so telemetry is most of the work.
+
+Each mode runs in its own process, because the OTel tracer provider can
+only be installed once per process.  CPU time includes the exporter's
+background thread; the console exporter writes to /dev/null.
+
+    PYTHONPATH=src python benchmarks/bench_telemetry.py [requests]
+"""
+
+import asyncio, os, subprocess, sys, time
+
+MODES = {
+    "off":           {"OTEL_SAMPLE_RATIO": "0", "OTEL_TAIL_LATENCY_MS": "0",
+                      "OTEL_TAIL_ERRORS": "0", "OTEL_CONSOLE_EXPORTER": "0"},
+    "console, all":  {"OTEL_SAMPLE_RATIO": "1", "OTEL_CONSOLE_EXPORTER": "1"},
+    "console, 10%":  {"OTEL_SAMPLE_RATIO": "0.1", "OTEL_CONSOLE_EXPORTER": "1"},
+    "no exporter":   {"OTEL_SAMPLE_RATIO": "1", "OTEL_CONSOLE_EXPORTER": "0"},
+}
+
+
+def _worker(n: int) -> None:
+    from opentelemetry import trace
+    from agent import answer_question
+
+    async def _all():
+        for i in range(n):
+            await answer_question(f"telemetry benchmark question {i}?", use_cache=False)
+
+    asyncio.run(_all())  # warm-up imports, caches and lazily built pieces
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    asyncio.run(_all())
+    trace.get_tracer_provider().force_flush()
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    print(f"{wall / n * 1e3:.3f} {cpu / n * 1e3:.3f}")
+
+
+def main(n: int) -> None:
+    base = None
+    for name, env in MODES.items():
+        out = subprocess.run(
+            [sys.executable, __file__, "--worker", str(n)],
+            env={**os.environ, **env, "LLM_CACHE": "0", "ANSWER_CACHE": "0",
+                 "PROM_PORT": "0", "OTEL_EXPORTER_OTLP_ENDPOINT": ""},
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True,
+        ).stdout.split()
+        wall, cpu = float(out[-2]), float(out[-1])
+        base = cpu if base is None else base
+        print(f"{name:<14} wall {wall:6.2f} ms/req   cpu {cpu:6.2f} ms/req   "
+              f"overhead {cpu - base:+6.2f} ms/req")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--worker"]:
+        _worker(int(sys.argv[2]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
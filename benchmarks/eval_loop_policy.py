@@ -0,0 +1,79 @@
+"""
+Offline evaluation of the reflect-loop policies (``agent.policy``):
+LLM calls and search calls spent vs answer coverage.
+
+Every case in ``fixtures/loop_policy.json`` scripts the search results per
+query and reflect's reply per call; the graph runs for real around them.
+Coverage is the share of a case's required facts present in the docs
+synthesize cited.
+
+    PYTHONPATH=src python benchmarks/eval_loop_policy.py [max_iter]
+"""
+
+import asyncio, json, pathlib, sys
+
+from langchain_core.documents import Document
+
+from agent import answer_cache, nodes, policy
+from agent import graph as g
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures" / "loop_policy.json"
+
+
+def _fake_tools(case: dict, counts: dict):
+    texts = {url: text for docs in case["results"].values() for url, text in docs}
+
+    async def web_search(q: str):
+        counts["search"] += 1
+        return [
+            Document(page_content=text, metadata={"title": q, "url": url})
+            for url, text in case["results"].get(q, [])
+        ]
+
+    async def call_llm(prompt, node="llm", **kwargs):
+        if node == "generate":
+            return json.dumps(case["queries"])
+        replies = case["reflect"]
+        reply = replies[min(counts["reflect"], len(replies) - 1)]
+        counts["reflect"] += 1
+        return json.dumps(reply)
+
+    async def call_llm_stream(prompt, node="llm", meta=None, **kwargs):
+        yield "answer"
+
+    return texts, web_search, call_llm, call_llm_stream
+
+
+async def _run_case(case: dict) -> dict:
+    counts = {"search": 0, "reflect": 0}
+    texts, nodes.web_search, nodes.call_llm, nodes.call_llm_stream = _fake_tools(case, counts)
+    out = await g.answer_question(case["question"], use_cache=False)
+    cited = " ".join(texts.get(c["url"], "") for c in out["citations"]).lower()
+    found = sum(fact.lower() in cited for fact in case["required"])
+    return {**counts, "coverage": found / len(case["required"])}
+
+
+def main(max_iter: int):
+    cases = json.loads(FIXTURES.read_text())["cases"]
+    answer_cache.ENABLED = False
+    nodes._LLM_CACHE_ON = False
+    policy.MAX_ITER = max_iter
+    totals = {}
+    for name, cls in policy.POLICIES.items():
+        policy.set_policy(cls())
+        rows = [asyncio.run(_run_case(c)) for c in cases]
+        totals[name] = rows
+        print(f"\n{name} (max_iter={max_iter})")
+        for case, r in zip(cases, rows):
+            print(f"  {case['name']:<28} reflect {r['reflect']}  search {r['search']}  "
+                  f"coverage {r['coverage']:.0%}")
+    print()
+    for name, rows in totals.items():
+        n = len(rows)
+        print(f"{name:<9} reflect calls {sum(r['reflect'] for r in rows):3d}   "
+              f"search calls {sum(r['search'] for r in rows):3d}   "
+              f"mean coverage {sum(r['coverage'] for r in rows) / n:.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -1,12 +1,20 @@
 """
 Public API: answer_sync, answer_question, nodes sub-module.
-Initialises tracing/metrics on first import.
+
+Importing the package has no side effects: the pipeline (LangGraph,
+LangChain, providers) is imported on first attribute access, tracing is
+initialised on the first graph run, and the Prometheus scrape server only
+starts in server mode (``observability.use_server_mode``).
 """
 
-from .observability import init as _init_obs
+from typing import Any
+
+__all__ = ["answer_sync", "answer_question"]
 
-_init_obs()  # side-effect: start tracing + Prom server
 
-from .graph import answer_sync, answer_question  # noqa: E402  (after side-effects)
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        from . import graph
 
-__all__ = ["answer_sync", "answer_question"]
+        return getattr(graph, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
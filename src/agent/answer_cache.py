@@ -0,0 +1,119 @@
+"""
+Whole-answer cache with stale-while-revalidate.
+
+Entries are keyed on a normalised question (case, whitespace and trailing
+punctuation folded) and stored through ``agent.cache`` together with the
+time they were produced:
+
+* younger than ANSWER_CACHE_FRESH_SECS (600)  → served as-is
+* younger than fresh + ANSWER_CACHE_STALE_SECS (3600) → served at once,
+  while the caller schedules a background refresh
+* older → gone (the Redis TTL covers both windows)
+
+With Redis, entries are read from Redis on every lookup (never from a
+worker's in-process L1), so ``invalidate`` on one worker takes effect on
+all of them immediately.
+
+With SEMANTIC_CACHE=1 an exact miss falls back to the closest earlier
+question (``agent.semantic``), so paraphrases share one entry.
+
+ANSWER_CACHE=0 disables it.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from . import cache, semantic
+
+ENABLED = os.getenv("ANSWER_CACHE", "1") != "0"
+FRESH_SECS = int(os.getenv("ANSWER_CACHE_FRESH_SECS", "600"))
+STALE_SECS = int(os.getenv("ANSWER_CACHE_STALE_SECS", "3600"))
+
+FRESH, STALE = "fresh", "stale"
+_PREFIX = "answer:"
+cache.bypass_l1(_PREFIX)  # one invalidation must reach every worker
+
+
+def normalize(question: str) -> str:
+    q = re.sub(r"\s+", " ", question).strip().lower()
+    return q.rstrip("?!. ")
+
+
+def key_for(question: str) -> str:
+    return f"{_PREFIX}{normalize(question)}"
+
+
+def _alias(question: str) -> Optional[str]:
+    """Normalised earlier question that *question* paraphrases, if any."""
+    if not semantic.ENABLED:
+        return None
+    return semantic.nearest("answer", normalize(question))
+
+
+def remember(question: str) -> None:
+    """Let future paraphrases of *question* find its entry."""
+    if semantic.ENABLED:
+        semantic.remember("answer", normalize(question))
+
+
+def make_entry(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "answer": result.get("answer", ""),
+        "citations": result.get("citations", []),
+        "ts": time.time(),  # wall clock: entries are shared across workers
+        "cacheable": result.get("cacheable", True),  # False for LLM error fallbacks
+    }
+
+
+def cacheable(entry: Dict[str, Any]) -> bool:
+    return entry.get("cacheable", True)
+
+
+async def get(question: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Return ``(entry, FRESH | STALE)`` or ``(None, None)`` on a miss."""
+    if not ENABLED:
+        return None, None
+    entry = await cache.lookup(key_for(question))
+    if not entry and (alias := _alias(question)) is not None:
+        entry = await cache.lookup(key_for(alias))
+    if not entry:
+        return None, None
+    age = time.time() - entry["ts"]
+    if age < FRESH_SECS:
+        return entry, FRESH
+    if age < FRESH_SECS + STALE_SECS:
+        return entry, STALE
+    return None, None
+
+
+async def put(question: str, entry: Dict[str, Any]) -> None:
+    if ENABLED and cacheable(entry):
+        await cache.store(key_for(question), entry, FRESH_SECS + STALE_SECS)
+        remember(question)
+
+
+async def invalidate(question: str) -> bool:
+    """Forget the cached answer for *question* (all phrasings that normalise alike)."""
+    if await cache.invalidate(key_for(question)):
+        return True
+    alias = _alias(question)
+    return alias is not None and await cache.invalidate(key_for(alias))
+
+
+def as_payload(entry: Dict[str, Any], status: Optional[str]) -> Dict[str, Any]:
+    """
+    Public result shape; *status* is ``None`` for a freshly computed answer.
+    Citations are copied so callers can't mutate the cached entry.
+    """
+    payload = {
+        "answer": entry["answer"],
+        "citations": [dict(c) for c in entry["citations"]],
+        "cached": status is not None,
+    }
+    if status is not None:
+        payload["stale"] = status == STALE
+    return payload
@@ -0,0 +1,329 @@
+"""
+Batch mode: many questions through one process.
+
+``agent --batch questions.jsonl`` (or ``--batch -`` for stdin) and the
+server's ``/api/batch`` / ``/api/jobs`` answer every question with
+``answer_question`` on one event loop, at most ``concurrency`` at a time,
+so provider sessions, the search / LLM / answer caches and the compiled
+graph are shared by the whole batch:
+
+* questions that normalise alike (``answer_cache.normalize``) run once;
+  every copy gets the result, flagged ``"deduplicated": true``;
+* the search cache keys sub-queries in normalised form
+  (``evidence.query_key``), so overlapping questions resolve a shared
+  sub-query once – concurrent asks are single-flighted, later ones hit
+  the search cache.
+
+Input is JSONL, one question per line, either a JSON string or an object:
+
+    {"id": "q1", "question": "…", "budget": 5}     # id / budget optional
+
+Results are streamed as JSONL in completion order:
+
+    {"index": 0, "id": "q1", "question": "…", "answer": "…",
+     "citations": […], "cached": false, "latency_ms": 812.4}
+
+A line that can't be parsed or answered yields ``{"index", "error"}``
+instead.  A throughput / latency-percentile summary closes the run.
+
+    BATCH_CONCURRENCY       questions in flight at once       (8)
+    BATCH_MAX_CONCURRENCY   cap on a request's concurrency   (32)
+    BATCH_MAX_QUESTIONS     questions per HTTP batch / job  (1000)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import sys
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from . import answer_cache, budget, semantic
+from .graph import answer_question, drain_refreshes
+from .http_pool import close_sessions
+
+CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "1000"))
+
+READ_AHEAD = 1024  # input lines buffered ahead of the workers
+
+Item = Tuple[int, Dict[str, Any]]
+Items = Union[Iterable[Item], AsyncIterable[Item]]
+_DONE = object()
+
+
+def parse_request(index: int, data: Any) -> Item:
+    """``(index, request)``; an unusable request carries an ``error``."""
+    if isinstance(data, str):
+        data = {"question": data}
+    if not isinstance(data, dict) or not str(data.get("question") or "").strip():
+        return index, {
+            "error": "expected a question string or an object with 'question'"
+        }
+    if data.get("budget") is not None:
+        try:
+            data = {**data, "budget": budget.checked(data["budget"])}
+        except (TypeError, ValueError) as e:
+            return index, {**_id(data), "error": str(e)}
+    return index, data
+
+
+def _id(req: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": req["id"]} if "id" in req else {}
+
+
+def _parse_line(index: int, line: str) -> Optional[Item]:
+    if not line.strip():
+        return None
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError as e:
+        return index, {"error": f"invalid JSON: {e.msg}"}
+    return parse_request(index, data)
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[Item]:
+    """``parse_request`` per non-blank JSONL line (index = line number)."""
+    for index, line in enumerate(lines):
+        if (item := _parse_line(index, line)) is not None:
+            yield item
+
+
+async def read_items(src: TextIO) -> AsyncIterator[Item]:
+    """
+    ``parse_lines`` over *src*, read on a daemon thread so a slow producer
+    (``--batch -`` behind a pipe) never blocks the questions in flight.
+    """
+    loop = asyncio.get_running_loop()
+    lines: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=READ_AHEAD)
+
+    def _put(line: Any) -> None:
+        asyncio.run_coroutine_threadsafe(lines.put(line), loop).result()
+
+    def _pump() -> None:
+        end: Any = _DONE
+        try:
+            for line in src:
+                _put(line)
+        except Exception as e:  # re-raised by the reader below
+            end = e
+        try:
+            _put(end)
+        except RuntimeError:
+            pass  # loop already closed: the batch was abandoned
+
+    threading.Thread(target=_pump, name="batch-input", daemon=True).start()
+    index = 0
+    while (line := await lines.get()) is not _DONE:
+        if isinstance(line, Exception):
+            raise line
+        if (item := _parse_line(index, line)) is not None:
+            yield item
+        index += 1
+
+
+async def _aiter(items: Items) -> AsyncIterator[Item]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+def percentile(sorted_vals: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_vals:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_vals)))
+    return sorted_vals[rank - 1]
+
+
+class _Dedupe:
+    """One ``answer_question`` run per (normalised question, budget)."""
+
+    def __init__(self, use_cache: bool):
+        self._use_cache = use_cache
+        self._runs: Dict[
+            Tuple[str, Optional[float]], "asyncio.Future[Dict[str, Any]]"
+        ] = {}
+
+    async def answer(
+        self, question: str, budget_ms: Optional[float]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """``(result, deduplicated)`` – the flag is set for every copy after the first."""
+        key = (answer_cache.normalize(question), budget_ms)
+        run = self._runs.get(key)
+        shared = run is not None
+        if run is None:
+            run = self._runs[key] = asyncio.ensure_future(
+                answer_question(question, budget_ms, self._use_cache)
+            )
+        return await asyncio.shield(run), shared
+
+    def cancel(self) -> None:
+        for run in self._runs.values():
+            run.cancel()
+
+
+async def _answer(
+    dedupe: _Dedupe, index: int, req: Dict[str, Any], budget_ms: Optional[float]
+) -> Dict[str, Any]:
+    head = {"index": index, **_id(req)}
+    if "error" in req:
+        return {**head, "error": req["error"]}
+    question = str(req["question"])
+    t0 = time.perf_counter()
+    try:
+        secs = req.get("budget")
+        result, shared = await dedupe.answer(
+            question, secs * 1000 if secs is not None else budget_ms
+        )
+    except Exception as e:  # one bad question must not sink the batch
+        return {**head, "question": question, "error": f"{type(e).__name__}: {e}"}
+    rec = {
+        **head,
+        "question": question,
+        "answer": result.get("answer"),
+        "citations": result.get("citations", []),
+        "cached": bool(result.get("cached")),
+        "latency_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+    return {**rec, "deduplicated": True} if shared else rec
+
+
+class Tally:
+    """Counts and latencies of a batch, summarised at the end."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.counts = {"ok": 0, "errors": 0, "cached": 0, "deduplicated": 0}
+        self.latencies: List[float] = []
+
+    def add(self, rec: Dict[str, Any]) -> None:
+        if "error" in rec:
+            self.counts["errors"] += 1
+            return
+        self.counts["ok"] += 1
+        self.counts["cached"] += rec["cached"]
+        self.counts["deduplicated"] += rec.get("deduplicated", False)
+        self.latencies.append(rec["latency_ms"])
+
+    def summary(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started
+        lat = sorted(self.latencies)
+        return {
+            **self.counts,
+            "questions": self.counts["ok"] + self.counts["errors"],
+            "wall_s": round(wall, 3),
+            "throughput_qps": round(self.counts["ok"] / wall, 2) if wall else 0.0,
+            "latency_ms": {f"p{p}": percentile(lat, p) for p in (50, 90, 95, 99)}
+            | {"max": lat[-1] if lat else 0.0},
+        }
+
+
+async def answer_stream(
+    items: Items,
+    concurrency: int = CONCURRENCY,
+    budget_ms: Optional[float] = None,
+    use_cache: bool = True,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield one record per item as it finishes, with at most *concurrency*
+    questions in flight.  Closing the iterator cancels the remaining work.
+    """
+    source = _aiter(items)  # shared by the workers: each pulls the next item
+    pulling = asyncio.Lock()  # an async generator can't be advanced twice at once
+    dedupe = _Dedupe(use_cache)
+    done: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    async def _worker() -> None:
+        try:
+            while True:
+                async with pulling:
+                    item = await anext(source, None)
+                if item is None:
+                    break
+                index, req = item
+                done.put_nowait(await _answer(dedupe, index, req, budget_ms))
+        finally:
+            done.put_nowait(_DONE)
+
+    workers = [asyncio.create_task(_worker()) for _ in range(max(1, concurrency))]
+    try:
+        running = len(workers)
+        while running:
+            rec = await done.get()
+            if rec is _DONE:
+                running -= 1
+                continue
+            yield rec
+        for w in workers:
+            w.result()  # surface a worker crash instead of a short batch
+    finally:
+        for w in workers:
+            w.cancel()
+        dedupe.cancel()
+
+
+async def run_batch(
+    items: Items,
+    out: TextIO,
+    concurrency: int = CONCURRENCY,
+    budget_ms: Optional[float] = None,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """Write each record of ``answer_stream`` to *out* as JSONL; return the summary."""
+    tally = Tally()
+    async for rec in answer_stream(items, concurrency, budget_ms, use_cache):
+        tally.add(rec)
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        out.flush()
+    return tally.summary()
+
+
+def format_summary(s: Dict[str, Any]) -> str:
+    lat = s["latency_ms"]
+    return (
+        f"[batch] {s['questions']} questions ({s['ok']} ok, {s['errors']} errors, "
+        f"{s['cached']} cached, {s['deduplicated']} deduplicated) in {s['wall_s']:.2f}s – "
+        f"{s['throughput_qps']:.2f} q/s; latency p50 {lat['p50']:.0f} ms, "
+        f"p90 {lat['p90']:.0f} ms, p99 {lat['p99']:.0f} ms, max {lat['max']:.0f} ms"
+    )
+
+
+async def main(
+    src: TextIO,
+    concurrency: int = CONCURRENCY,
+    budget_ms: Optional[float] = None,
+    use_cache: bool = True,
+    out: TextIO = sys.stdout,
+) -> Dict[str, Any]:
+    """CLI driver: run the batch, report, release shared resources."""
+    try:
+        summary = await run_batch(
+            read_items(src), out, concurrency, budget_ms, use_cache
+        )
+        print(format_summary(summary), file=sys.stderr, flush=True)
+        await drain_refreshes()
+        return summary
+    finally:
+        await close_sessions()
+        semantic.save()
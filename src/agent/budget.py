@@ -0,0 +1,90 @@
+"""
+Per-request latency budget.
+
+``answer_question(q, budget_ms=...)`` turns the budget into an absolute
+``deadline`` (``time.monotonic()`` seconds) that travels in the graph
+state.  Nodes read it from the state; the search tool reads it from a
+context variable that ``search_node`` sets around its provider calls.
+
+The synthesize step always keeps a reserved slice of the budget, so
+search / reflect stop early rather than eat into it.
+
+    AGENT_BUDGET_MS          default budget when none is given (unbounded)
+    BUDGET_SYNTH_RESERVE_MS  slice kept for synthesize            (1500)
+    BUDGET_LOOP_MIN_MS       time an extra search+reflect round
+                             needs before we attempt it            (2500)
+    BUDGET_FLIGHT_STEP_MS    granularity of shared budgeted runs    (250)
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+_DEFAULT_MS = os.getenv("AGENT_BUDGET_MS")
+SYNTH_RESERVE_SECS = float(os.getenv("BUDGET_SYNTH_RESERVE_MS", "1500")) / 1000
+LOOP_MIN_SECS = float(os.getenv("BUDGET_LOOP_MIN_MS", "2500")) / 1000
+FLIGHT_STEP_MS = float(os.getenv("BUDGET_FLIGHT_STEP_MS", "250"))
+
+_deadline: ContextVar[Optional[float]] = ContextVar("agent_deadline", default=None)
+
+
+def checked(value: Any) -> float:
+    """*value* as a positive, finite float; ValueError otherwise."""
+    number = float(value)  # ValueError / TypeError for non-numbers
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError(f"budget must be a positive finite number, got {value!r}")
+    return number
+
+
+def deadline_for(budget_ms: Optional[float] = None) -> Optional[float]:
+    """Absolute deadline for a request starting now (``None`` = unbounded)."""
+    if budget_ms is None and _DEFAULT_MS:
+        budget_ms = float(_DEFAULT_MS)
+    if budget_ms is None:
+        return None
+    return time.monotonic() + budget_ms / 1000
+
+
+def flight_budget(budget_ms: float) -> float:
+    """
+    *budget_ms* rounded down to ``FLIGHT_STEP_MS`` (budgets under one step
+    are kept as-is).  Concurrent requests share a run per rounded budget;
+    rounding down means a run joined later still ends before the joiner's
+    own deadline.
+    """
+    if budget_ms < FLIGHT_STEP_MS:
+        return budget_ms
+    return budget_ms // FLIGHT_STEP_MS * FLIGHT_STEP_MS
+
+
+def remaining(state: Optional[Dict[str, Any]] = None) -> float:
+    """Seconds left for this request; ``inf`` when there is no deadline."""
+    deadline = _deadline.get() if state is None else state.get("deadline")
+    if deadline is None:
+        return math.inf
+    return deadline - time.monotonic()
+
+
+def search_time_left() -> float:
+    """Seconds the search tool may spend without touching synthesize's share."""
+    return remaining() - SYNTH_RESERVE_SECS
+
+
+def can_loop(state: Dict[str, Any]) -> bool:
+    """Is there room for one more search + reflect round?"""
+    return remaining(state) - SYNTH_RESERVE_SECS >= LOOP_MIN_SECS
+
+
+@contextmanager
+def scoped(deadline: Optional[float]) -> Iterator[None]:
+    """Expose *deadline* to tool calls made inside the block."""
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
@@ -1,24 +1,74 @@
 """
-Thin Redis wrapper that caches *JSON-serialisable* results.
+Two-tier cache for *JSON-serialisable* results.
 
-* We convert LangChain ``Document`` objects to/from plain dicts so the
-  cache is language-agnostic and human-readable.
-* When REDIS_URL is missing or Redis is unreachable, the decorator
-  becomes a no-op and simply calls the wrapped coroutine.
+* L1 is a bounded in-process LRU (entry count + approximate byte size,
+  per-entry TTL).  It keeps the *decoded* value, so a hit returns the
+  ``Document`` list directly without any JSON round-trip.
+* L2 is Redis.  Values are stored in a small versioned binary format
+  (msgpack + explicit type tag, zstd/zlib above CACHE_COMPRESS_MIN bytes);
+  legacy JSON entries are still decoded.
+* When REDIS_URL is missing or Redis is unreachable, only L1 is used.
+* Misses are single-flighted: concurrent callers for one key in this
+  process share a single in-flight task, and a short Redis lease
+  (``lock:<key>``) makes other workers wait for the value instead of
+  calling the provider themselves.
+* ``fn.many(items)`` resolves a whole batch with one ``MGET``, computes
+  only the misses and writes them back in one pipelined round-trip.
+* ``@cached(..., semantic="ns")`` (with SEMANTIC_CACHE=1): on an exact
+  miss, a paraphrase of an earlier first argument reuses that call's key
+  (see ``agent.semantic``).
+* Keys under a prefix registered with ``bypass_l1`` skip L1 while Redis
+  is up, so an invalidation by any worker applies to all of them at once.
+
+L1 limits come from env: CACHE_L1_MAX_ENTRIES (1024), CACHE_L1_MAX_BYTES
+(8 MiB) and CACHE_L1_TTL (300 s, capped by the decorator's own ttl; an
+entry promoted from Redis never outlives its remaining Redis TTL).
 """
 
 from __future__ import annotations
 
-import os, sys, json
-from typing import Any, Awaitable, Callable, List, TypedDict
+import os, sys, json, time, asyncio, uuid, zlib
+from functools import wraps
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import ormsgpack
+from langchain_core.documents import Document
+
+try:  # optional: better ratio & faster than zlib
+    import zstandard as zstd
+except ImportError:  # pragma: no cover
+    zstd = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    import redis.asyncio as redis
 
-import redis.asyncio as redis
-from langchain.schema import Document
+from . import semantic as _semantic
+from .observability import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES, span
 
 # ──────────────────────────────────────────────────────────────────────────
 _REDIS_URL = os.getenv("REDIS_URL")
 _pool: "redis.Redis | None" = None
 
+L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "1024"))
+L1_MAX_BYTES = int(os.getenv("CACHE_L1_MAX_BYTES", str(8 * 1024 * 1024)))
+L1_TTL = int(os.getenv("CACHE_L1_TTL", "300"))
+LOCK_MS = int(os.getenv("CACHE_LOCK_MS", "5000"))  # cross-worker fill lease
+LOCK_POLL_SECS = 0.05
+
+_MISS = object()  # sentinel: a cached ``None`` is still a hit
+_L2_ONLY: Tuple[str, ...] = ()  # key prefixes kept out of L1 while Redis is up
+
 
 async def get_redis() -> "redis.Redis | None":
     """
@@ -32,7 +82,9 @@ async def get_redis() -> "redis.Redis | None":
         return None
 
     try:
-        _pool = redis.from_url(_REDIS_URL, encoding="utf-8", decode_responses=True)
+        import redis.asyncio as redis  # only when a Redis tier is configured
+
+        _pool = redis.from_url(_REDIS_URL)  # raw bytes: values are binary
         await _pool.ping()  # cheap health-check
         return _pool
     except Exception as e:
@@ -41,27 +93,186 @@ async def get_redis() -> "redis.Redis | None":
         return None
 
 
-# ────────────────────────── helpers to (de)serialise docs ─────────────────
-class _DocJSON(TypedDict):
-    content: str
-    title: str | None
-    url: str | None
+def bypass_l1(prefix: str) -> None:
+    """Keep keys under *prefix* in Redis only (L1 still serves when Redis is absent)."""
+    global _L2_ONLY
+    if prefix not in _L2_ONLY:
+        _L2_ONLY = (*_L2_ONLY, prefix)
 
 
-def _docs_to_json(docs: List[Document]) -> str:
-    payload: List[_DocJSON] = [
-        {
-            "content": d.page_content,
-            "title": (d.metadata or {}).get("title"),
-            "url": (d.metadata or {}).get("url"),
-        }
-        for d in docs
-    ]
-    return json.dumps(payload)
+def _in_l1(key: str) -> bool:
+    # call after get_redis(): until then _pool is unset
+    return _pool is None or not key.startswith(_L2_ONLY)
+
+
+# ────────────────────────── L1: in-process LRU ────────────────────────────
+def _approx_size(val: Any) -> int:
+    """Cheap byte estimate; exactness doesn't matter, boundedness does."""
+    if isinstance(val, list) and val and isinstance(val[0], Document):
+        return sum(len(d.page_content) + len(str(d.metadata or "")) + 64 for d in val)
+    if isinstance(val, (str, bytes)):
+        return len(val)
+    try:
+        return len(json.dumps(val))
+    except TypeError:
+        return sys.getsizeof(val)
+
+
+class _LRU:
+    """Ordered dict of ``key -> (expires_at, size, value)``, oldest first."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISS
+        expires, size, val = entry
+        if expires < time.monotonic():
+            self._drop(key)
+            CACHE_EVICTIONS.labels("l1").inc()
+            return _MISS
+        self._data.move_to_end(key)
+        return val
+
+    def set(self, key: str, val: Any, ttl: float) -> None:
+        size = _approx_size(val)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return  # would evict everything else; not worth holding
+        if key in self._data:
+            self._drop(key)
+        self._data[key] = (time.monotonic() + ttl, size, val)
+        self.bytes += size
+        while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+            self._drop(next(iter(self._data)))
+            CACHE_EVICTIONS.labels("l1").inc()
+
+    def pop(self, key: str) -> bool:
+        if key not in self._data:
+            return False
+        self._drop(key)
+        return True
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._data.pop(key)
+        self.bytes -= size
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.bytes = 0
+
+
+_l1 = _LRU(L1_MAX_ENTRIES, L1_MAX_BYTES)
+
+
+def _fresh_copy(val: Any) -> Any:
+    # hand out a new list so callers can't reorder / truncate our entry
+    return list(val) if isinstance(val, list) else val
+
+
+# ────────────────────────── binary value format (v1) ──────────────────────
+#
+#   b"\x00\xac" | version | tag | codec | msgpack payload (maybe compressed)
+#
+# The leading NUL can never start a JSON text, so legacy JSON entries
+# written before this format stay readable during a rollout.
+_MAGIC = b"\x00\xac"
+_VERSION = 1
+_TAG_VALUE, _TAG_DOCS = 0, 1
+_CODEC_NONE, _CODEC_ZLIB, _CODEC_ZSTD = 0, 1, 2
+
+COMPRESS_MIN = int(os.getenv("CACHE_COMPRESS_MIN", "512"))  # bytes
+_COMPRESSION = os.getenv("CACHE_COMPRESSION", "zstd" if zstd else "zlib")
+_CODEC = {"zstd": _CODEC_ZSTD, "zlib": _CODEC_ZLIB}.get(_COMPRESSION, _CODEC_NONE)
+if _CODEC == _CODEC_ZSTD and zstd is None:
+    _CODEC = _CODEC_ZLIB
+
+_zstd_c = zstd.ZstdCompressor(level=3) if zstd else None
+_zstd_d = zstd.ZstdDecompressor() if zstd else None
+_CODEC_ERRORS = (zlib.error, zstd.ZstdError) if zstd else (zlib.error,)
 
 
+def _compress(body: bytes) -> Tuple[int, bytes]:
+    if _CODEC == _CODEC_NONE or len(body) < COMPRESS_MIN:
+        return _CODEC_NONE, body
+    packed = _zstd_c.compress(body) if _CODEC == _CODEC_ZSTD else zlib.compress(body, 6)  # type: ignore[union-attr]
+    if len(packed) >= len(body):
+        return _CODEC_NONE, body
+    return _CODEC, packed
+
+
+def _decompress(codec: int, body: bytes) -> bytes:
+    """ValueError for an unknown codec or a corrupt / truncated body."""
+    if codec == _CODEC_NONE:
+        return body
+    try:
+        if codec == _CODEC_ZLIB:
+            return zlib.decompress(body)
+        if codec == _CODEC_ZSTD and _zstd_d is not None:
+            return _zstd_d.decompress(body)
+    except _CODEC_ERRORS as e:
+        raise ValueError(f"corrupt cache body ({e})") from e
+    raise ValueError(f"unsupported cache codec {codec}")
+
+
+def _maybe_encode(val: Any) -> bytes:
+    """
+    Supported return types:
+      • list[Document]     -> tag DOCS, msgpack of [content, title, url] rows
+      • str / int / dict   -> tag VALUE, msgpack of the value
+    Raises TypeError for anything msgpack can't represent.
+    """
+    if isinstance(val, list) and val and isinstance(val[0], Document):
+        tag = _TAG_DOCS
+        val = [
+            [
+                d.page_content,
+                (d.metadata or {}).get("title"),
+                (d.metadata or {}).get("url"),
+            ]
+            for d in val
+        ]
+    else:
+        tag = _TAG_VALUE
+    codec, body = _compress(ormsgpack.packb(val))
+    return _MAGIC + bytes((_VERSION, tag, codec)) + body
+
+
+def _maybe_decode(val: "bytes | str") -> Any:
+    """Decode a v1 binary entry, or a legacy JSON one.  ValueError if unreadable."""
+    if isinstance(val, bytes) and val[:2] == _MAGIC:
+        if len(val) < 5:
+            raise ValueError("truncated cache header")
+        version, tag, codec = val[2], val[3], val[4]
+        if version != _VERSION:
+            raise ValueError(f"unknown cache format v{version}")
+        if tag not in (_TAG_VALUE, _TAG_DOCS):
+            raise ValueError(f"unknown cache tag {tag}")
+        data = ormsgpack.unpackb(
+            _decompress(codec, val[5:])
+        )  # MsgpackDecodeError is a ValueError
+        if tag == _TAG_DOCS:
+            try:
+                return [
+                    Document(page_content=c, metadata={"title": t, "url": u})
+                    for c, t, u in data
+                ]
+            except (TypeError, ValueError) as e:  # rows not [content, title, url]
+                raise ValueError(f"malformed docs entry ({e})") from e
+        return data
+    return _legacy_decode(val.decode() if isinstance(val, bytes) else val)
+
+
+# ───────────────────── legacy JSON entries (read-only) ───────────────────
 def _docs_from_json(payload: str) -> List[Document]:
-    raw: List[_DocJSON] = json.loads(payload)
+    raw = json.loads(payload)
     return [
         Document(
             page_content=d["content"], metadata={"title": d["title"], "url": d["url"]}
@@ -70,18 +281,7 @@ def _docs_from_json(payload: str) -> List[Document]:
     ]
 
 
-def _maybe_encode(val: Any) -> str:
-    """
-    Supported return types:
-      • list[Document]     -> JSON string
-      • str / int / dict   -> json.dumps(val)
-    """
-    if isinstance(val, list) and val and isinstance(val[0], Document):
-        return _docs_to_json(val)  # type: ignore[arg-type]
-    return json.dumps(val)
-
-
-def _maybe_decode(val: str) -> Any:
+def _legacy_decode(val: str) -> Any:
     try:
         data = json.loads(val)
         # Heuristic: list of dicts with 'content' & 'url' → treat as docs
@@ -98,35 +298,363 @@ def _maybe_decode(val: str) -> Any:
         return val  # shouldn’t happen
 
 
+# ───────────────────────────── tier lookups ───────────────────────────────
+def _make_key(func: Callable[..., Any], args: tuple, kwargs: dict) -> str:
+    return f"{func.__name__}:{args}:{tuple(sorted(kwargs.items()))}"
+
+
+def _promote(key: str, raw: "bytes | str | None", pttl_ms: int = -1) -> Any:
+    """
+    Decode an L2 payload and copy it into L1 for no longer than its Redis
+    TTL (*pttl_ms*, as PTTL reports it); ``_MISS`` if absent/unreadable.
+    """
+    if raw is not None:
+        try:
+            val = _maybe_decode(raw)
+        except ValueError as e:  # newer format / missing codec → refetch
+            print(f"[cache] unreadable entry {key!r} ({e})", file=sys.stderr)
+        else:
+            CACHE_HITS.labels("l2").inc()
+            ttl = (
+                L1_TTL if pttl_ms == -1 else min(L1_TTL, pttl_ms / 1000)
+            )  # -1: no expiry
+            if ttl > 0 and _in_l1(key):
+                _l1.set(key, val, ttl)
+            return val
+    CACHE_MISSES.labels("l2").inc()
+    return _MISS
+
+
+async def _lookup(key: str) -> Any:
+    """L1, then L2 (promoting L2 hits into L1).  Returns ``_MISS`` if absent."""
+    with span("cache.lookup") as s:
+        r = await get_redis()
+        if _in_l1(key):
+            val = _l1.get(key)
+            if val is not _MISS:
+                CACHE_HITS.labels("l1").inc()
+                s.set_attribute("cache.result", "l1")
+                return _fresh_copy(val)
+            CACHE_MISSES.labels("l1").inc()
+
+        val = _promote(key, *await _get_with_pttl(r, key)) if r else _MISS
+        s.set_attribute("cache.result", "miss" if val is _MISS else "l2")
+        return _fresh_copy(val)
+
+
+async def _get_with_pttl(r: "redis.Redis", key: str) -> Tuple[Any, int]:
+    """``GET`` + ``PTTL`` of *key* in one round-trip."""
+    raw, pttl = await r.pipeline(transaction=False).get(key).pttl(key).execute()
+    return raw, pttl
+
+
+async def _lookup_many(keys: List[str]) -> List[Any]:
+    """Batch ``_lookup``: L1 per key, then one ``MGET`` (+ ``PTTL``s) for the rest."""
+    with span("cache.lookup_many", **{"cache.keys": len(keys)}) as s:
+        r = await get_redis()
+        vals: List[Any] = []
+        for key in keys:
+            if not _in_l1(key):
+                vals.append(_MISS)
+                continue
+            val = _l1.get(key)
+            if val is _MISS:
+                CACHE_MISSES.labels("l1").inc()
+            else:
+                CACHE_HITS.labels("l1").inc()
+                val = _fresh_copy(val)
+            vals.append(val)
+
+        pending = [i for i, v in enumerate(vals) if v is _MISS]
+        if r and pending:
+            pipe = r.pipeline(transaction=False).mget([keys[i] for i in pending])
+            for i in pending:
+                pipe.pttl(keys[i])
+            raw, *pttls = await pipe.execute()
+            for i, cached_val, pttl in zip(pending, raw, pttls):
+                vals[i] = _fresh_copy(_promote(keys[i], cached_val, pttl))
+        s.set_attribute("cache.hits", sum(v is not _MISS for v in vals))
+        return vals
+
+
+async def _store(key: str, val: Any, ttl: int) -> None:
+    r = await get_redis()
+    if _in_l1(key):
+        _l1.set(key, val, min(ttl, L1_TTL))
+    if r:
+        try:
+            await r.set(key, _maybe_encode(val), ex=ttl)
+        except TypeError:
+            # Unsupported type → skip caching silently
+            pass
+
+
+async def lookup(key: str, default: Any = None) -> Any:
+    """Public key-level read through both tiers (for callers with own keys)."""
+    val = await _lookup(key)
+    return default if val is _MISS else val
+
+
+async def store(key: str, val: Any, ttl: int) -> None:
+    """Public key-level write to both tiers."""
+    await _store(key, val, ttl)
+
+
+async def invalidate(key: str) -> bool:
+    """Drop *key* from both tiers; True if anything was removed."""
+    removed = _l1.pop(key)
+    r = await get_redis()
+    if r:
+        removed = bool(await r.delete(key)) or removed
+    return removed
+
+
+# ───────────────────────────── single-flight ──────────────────────────────
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+_flights: Dict[str, _Flight] = {}
+
+
+async def singleflight(key: str, factory: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run ``factory()`` once per *key* no matter how many coroutines ask
+    concurrently; every caller awaits the same task.  The shared task is
+    cancelled only when *all* of its callers have gone away.
+    """
+    loop = asyncio.get_running_loop()
+    flight = _flights.get(key)
+    if flight is None or flight.task.get_loop() is not loop:
+        flight = _Flight(asyncio.ensure_future(factory()))
+        _flights[key] = flight
+        flight.task.add_done_callback(
+            lambda _t, f=flight: (
+                _flights.pop(key, None) if _flights.get(key) is f else None
+            )
+        )
+
+    flight.waiters += 1
+    reason: Tuple[Any, ...] = ()
+    try:
+        return await asyncio.shield(flight.task)
+    except asyncio.CancelledError as e:
+        reason = e.args[:1]  # the last caller's cancel message reaches the task
+        raise
+    finally:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            flight.task.cancel(*reason)
+
+
+async def _await_peer_fill(r: "redis.Redis", key: str) -> Any:
+    """Poll L2 while another worker holds the fill lease for *key*."""
+    lock = f"lock:{key}"
+    while True:
+        await asyncio.sleep(LOCK_POLL_SECS)
+        cached_val, pttl = await _get_with_pttl(r, key)
+        if cached_val is not None:
+            return _promote(key, cached_val, pttl)
+        if not await r.exists(lock):  # holder finished without a value / died
+            return _MISS
+
+
+async def _fill(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    ttl: int,
+    keep: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """
+    Compute a missing value under the cross-worker lease and store it
+    (unless ``keep(value)`` says otherwise).
+    """
+    r = await get_redis()
+    token = None
+    if r:
+        token = uuid.uuid4().hex
+        if not await r.set(f"lock:{key}", token, nx=True, px=LOCK_MS):
+            token = None
+            val = await _await_peer_fill(r, key)
+            if val is not _MISS:
+                return val
+    try:
+        result = await compute()
+        if keep is None or keep(result):
+            await _store(key, result, ttl)
+        return result
+    finally:
+        if r and token:
+            # best-effort release; the lease expires on its own anyway
+            if await r.get(f"lock:{key}") in (token, token.encode()):
+                await r.delete(f"lock:{key}")
+
+
+async def _fill_many(
+    keys: List[str], computes: List[Callable[[], Awaitable[Any]]], ttl: int
+) -> List[Any]:
+    """
+    Batch ``_fill``: leases for all misses in one pipeline, compute them
+    concurrently, then ``SET ... EX`` + lease release in one more pipeline.
+    """
+    r = await get_redis()
+    owned = [True] * len(keys)
+    if r:
+        token = uuid.uuid4().hex
+        pipe = r.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(f"lock:{key}", token, nx=True, px=LOCK_MS)
+        owned = [bool(ok) for ok in await pipe.execute()]
+
+    async def _one(i: int) -> Tuple[Any, bool]:
+        """Return ``(value, computed_here)``."""
+        if not owned[i]:
+            val = await _await_peer_fill(r, keys[i])  # type: ignore[arg-type]
+            if val is not _MISS:
+                return val, False  # peer already stored it
+        return await singleflight(keys[i], computes[i]), True
+
+    try:
+        results = await asyncio.gather(*(_one(i) for i in range(len(keys))))
+    except BaseException:
+        if r and any(owned):  # don't leave peers waiting out the lease
+            await r.delete(*(f"lock:{k}" for k, mine in zip(keys, owned) if mine))
+        raise
+    fresh = [(k, v) for k, (v, mine) in zip(keys, results) if mine]
+
+    for key, val in fresh:
+        if _in_l1(key):
+            _l1.set(key, val, min(ttl, L1_TTL))
+    if r and (fresh or any(owned)):
+        pipe = r.pipeline(transaction=False)
+        for key, val in fresh:
+            try:
+                pipe.set(key, _maybe_encode(val), ex=ttl)
+            except TypeError:
+                pass  # unsupported type → L1 only
+        for key, mine in zip(keys, owned):
+            if mine:  # best-effort release, see _fill
+                pipe.delete(f"lock:{key}")
+        await pipe.execute()
+
+    return [v for v, _ in results]
+
+
+async def fill(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    ttl: int,
+    keep: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """
+    Compute-and-store *key* once across callers: single-flight in this
+    process plus the Redis lease across workers (peers get the stored value).
+    A value for which ``keep`` returns False is handed out but not stored.
+    """
+    return await singleflight(key, lambda: _fill(key, compute, ttl, keep))
+
+
 # ───────────────────────────────── decorator ──────────────────────────────
-def cached(ttl: int = 300):
+def cached(
+    ttl: int = 300,
+    semantic: Optional[str] = None,
+    normalize: Optional[Callable[[str], str]] = None,
+):
     """
     Decorator for async functions.  Example:
 
-        @cached(ttl=3600)
+        @cached(ttl=3600, semantic="web_search")
         async def web_search(q: str) -> list[Document]: ...
+
+        docs = await web_search("q")               # one key
+        rounds = await web_search.many(["a", "b"])  # one MGET for all
+
+    With *semantic* set (and SEMANTIC_CACHE=1) the first positional
+    argument is matched against earlier ones in that namespace, so
+    ``web_search("how do vaccines work")`` can reuse the entry written by
+    ``web_search("how vaccines work")``.
+
+    *normalize* maps a string first argument to its cache identity (e.g.
+    case / whitespace folded); the function itself still gets it as passed.
     """
 
     def _wrap(func: Callable[..., Awaitable[Any]]):
+        def _ident(arg: Any) -> Any:
+            return normalize(arg) if normalize and isinstance(arg, str) else arg
+
+        def _key(args: tuple, kwargs: dict) -> str:
+            return _make_key(
+                func, (_ident(args[0]), *args[1:]) if args else args, kwargs
+            )
+
+        def _use_semantic(text: Any) -> bool:
+            return semantic is not None and _semantic.ENABLED and isinstance(text, str)
+
+        def _alias_key(text: Any, rest: tuple, kwargs: dict) -> Optional[str]:
+            if not _use_semantic(text):
+                return None
+            alias = _semantic.nearest(semantic, _ident(text))  # type: ignore[arg-type]
+            return None if alias is None else _make_key(func, (alias, *rest), kwargs)
+
+        def _remember(text: Any) -> None:
+            if _use_semantic(text):
+                _semantic.remember(semantic, _ident(text))  # type: ignore[arg-type]
+
+        @wraps(func)
         async def _inner(*args, **kwargs):
-            key = f"{func.__name__}:{args}:{tuple(sorted(kwargs.items()))}"
-            r = await get_redis()
+            key = _key(args, kwargs)
+            val = await _lookup(key)
+            if val is not _MISS:
+                return val
+            if args:
+                alias = _alias_key(args[0], args[1:], kwargs)
+                if alias is not None:
+                    val = await _lookup(alias)
+                    if val is not _MISS:
+                        return val
+
+            result = await singleflight(
+                key, lambda: _fill(key, lambda: func(*args, **kwargs), ttl)
+            )
+            if args:
+                _remember(args[0])
+            return _fresh_copy(result)
 
-            if r:
-                cached_val = await r.get(key)
-                if cached_val is not None:
-                    return _maybe_decode(cached_val)
+        async def _many(items: List[Any], **kwargs) -> List[Any]:
+            """``[fn(x, **kwargs) for x in items]`` resolved as one batch."""
+            keys = [_key((x,), kwargs) for x in items]
+            unique = list(dict.fromkeys(keys))
+            vals = dict(zip(unique, await _lookup_many(unique)))
+            arg_of = dict(zip(keys, items))
 
-            result = await func(*args, **kwargs)
+            aliases = {
+                k: a
+                for k in unique
+                if vals[k] is _MISS
+                and (a := _alias_key(arg_of[k], (), kwargs)) is not None
+            }
+            if aliases:
+                found = await _lookup_many(list(aliases.values()))
+                for k, val in zip(aliases, found):
+                    if val is not _MISS:
+                        vals[k] = val
 
-            if r:
-                try:
-                    await r.set(key, _maybe_encode(result), ex=ttl)
-                except TypeError:
-                    # Unsupported type → skip caching silently
-                    pass
-            return result
+            misses = [k for k in unique if vals[k] is _MISS]
+            if misses:
+                computes = [(lambda x=arg_of[k]: func(x, **kwargs)) for k in misses]
+                vals.update(zip(misses, await _fill_many(misses, computes, ttl)))
+                for k in misses:
+                    _remember(arg_of[k])
+            return [_fresh_copy(vals[k]) for k in keys]
 
+        _inner.many = _many  # type: ignore[attr-defined]
         return _inner
 
     return _wrap
@@ -3,22 +3,83 @@ CLI entry point for the (stub) LLM Research Agent.
 For now it returns a fixed JSON so we have something testable.
 """
 
-import json, sys, asyncio
-from .graph import answer_question
+import argparse, json, asyncio, sys
+from typing import Optional
 
 
-async def _run(question: str):
-    result = await answer_question(question)
-    # Pretty-print as JSON
-    print(json.dumps(result, indent=2))
+async def _run(
+    question: str, budget_ms: Optional[float] = None, use_cache: bool = True
+):
+    # the pipeline is imported only once there is a question to answer
+    # (``--help`` and usage errors stay instant)
+    from . import semantic
+    from .graph import answer_question, drain_refreshes
+    from .http_pool import close_sessions
+
+    try:
+        result = await answer_question(question, budget_ms, use_cache)
+        # Pretty-print as JSON
+        print(json.dumps(result, indent=2), flush=True)
+        await drain_refreshes()  # a stale hit refreshes after we've answered
+    finally:
+        await close_sessions()
+        semantic.save()  # no-op unless SEMANTIC_CACHE_PATH is set
+
+
+async def _run_batch(
+    path: str, concurrency: Optional[int], budget_ms: Optional[float], use_cache: bool
+):
+    from . import batch
+
+    if path == "-":
+        return await batch.main(
+            sys.stdin, concurrency or batch.CONCURRENCY, budget_ms, use_cache
+        )
+    with open(path, encoding="utf-8") as src:
+        return await batch.main(
+            src, concurrency or batch.CONCURRENCY, budget_ms, use_cache
+        )
 
 
 def main() -> None:
-    if len(sys.argv) < 2:
-        print('Usage: agent "<your question>"', file=sys.stderr)
-        sys.exit(1)
-    question = " ".join(sys.argv[1:])
-    asyncio.run(_run(question))
+    parser = argparse.ArgumentParser(
+        prog="agent",
+        usage='agent [--budget SECS] [--refresh] "<your question>"\n'
+        "       agent --batch FILE|- [--concurrency N] [--budget SECS] [--refresh]",
+    )
+    parser.add_argument("question", nargs="*")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        metavar="SECS",
+        help="end-to-end latency budget; search/reflect shrink to fit it",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="ignore any cached answer and overwrite it with a fresh one",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="answer every question in a JSONL file ('-' = stdin); results stream as JSONL",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        metavar="N",
+        help="batch mode: questions in flight at once (default: BATCH_CONCURRENCY or 8)",
+    )
+    args = parser.parse_args()
+    if bool(args.batch) == bool(args.question):
+        parser.error("give either a question or --batch FILE")
+    budget_ms = args.budget * 1000 if args.budget is not None else None
+    if args.batch:
+        asyncio.run(
+            _run_batch(args.batch, args.concurrency, budget_ms, not args.refresh)
+        )
+        return
+    asyncio.run(_run(" ".join(args.question), budget_ms, not args.refresh))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+"""
+Per-request evidence store, carried in graph state across reflect loops.
+
+    state["evidence"] = {"docs": [...], "urls": [...], "fps": [...]}
+    state["issued"]   = normalised queries already searched
+
+Every search round adds only snippets that are new by URL *and* by SimHash
+fingerprint (``agent.fingerprint``); ``add`` returns that delta so reflect
+can read just what the round contributed.  Stores are copied on write, so
+an earlier state snapshot never changes underneath LangGraph.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from . import fingerprint
+from .observability import DEDUP_RATIO
+
+Store = Dict[str, List[Any]]
+
+
+def empty() -> Store:
+    return {"docs": [], "urls": [], "fps": []}
+
+
+def query_key(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def pending_queries(queries: Sequence[str], issued: Sequence[str]) -> List[str]:
+    """
+    *queries* not searched yet in this request (first spelling wins; it is
+    sent as written – operators like ``OR`` and quoted phrases are kept).
+    """
+    seen = set(issued)
+    todo: List[str] = []
+    for q in queries:
+        key = query_key(q)
+        if key and key not in seen:
+            seen.add(key)
+            todo.append(q)
+    return todo
+
+
+def add(
+    store: Optional[Store], docs: Sequence[Document]
+) -> Tuple[Store, List[Document]]:
+    """
+    Return ``(new_store, delta)``.  *docs* should be most-relevant first:
+    of several copies of one story, the first is the one kept.
+    """
+    store = store or empty()
+    known = set(store["urls"])
+    fresh: Dict[str, Document] = {}
+    for d in docs:  # new URLs only, first copy of each
+        url = d.metadata["url"]
+        if url not in fresh and url not in known:
+            fresh[url] = d
+    candidates = list(fresh.values())
+    fps = [fingerprint.simhash(d.page_content) for d in candidates]
+    keep = fingerprint.unique(fps, seen=store["fps"])  # same story, other URL/loop
+    delta = [candidates[i] for i in keep]
+
+    if docs:
+        DEDUP_RATIO.observe(1 - len(delta) / len(docs))
+    new_store = {
+        "docs": store["docs"] + delta,
+        "urls": store["urls"] + [d.metadata["url"] for d in delta],
+        "fps": store["fps"] + [fps[i] for i in keep],
+    }
+    return new_store, delta
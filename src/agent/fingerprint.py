@@ -0,0 +1,80 @@
+"""
+SimHash fingerprints for near-duplicate snippets.
+
+Providers and queries often return the same story from different URLs,
+with small edits (punctuation, a byline, a truncated sentence).  Exact
+URL dedup misses those; a 64-bit SimHash over word shingles maps them to
+fingerprints a few bits apart.
+
+* ``simhash(text)`` – memoised, so a snippet seen in an earlier reflect
+  loop is not fingerprinted twice.
+* ``unique(fps)`` – positions to keep, first occurrence wins; anything
+  within SIMHASH_MAX_DISTANCE bits (default 12) of a kept fingerprint is a
+  near-duplicate.
+
+    SIMHASH_MAX_DISTANCE   Hamming distance counted as a duplicate (12)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import numpy as np
+import xxhash
+
+MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "12"))
+
+_SHINGLE = 2  # words per shingle
+_BITS = np.arange(64, dtype=np.uint64)
+_WORD = re.compile(r"\w+")
+
+
+def _shingles(text: str) -> List[str]:
+    words = _WORD.findall(text.lower())
+    if len(words) <= _SHINGLE:
+        return [" ".join(words)]
+    return [" ".join(words[i : i + _SHINGLE]) for i in range(len(words) - _SHINGLE + 1)]
+
+
+@lru_cache(maxsize=8192)
+def simhash(text: str) -> int:
+    """64-bit SimHash of *text* over word shingles."""
+    shingles = _shingles(text)
+    hashes = np.fromiter(
+        (xxhash.xxh64_intdigest(s) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    bits = (hashes[:, None] >> _BITS) & np.uint64(1)  # shingles × 64
+    votes = 2 * bits.sum(axis=0, dtype=np.int64) - len(shingles)
+    return int(((votes > 0).astype(np.uint64) << _BITS).sum(dtype=np.uint64))
+
+
+def distance(a: int, b: int) -> int:
+    """Hamming distance between two fingerprints."""
+    return (a ^ b).bit_count()
+
+
+def unique(
+    fps: Sequence[int], max_distance: Optional[int] = None, seen: Sequence[int] = ()
+) -> List[int]:
+    """
+    Indices of *fps* to keep, in order: each is more than *max_distance*
+    (default SIMHASH_MAX_DISTANCE) bits away from every fingerprint in
+    *seen* and every one kept before it.
+    """
+    max_distance = MAX_DISTANCE if max_distance is None else max_distance
+    pool = np.empty(len(seen) + len(fps), dtype=np.uint64)
+    pool[: len(seen)] = seen
+    n = len(seen)
+    kept: List[int] = []
+    for i, fp in enumerate(fps):
+        if n and np.bitwise_count(pool[:n] ^ np.uint64(fp)).min() <= max_distance:
+            continue
+        pool[n] = fp
+        n += 1
+        kept.append(i)
+    return kept
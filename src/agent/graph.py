@@ -3,17 +3,97 @@ LangGraph 0.5-compatible pipeline builder.
 Implements: Generate ➜ Search ➜ Reflect (loop ≤2) ➜ Synthesize
 """
 
-from typing import Dict, Any
+import asyncio, os, sys, time
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph
 
+from . import answer_cache, budget, cache, nodes, observability, packing, policy
 from .nodes import (
     generate_node,
     search_node,
     reflect_node,
     synthesize_node,
 )
+from .observability import LOOP_DECISIONS, SPECULATION_RESULTS, SPECULATION_SAVED
 
-MAX_ITER = 2
+# Start synthesize on the current evidence while reflect is still thinking;
+# keep it if no further round follows, cancel it otherwise.
+SPECULATIVE_SYNTHESIS = os.getenv("SPECULATIVE_SYNTHESIS", "0") == "1"
+
+
+def _another_round(state: Dict[str, Any], next_iter: int) -> bool:
+    return policy.current().another_round(state, next_iter)
+
+
+def route_after_reflect(state: Dict[str, Any]) -> str:
+    """Next node per the loop policy (``agent.policy``)."""
+    if _another_round(state, state.get("iter", 0)):
+        LOOP_DECISIONS.labels("another_round").inc()
+        return "search"
+    LOOP_DECISIONS.labels("stop").inc()
+    return "synthesize"
+
+
+# ----------- Speculative synthesis -------------
+
+_DONE = object()
+
+
+class _Speculation:
+    """A synthesize run whose token chunks are held back until it is kept."""
+
+    def __init__(self, state: Dict[str, Any]):
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.chunks: "asyncio.Queue[Any]" = asyncio.Queue()
+        self.task = asyncio.create_task(self._run(state))
+
+    async def _run(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            # same span / counter / latency sample as a regular synthesize
+            # (a discarded run shows up as a cancelled synthesize span)
+            synthesize = observability.traced("synthesize")(nodes.synthesize)
+            return await synthesize(state, self.chunks.put_nowait)
+        finally:
+            self.finished = time.monotonic()
+            self.chunks.put_nowait(_DONE)
+
+    def cancel(self) -> None:
+        self.task.cancel()
+
+    async def replay(self, write) -> Dict[str, Any]:
+        """Forward buffered (then live) chunks to *write*; return the result."""
+        started = time.monotonic()
+        SPECULATION_SAVED.observe(min(self.finished or started, started) - self.started)
+        while (chunk := await self.chunks.get()) is not _DONE:
+            write(chunk)
+        return self.task.result()
+
+
+async def _reflect_speculative(state: Dict[str, Any]) -> Dict[str, Any]:
+    spec = _Speculation(state)
+    try:
+        out = await reflect_node(state)
+    except BaseException:
+        spec.cancel()
+        raise
+    if _another_round(out, out.get("iter", 0)):
+        spec.cancel()  # evidence will change; this answer would be stale
+        SPECULATION_RESULTS.labels("discarded").inc()
+        return out
+    SPECULATION_RESULTS.labels("kept").inc()
+    return {**out, "speculation": spec}
+
+
+async def _synthesize_speculative(state: Dict[str, Any]) -> Dict[str, Any]:
+    spec: Optional[_Speculation] = state.get("speculation")
+    if spec is None:
+        return await synthesize_node(state)
+    try:
+        return await spec.replay(get_stream_writer())
+    finally:
+        spec.cancel()  # no-op when done; stops it if we were cancelled
 
 
 def _build_graph():
@@ -21,10 +101,13 @@ def _build_graph():
     builder = StateGraph(Dict[str, Any])
 
     # ➋ Register the four async nodes
+    speculate = SPECULATIVE_SYNTHESIS
     builder.add_node("generate", generate_node)
     builder.add_node("search", search_node)
-    builder.add_node("reflect", reflect_node)
-    builder.add_node("synthesize", synthesize_node)
+    builder.add_node("reflect", _reflect_speculative if speculate else reflect_node)
+    builder.add_node(
+        "synthesize", _synthesize_speculative if speculate else synthesize_node
+    )
 
     # ➌ Define entry point and static edges
     builder.set_entry_point("generate")
@@ -32,34 +115,180 @@ def _build_graph():
     builder.add_edge("search", "reflect")
 
     # ➍ Conditional routing after Reflect
-    def route_after_reflect(state: Dict[str, Any]) -> str:
-        """Return next-node name based on reflect output."""
-        state["iter"] = state.get("iter", 0) + 1
-        if state["iter"] < MAX_ITER and state.get("need_more", False):
-            # Loop back for a second search
-            return "search"
-        return "synthesize"
-
     builder.add_conditional_edges("reflect", route_after_reflect)
 
     # ➎ Compile the graph object
     return builder.compile()
 
 
-# Keep a singleton compiled graph in memory
-_GRAPH = _build_graph()
+# Singleton compiled graph, built on first use (tests may assign their own)
+_GRAPH: Any = None
+
+
+def _graph() -> Any:
+    global _GRAPH
+    if _GRAPH is None:
+        observability.init()  # tracing starts with the first real run
+        packing.preload()  # tokenizer loads in the background (if enabled)
+        _GRAPH = _build_graph()
+    return _GRAPH
 
 
 # ----------- Public helpers -------------
 
 
-async def answer_question(question: str):
-    """Async entrypoint for the CLI."""
-    return await _GRAPH.ainvoke({"question": question, "iter": 0})
+def _initial_state(question: str, budget_ms: Optional[float]) -> Dict[str, Any]:
+    return {"question": question, "iter": 0, "deadline": budget.deadline_for(budget_ms)}
+
+
+async def _compute(question: str, budget_ms: Optional[float]) -> Dict[str, Any]:
+    result = await _graph().ainvoke(_initial_state(question, budget_ms))
+    return answer_cache.make_entry(result)
+
 
+async def _run_fresh(question: str, budget_ms: Optional[float]) -> Dict[str, Any]:
+    """
+    Run the graph once per normalised question – single-flight in this
+    process, Redis lease across workers – and store the answer.
 
-def answer_sync(question: str):
+    A budgeted request only joins runs with the same rounded-down budget
+    (``budget.flight_budget``), so sharing a run never outlives its
+    deadline; it skips the cross-worker lease, whose holder may be slower.
+    """
+    key = answer_cache.key_for(question)
+    if budget_ms is not None:
+        budget_ms = budget.flight_budget(budget_ms)
+        return await cache.singleflight(
+            f"{key}@{budget_ms:g}ms", lambda: _compute_and_put(question, budget_ms)
+        )
+    compute = lambda: _compute(question, budget_ms)  # noqa: E731
+    if not answer_cache.ENABLED:
+        return await cache.singleflight(key, compute)
+    ttl = answer_cache.FRESH_SECS + answer_cache.STALE_SECS
+    entry = await cache.fill(key, compute, ttl, keep=answer_cache.cacheable)
+    if answer_cache.cacheable(entry):
+        answer_cache.remember(question)
+    return entry
+
+
+async def _compute_and_put(question: str, budget_ms: Optional[float]) -> Dict[str, Any]:
+    entry = await _compute(question, budget_ms)
+    await answer_cache.put(question, entry)
+    return entry
+
+
+# stale-while-revalidate: background refreshes keyed by cache key
+_refreshes: Dict[str, "asyncio.Task[None]"] = {}
+
+
+async def _refresh(question: str) -> None:
+    try:
+        await _compute_and_put(question, None)
+    except Exception as e:  # keep serving the stale copy
+        print(f"[answer-cache] refresh failed for {question!r}: {e}", file=sys.stderr)
+
+
+def _schedule_refresh(question: str) -> None:
+    key = answer_cache.key_for(question)
+    if key not in _refreshes:
+        task = asyncio.create_task(_refresh(question))
+        _refreshes[key] = task
+        task.add_done_callback(lambda _t: _refreshes.pop(key, None))
+
+
+async def drain_refreshes() -> None:
+    """Wait for pending background refreshes (one-shot CLI runs)."""
+    if _refreshes:
+        await asyncio.gather(*_refreshes.values(), return_exceptions=True)
+
+
+async def invalidate_answer(question: str) -> bool:
+    """Drop the cached answer for *question*; True if there was one."""
+    return await answer_cache.invalidate(question)
+
+
+async def answer_question(
+    question: str, budget_ms: Optional[float] = None, use_cache: bool = True
+):
+    """
+    Async entrypoint for the CLI.
+    Repeated questions are served from the answer cache (``cached: true``;
+    ``stale: true`` while a background refresh runs); concurrent identical
+    questions share one graph run.  ``budget_ms`` bounds end-to-end latency
+    (see ``agent.budget``).  ``use_cache=False`` forces a fresh run.
+    """
+    if use_cache:
+        entry, status = await answer_cache.get(question)
+        if entry is not None:
+            if status == answer_cache.STALE:
+                _schedule_refresh(question)
+            return answer_cache.as_payload(entry, status)
+
+    entry = await _run_fresh(question, budget_ms)
+    return answer_cache.as_payload(entry, None)
+
+
+def _progress(phase: str, out: Dict[str, Any]) -> Dict[str, Any]:
+    """Small per-phase summary for streaming clients."""
+    info: Dict[str, Any] = {"phase": phase}
+    if phase == "generate":
+        info["queries"] = len(out.get("queries", []))
+    elif phase == "search":
+        info["docs"] = len(out.get("docs", []))
+        info["new_docs"] = len(out.get("new_docs", []))
+    elif phase == "reflect":
+        info["need_more"] = bool(out.get("need_more"))
+    return info
+
+
+async def stream_answer(
+    question: str, budget_ms: Optional[float] = None, use_cache: bool = True
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Run the graph and yield ``(event, data)`` pairs as they happen:
+    ``progress`` when a phase finishes, ``token`` for every synthesized
+    chunk, then one ``done`` with the full answer + citations.
+    A cached answer is sent as a single ``cache`` progress + token.
+    """
+    if use_cache:
+        entry, status = await answer_cache.get(question)
+        if entry is not None:
+            if status == answer_cache.STALE:
+                _schedule_refresh(question)
+            payload = answer_cache.as_payload(entry, status)
+            yield "progress", {"phase": "cache", "stale": payload["stale"]}
+            yield "token", {"text": payload["answer"]}
+            yield "done", payload
+            return
+
+    final: Dict[str, Any] = {}
+    async for mode, chunk in _graph().astream(
+        _initial_state(question, budget_ms), stream_mode=["updates", "custom"]
+    ):
+        if mode == "custom":
+            if "token" in chunk:
+                yield "token", {"text": chunk["token"]}
+            continue
+        for phase, out in chunk.items():
+            out = out or {}
+            yield "progress", _progress(phase, out)
+            if phase == "synthesize":
+                final = out
+    entry = answer_cache.make_entry(final)
+    if final:
+        await answer_cache.put(question, entry)
+    yield "done", answer_cache.as_payload(entry, None)
+
+
+def answer_sync(question: str, budget_ms: Optional[float] = None):
     """Blocking helper for unit-tests."""
-    import asyncio
+    from .http_pool import close_sessions
+
+    async def _run():
+        try:
+            return await answer_question(question, budget_ms)
+        finally:
+            await drain_refreshes()
+            await close_sessions()  # sessions die with this loop
 
-    return asyncio.run(answer_question(question))
+    return asyncio.run(_run())
@@ -0,0 +1,92 @@
+"""
+Process-wide HTTP layer for the search providers.
+
+* One long-lived ``aiohttp.ClientSession`` per provider, so repeated
+  searches reuse keep-alive connections instead of paying DNS + TCP + TLS
+  set-up on every query.
+* Sessions are bound to the event loop that created them.  ``asyncio.run``
+  (CLI, ``answer_sync``) gets a fresh session per loop; call
+  ``close_sessions()`` before the loop ends to release sockets cleanly.
+* Pool sizing is configured from env:
+
+    HTTP_POOL_LIMIT           total connections per provider   (100)
+    HTTP_POOL_LIMIT_PER_HOST  connections per upstream host    (10)
+    HTTP_DNS_TTL              seconds to cache DNS answers     (300)
+    HTTP_KEEPALIVE            idle keep-alive timeout, seconds (30)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import TYPE_CHECKING, Dict, Set, Tuple
+
+if TYPE_CHECKING:
+    import aiohttp
+
+POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+KEEPALIVE_SECS = float(os.getenv("HTTP_KEEPALIVE", "30"))
+
+# provider name -> (owning loop, session)
+_sessions: Dict[str, Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = {}
+_closing: "Set[asyncio.Task[None]]" = set()  # connectors of replaced sessions
+
+
+def _new_session() -> aiohttp.ClientSession:
+    import aiohttp  # first provider call only; offline runs never pay for it
+
+    connector = aiohttp.TCPConnector(
+        limit=POOL_LIMIT,
+        limit_per_host=POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=DNS_TTL,
+        use_dns_cache=True,
+        keepalive_timeout=KEEPALIVE_SECS,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+def _release(owner: asyncio.AbstractEventLoop, sess: aiohttp.ClientSession) -> None:
+    """Close a session being replaced; its loop may be another thread's or gone."""
+    if sess.closed:
+        return
+    if owner.is_running():  # another thread's loop: close it there
+        asyncio.run_coroutine_threadsafe(sess.close(), owner)
+        return
+    # its loop has finished: detach the connector (marks the session closed)
+    # and close that from here – aiohttp drops the dead loop's connections
+    connector = sess.connector
+    sess.detach()
+    if connector is not None:
+        task = asyncio.get_running_loop().create_task(connector.close())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+
+
+def get_session(provider: str) -> aiohttp.ClientSession:
+    """
+    Return the pooled session for *provider*, creating it on first use
+    (or when the previous one belongs to another / a closed event loop).
+    """
+    loop = asyncio.get_running_loop()
+    entry = _sessions.get(provider)
+    if entry is not None:
+        owner, sess = entry
+        if owner is loop and not sess.closed:
+            return sess
+        _release(owner, sess)
+    sess = _new_session()
+    _sessions[provider] = (loop, sess)
+    return sess
+
+
+async def close_sessions() -> None:
+    """Close every session owned by the running loop (shutdown hook)."""
+    loop = asyncio.get_running_loop()
+    for provider, (owner, sess) in list(_sessions.items()):
+        if owner is loop:
+            del _sessions[provider]
+            if not sess.closed:
+                await sess.close()
+    await asyncio.gather(*(t for t in _closing if t.get_loop() is loop))
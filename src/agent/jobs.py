@@ -0,0 +1,134 @@
+"""
+Asynchronous batch jobs for the HTTP API (submit → poll → fetch).
+
+``submit(items)`` registers a job and puts it on a local ``asyncio.Queue``;
+``JOB_WORKERS`` worker tasks (started on first submit, in the server's
+loop) take jobs in order and run them through ``batch.answer_stream``, so
+a job gets the same dedupe / shared-search behaviour as ``/api/batch``.
+Finished jobs are kept for ``JOB_TTL_SECS`` and at most ``JOB_MAX_KEPT``
+of them; state lives in this process only.
+
+    JOB_WORKERS        jobs running at once              (1)
+    JOB_TTL_SECS       how long finished jobs are kept   (3600)
+    JOB_MAX_KEPT       finished jobs kept at most        (100)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from . import batch
+
+WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+TTL_SECS = float(os.getenv("JOB_TTL_SECS", "3600"))
+MAX_KEPT = int(os.getenv("JOB_MAX_KEPT", "100"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job:
+    """One submitted batch: its input, progress and (when done) summary."""
+
+    def __init__(
+        self, items: List[batch.Item], concurrency: int, budget_ms: Optional[float]
+    ):
+        self.id = uuid.uuid4().hex
+        self.items = items
+        self.concurrency = concurrency
+        self.budget_ms = budget_ms
+        self.status = QUEUED
+        self.results: List[Dict[str, Any]] = []
+        self.summary: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.finished: Optional[float] = None
+
+    def info(self) -> Dict[str, Any]:
+        out = {
+            "job_id": self.id,
+            "status": self.status,
+            "total": len(self.items),
+            "completed": len(self.results),
+        }
+        if self.summary is not None:
+            out["summary"] = self.summary
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+
+_jobs: Dict[str, Job] = {}
+_queue: "Optional[asyncio.Queue[Job]]" = None
+_workers: List["asyncio.Task[None]"] = []
+
+
+async def _run(job: Job) -> None:
+    job.status = RUNNING
+    tally = batch.Tally()
+    try:
+        async for rec in batch.answer_stream(job.items, job.concurrency, job.budget_ms):
+            tally.add(rec)
+            job.results.append(rec)
+        job.summary = tally.summary()
+        job.status = DONE
+    except Exception as e:
+        print(f"[jobs] job {job.id} failed: {e}", file=sys.stderr)
+        job.error = f"{type(e).__name__}: {e}"
+        job.status = FAILED
+    finally:
+        job.finished = time.time()
+
+
+async def _worker(queue: "asyncio.Queue[Job]") -> None:
+    while True:
+        job = await queue.get()
+        try:
+            await _run(job)
+        finally:
+            queue.task_done()
+
+
+def _expire(now: float) -> None:
+    finished = sorted(
+        (j for j in _jobs.values() if j.finished is not None), key=lambda j: j.finished
+    )
+    excess = len(finished) - MAX_KEPT
+    for i, job in enumerate(finished):
+        if i < excess or now - job.finished > TTL_SECS:  # type: ignore[operator]
+            del _jobs[job.id]
+
+
+def submit(
+    items: List[batch.Item],
+    concurrency: int = batch.CONCURRENCY,
+    budget_ms: Optional[float] = None,
+) -> Job:
+    """Queue a job (call from the running loop); returns it immediately."""
+    global _queue
+    loop = asyncio.get_running_loop()
+    if _queue is None or not _workers or _workers[0].get_loop() is not loop:
+        _queue = asyncio.Queue()
+        _workers[:] = [
+            asyncio.create_task(_worker(_queue)) for _ in range(max(1, WORKERS))
+        ]
+    _expire(time.time())
+    job = Job(items, concurrency, budget_ms)
+    _jobs[job.id] = job
+    _queue.put_nowait(job)
+    return job
+
+
+def get(job_id: str) -> Optional[Job]:
+    return _jobs.get(job_id)
+
+
+async def shutdown() -> None:
+    """Cancel the workers (server shutdown); unfinished jobs are dropped."""
+    for w in _workers:
+        w.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
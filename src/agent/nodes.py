@@ -4,18 +4,25 @@ They fall back to deterministic stubs when OPENAI_API_KEY is absent,
 so unit-tests and CI run fully offline.
 """
 
-import json, asyncio, os
-from typing import Dict, Any, List
-from langchain.schema import Document
-from langchain.prompts import ChatPromptTemplate
-from .tools import web_search
-import openai
+import json, asyncio, hashlib, os, re
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+from langgraph.config import get_stream_writer
+from . import budget, cache, evidence, fingerprint, packing, policy, rank
+from .tools import STRAGGLER, web_search
 
-from agent.observability import REQUEST_COUNTER, LATENCY_HISTO, init as _get_tracer
-
-_tracer = _get_tracer()
-
-MAX_ITER = 2
+from agent.observability import (
+    CANCELLED_LLM_TOKENS,
+    CANCELLED_WORK,
+    LLM_CACHE_REQUESTS,
+    LLM_TOKENS_SAVED,
+    SEARCH_EARLY_EXITS,
+    LOOP_DECISIONS,
+    open_span,
+    span,
+    traced,
+)
 
 # ------------------------------------------------------------------ LLM setup
 USE_LLM = bool(os.getenv("OPENAI_API_KEY"))
@@ -31,16 +38,45 @@ async def _offline_stub(prompt: ChatPromptTemplate, **kwargs) -> str:
     return json.dumps([kwargs["q"]])  # GenerateQueries node
 
 
+def _approx_tokens(*texts: str) -> int:
+    return sum(len(t) for t in texts) // 4  # ≈4 chars/token
+
+
+def _count_cancelled(prompt: ChatPromptTemplate, **kwargs) -> None:
+    """Account an LLM call abandoned because the client disconnected."""
+    CANCELLED_WORK.labels("llm_call").inc()
+    CANCELLED_LLM_TOKENS.inc(_approx_tokens(prompt.format(**kwargs)))
+
+
+async def _offline_stub_stream(
+    prompt: ChatPromptTemplate, **kwargs
+) -> AsyncIterator[str]:
+    """Stub output emitted word by word, like a real token stream."""
+    for tok in re.findall(r"\S+\s*", await _offline_stub(prompt, **kwargs)):
+        yield tok
+
+
+# Mode-specific completion backends.  They return / fill in whether the
+# text is a real model answer (cacheable) or an error fallback (not).
 if USE_LLM:
+    import openai
     from langchain_openai import ChatOpenAI
 
-    llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+    LLM_MODEL = "gpt-3.5-turbo"
+    llm = ChatOpenAI(model=LLM_MODEL, temperature=0)
 
-    async def call_llm(prompt: ChatPromptTemplate, **kwargs) -> str:
+    async def _complete(prompt: ChatPromptTemplate, **kwargs) -> Tuple[str, int, bool]:
+        """Return ``(text, tokens_used, cacheable)``."""
+        rendered = prompt.format(**kwargs)
         try:
             # new, non-deprecated async invoke
-            msg = await llm.ainvoke(prompt.format(**kwargs))
-            return msg.content  # ← extract text
+            msg = await llm.ainvoke(rendered)
+            usage = getattr(msg, "usage_metadata", None) or {}
+            tokens = usage.get("total_tokens") or _approx_tokens(rendered, msg.content)
+            return msg.content, tokens, True  # ← extract text
+        except asyncio.CancelledError:
+            _count_cancelled(prompt, **kwargs)
+            raise
 
         # graceful fallback on quota/auth/rate-limit issues
         except (
@@ -48,20 +84,139 @@ if USE_LLM:
             openai.AuthenticationError,
             openai.APIError,
         ):
-            return await _offline_stub(prompt, **kwargs)
+            return await _offline_stub(prompt, **kwargs), 0, False
+
+    async def _complete_stream(
+        prompt: ChatPromptTemplate, meta: Dict[str, Any], **kwargs
+    ) -> AsyncIterator[str]:
+        """Yield completion text chunks as the model produces them."""
+        started = False
+        try:
+            async for chunk in llm.astream(prompt.format(**kwargs)):
+                if chunk.content:
+                    started = True
+                    yield chunk.content
+        except asyncio.CancelledError:
+            _count_cancelled(prompt, **kwargs)
+            raise
+        except (
+            openai.RateLimitError,
+            openai.AuthenticationError,
+            openai.APIError,
+        ):
+            meta["cacheable"] = False
+            if started:  # can't un-send tokens; end the stream here
+                return
+            async for tok in _offline_stub_stream(prompt, **kwargs):
+                yield tok
 
 else:
     # No API key – always use stub
-    async def call_llm(prompt: ChatPromptTemplate, **kwargs) -> str:  # type: ignore
-        return await _offline_stub(prompt, **kwargs)
+    LLM_MODEL = "offline-stub"
+
+    async def _complete(prompt: ChatPromptTemplate, **kwargs) -> Tuple[str, int, bool]:  # type: ignore
+        text = await _offline_stub(prompt, **kwargs)
+        return text, _approx_tokens(prompt.format(**kwargs), text), True
+
+    async def _complete_stream(  # type: ignore
+        prompt: ChatPromptTemplate, meta: Dict[str, Any], **kwargs
+    ) -> AsyncIterator[str]:
+        async for tok in _offline_stub_stream(prompt, **kwargs):
+            yield tok
+
+
+# ------------------------------------------------------------------ LLM cache
+# temperature=0 prompts are deterministic enough to reuse.  Keyed on model,
+# params and a hash of the rendered prompt; stored via agent.cache (Redis
+# when available, in-process LRU otherwise).  Per-node TTL in seconds from
+# LLM_CACHE_TTL_<NODE> (default LLM_CACHE_TTL=3600); 0 disables that node,
+# LLM_CACHE=0 disables the cache entirely.
+_LLM_CACHE_ON = os.getenv("LLM_CACHE", "1") != "0"
+_LLM_TTL_DEFAULT = int(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_TTL = {
+    node: int(os.getenv(f"LLM_CACHE_TTL_{node.upper()}", _LLM_TTL_DEFAULT))
+    for node in ("generate", "reflect", "synthesize")
+}
+
+
+def _llm_cache_ttl(node: str) -> int:
+    return LLM_CACHE_TTL.get(node, _LLM_TTL_DEFAULT) if _LLM_CACHE_ON else 0
+
+
+def _llm_cache_key(prompt: ChatPromptTemplate, **kwargs) -> str:
+    digest = hashlib.sha256(prompt.format(**kwargs).encode()).hexdigest()
+    return f"llm:{LLM_MODEL}:t=0:{digest}"
+
+
+async def _llm_cache_get(node: str, key: str) -> Optional[str]:
+    hit = await cache.lookup(key)
+    if hit is None:
+        LLM_CACHE_REQUESTS.labels(node, "miss").inc()
+        return None
+    LLM_CACHE_REQUESTS.labels(node, "hit").inc()
+    LLM_TOKENS_SAVED.labels(node).inc(hit["tokens"])
+    return hit["text"]
+
+
+async def call_llm(prompt: ChatPromptTemplate, node: str = "llm", **kwargs) -> str:
+    """Completion text for *prompt*, served from the LLM cache when possible."""
+    with span("llm", **{"llm.node": node, "llm.model": LLM_MODEL}) as s:
+        ttl = _llm_cache_ttl(node)
+        if not ttl:
+            return (await _complete(prompt, **kwargs))[0]
+
+        key = _llm_cache_key(prompt, **kwargs)
+        text = await _llm_cache_get(node, key)
+        s.set_attribute("llm.cached", text is not None)
+        if text is not None:
+            return text
+        text, tokens, cacheable = await _complete(prompt, **kwargs)
+        if cacheable:
+            await cache.store(key, {"text": text, "tokens": tokens}, ttl)
+        return text
+
+
+async def call_llm_stream(
+    prompt: ChatPromptTemplate,
+    node: str = "llm",
+    meta: Optional[Dict[str, Any]] = None,
+    **kwargs,
+) -> AsyncIterator[str]:
+    """
+    Streaming ``call_llm``; a cache hit is replayed word by word.  When
+    given, *meta* gets ``"cacheable": False`` if the text is an error fallback.
+    """
+    meta = {} if meta is None else meta
+    meta["cacheable"] = True
+    # not made current: the generator may resume in another context
+    s = open_span(
+        "llm", **{"llm.node": node, "llm.model": LLM_MODEL, "llm.stream": True}
+    )
+    try:
+        ttl = _llm_cache_ttl(node)
+        key = _llm_cache_key(prompt, **kwargs) if ttl else ""
+        text = await _llm_cache_get(node, key) if ttl else None
+        s.set_attribute("llm.cached", text is not None)
+        if text is not None:
+            for tok in re.findall(r"\S+\s*", text):
+                yield tok
+            return
+
+        pieces: List[str] = []
+        async for tok in _complete_stream(prompt, meta, **kwargs):
+            pieces.append(tok)
+            yield tok
+        if ttl and meta["cacheable"]:
+            text = "".join(pieces)
+            tokens = _approx_tokens(prompt.format(**kwargs), text)
+            await cache.store(key, {"text": text, "tokens": tokens}, ttl)
+    finally:
+        s.end()
 
 
 # ------------------------------------------------------------------ Generate
-@_tracer.start_as_current_span("generate")
+@traced("generate")
 async def generate_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    with LATENCY_HISTO.labels("generate").time():
-        REQUEST_COUNTER.labels("generate").inc()
-
     q = state["question"]
     tmpl = ChatPromptTemplate.from_messages(
         [
@@ -72,7 +227,11 @@ async def generate_node(state: Dict[str, Any]) -> Dict[str, Any]:
             ),
         ]
     )
-    raw = await call_llm(tmpl, q=q)
+    if budget.remaining(state) <= budget.SYNTH_RESERVE_SECS:
+        # Budget already down to synthesize's share: search the question as-is
+        raw = json.dumps([q])
+    else:
+        raw = await call_llm(tmpl, "generate", q=q)
 
     # Attempt JSON decode
     try:
@@ -88,40 +247,127 @@ async def generate_node(state: Dict[str, Any]) -> Dict[str, Any]:
         queries = [ln.strip() for ln in raw.splitlines() if ln.strip()]
 
     return {
+        **state,  # carry forward (deadline etc.)
         "question": q,
         "queries": queries[:5],
         "iter": state.get("iter", 0),
-    }  # carry forward
+    }
 
 
 # ------------------------------------------------------------------ Search
-@_tracer.start_as_current_span("search")
+# Opt-in streaming mode (SEARCH_STREAMING=1): query results are consumed as
+# they finish and the round ends as soon as ``search_early_exit`` is happy;
+# straggling queries are cancelled and stay un-issued, so a later loop may
+# retry them.
+SEARCH_STREAMING = os.getenv("SEARCH_STREAMING", "0") == "1"
+SEARCH_EARLY_DOCS = int(os.getenv("SEARCH_EARLY_DOCS", str(2 * rank.TOP_K)))
+SEARCH_EARLY_MIN_FRACTION = float(os.getenv("SEARCH_EARLY_MIN_FRACTION", "0.5"))
+
+
+def search_early_exit(distinct_docs: int, done: int, total: int) -> bool:
+    """Default policy: enough distinct new docs from enough of the queries."""
+    return (
+        distinct_docs >= SEARCH_EARLY_DOCS and done >= total * SEARCH_EARLY_MIN_FRACTION
+    )
+
+
+async def _search_streaming(
+    queries: List[str], seen_fps: List[int]
+) -> Tuple[List[str], List[List[Document]]]:
+    """Return ``(completed queries, their docs)`` – possibly not all of them."""
+    queue: "asyncio.Queue[asyncio.Task]" = asyncio.Queue()
+    tasks = {asyncio.create_task(web_search(q)): q for q in queries}
+    for task in tasks:
+        task.add_done_callback(queue.put_nowait)
+
+    done_queries: List[str] = []
+    docs_lists: List[List[Document]] = []
+    fps = list(seen_fps)
+    distinct = 0
+    reason = None  # cancel message: None means we were cancelled ourselves
+    try:
+        while len(done_queries) < len(tasks):
+            task = await queue.get()
+            docs = task.result()
+            done_queries.append(tasks[task])
+            docs_lists.append(docs)
+            new = [fingerprint.simhash(d.page_content) for d in docs]
+            kept = fingerprint.unique(new, seen=fps)
+            fps += [new[i] for i in kept]
+            distinct += len(kept)
+            if len(done_queries) < len(tasks) and search_early_exit(
+                distinct, len(done_queries), len(tasks)
+            ):
+                SEARCH_EARLY_EXITS.inc()
+                reason = STRAGGLER
+                break
+    finally:
+        for task in tasks:  # stragglers (or everything, if we were cancelled)
+            task.cancel(reason)
+    return done_queries, docs_lists
+
+
+@traced("search")
 async def search_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    with LATENCY_HISTO.labels("search").time():
-        REQUEST_COUNTER.labels("search").inc()
-
-    queries: List[str] = state["queries"]
-    docs_lists = await asyncio.gather(*(web_search(q) for q in queries))
-    merged: Dict[str, Document] = {}
-    for lst in docs_lists:
-        for d in lst:
-            merged[d.metadata["url"]] = d
+    # only queries this request hasn't issued yet (reflect may repeat some)
+    issued: List[str] = state.get("issued", [])
+    queries = evidence.pending_queries(state["queries"], issued)
+    batch = getattr(web_search, "many", None)
+    with budget.scoped(state.get("deadline")):  # tools shrink timeouts to fit
+        if not queries:
+            docs_lists = []
+        elif SEARCH_STREAMING and len(queries) > 1:
+            store = state.get("evidence") or evidence.empty()
+            queries, docs_lists = await _search_streaming(queries, store["fps"])
+        elif batch is not None:  # one MGET + one pipelined write for the round
+            docs_lists = await batch(queries)
+        else:
+            docs_lists = await asyncio.gather(*(web_search(q) for q in queries))
+    round_docs = [d for lst in docs_lists for d in lst]
+    # one BM25 pass per round, over the store so far plus this round's docs
+    prior = (state.get("evidence") or evidence.empty())["docs"]
+    pool = prior + round_docs
+    score_of = dict(zip(map(id, pool), rank.scored(state["question"], pool)))
+    # accumulate: earlier loops' evidence stays, this round adds only what's
+    # new by URL and fingerprint (best-ranked copy of a story wins)
+    store, delta = evidence.add(
+        state.get("evidence"),
+        rank.by_relevance(
+            state["question"], round_docs, [score_of[id(d)] for d in round_docs]
+        ),
+    )
     return {
-        "question": state["question"],
-        "queries": state["queries"],
-        "docs": list(merged.values())[:5],
+        **state,
+        "evidence": store,
+        "new_docs": delta,
+        # share of this round's results that were new (loop-policy signal)
+        "novelty": len(delta) / len(round_docs) if round_docs else 0.0,
+        "issued": issued + [evidence.query_key(q) for q in queries],
+        # keep the most relevant distinct snippets, not the first five URLs seen
+        "docs": rank.rerank(
+            state["question"],
+            store["docs"],
+            scores=[score_of[id(d)] for d in store["docs"]],
+        ),
         "iter": state.get("iter", 0),
     }
 
 
 # ------------------------------------------------------------------ Reflect
-@_tracer.start_as_current_span("reflect")
+@traced("reflect")
 async def reflect_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    with LATENCY_HISTO.labels("reflect").time():
-        REQUEST_COUNTER.labels("reflect").inc()
-
     docs: List[Document] = state["docs"]
-    ctx = "\n".join(d.page_content for d in docs)
+    rounds = state.get("iter", 0) + 1  # reflect closes the round; the router reads it
+    if policy.current().skip_reflect(state):
+        # No round can / needs to follow (cap, budget or confident evidence)
+        LOOP_DECISIONS.labels("skip_reflect").inc()
+        return {**state, "need_more": False, "iter": rounds}
+    # Later loops only read what the last search added; earlier findings
+    # travel as the compact list of already-filled slots.
+    new_docs: List[Document] = state.get("new_docs", docs)
+    packed = packing.pack(new_docs, packing.BUDGETS["reflect"])
+    ctx = "\n".join(text for _, text in packed)
+    known_filled: List[str] = state.get("filled", [])
 
     tmpl = ChatPromptTemplate.from_messages(
         [
@@ -129,47 +375,59 @@ async def reflect_node(state: Dict[str, Any]) -> Dict[str, Any]:
                 "system",
                 "You are an evidence checker.\n"
                 "Step 1 – list the REQUIRED slots (facts) the answer must contain.\n"
-                "Step 2 – read the docs and list which slots are already filled.\n"
+                "Step 2 – read the docs and list which slots are already filled "
+                "(slots listed as already filled stay filled).\n"
                 "Step 3 – output STRICT JSON exactly like:\n"
                 '{{"slots": <list>, "filled": <list>, '
                 '"need_more": <bool>, "new_queries": <list>}}\n'
                 "Rules: need_more is true iff some slot missing OR conflicting docs. "
                 "Return at most 3 new_queries.",
             ),
-            ("user", "Question: {q}\nDocs:\n{ctx}"),
+            ("user", "Question: {q}\nAlready filled: {filled}\nNew docs:\n{ctx}"),
         ]
     )
-    raw = await call_llm(tmpl, q=state["question"], ctx=ctx[:4000])
+    raw = await call_llm(
+        tmpl,
+        "reflect",
+        q=state["question"],
+        filled=json.dumps(known_filled),
+        ctx=ctx,
+    )
     try:
         data = json.loads(raw)
         need_more = bool(data.get("need_more"))
-        if state["iter"] >= MAX_ITER - 1:
-            need_more = False
+        filled = known_filled + [
+            f for f in data.get("filled", []) if f not in known_filled
+        ]
         return {
             **state,
-            "slots": data.get("slots", []),
-            "filled": data.get("filled", []),
+            "slots": data.get("slots") or state.get("slots", []),
+            "filled": filled,
             "need_more": need_more,
             "queries": data.get("new_queries") or state["queries"],
-            "iter": state["iter"] + 1,
+            "iter": rounds,
         }
     except Exception:
         # keep pipeline state intact on parse failure
         return {
-            "question": state["question"],
-            "queries": state["queries"],
+            **state,
             "need_more": False,
             "docs": docs,
-            "iter": state.get("iter", 0) + 1,  # still advance
+            "iter": rounds,
         }
 
 
 # ------------------------------------------------------------------ Synthesize
-@_tracer.start_as_current_span("synthesize")
+@traced("synthesize")
 async def synthesize_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    with LATENCY_HISTO.labels("synthesize").time():
-        REQUEST_COUNTER.labels("synthesize").inc()
+    # Stream tokens to whoever is consuming the graph (no-op under ainvoke)
+    return await synthesize(state, get_stream_writer())
+
 
+async def synthesize(
+    state: Dict[str, Any], write: Callable[[Dict[str, Any]], None]
+) -> Dict[str, Any]:
+    """Answer from ``state["docs"]``, passing ``{"token": …}`` chunks to *write*."""
     docs: List[Document] = state.get("docs", [])
 
     # Guarantee at least one citation so CLI & tests never break
@@ -180,19 +438,40 @@ async def synthesize_node(state: Dict[str, Any]) -> Dict[str, Any]:
                 metadata={"title": "Stub source", "url": "local"},
             )
         ]
-    evidence = "\n".join(f"[{i+1}] {d.page_content}" for i, d in enumerate(docs[:3]))
+    # most relevant evidence that fits the token budget, whole sentences only
+    # (if not even one sentence fits, the top doc cut to the budget)
+    budget_tokens = packing.BUDGETS["synthesize"]
+    packed = packing.pack(docs, budget_tokens) or [
+        (
+            docs[0],
+            packing.truncate(docs[0].page_content, budget_tokens - packing.OVERHEAD),
+        )
+    ]
+    evidence = "\n".join(f"[{i+1}] {text}" for i, (_, text) in enumerate(packed))
     tmpl = ChatPromptTemplate.from_messages(
         [
             ("system", "Answer in ≤80 English words and end with numeric citations."),
             ("user", "Question:{q}\nEvidence:\n{e}"),
         ]
     )
-    answer_raw = await call_llm(tmpl, q=state["question"], e=evidence)
+    pieces: List[str] = []
+    meta: Dict[str, Any] = {"cacheable": True}
+    async for tok in call_llm_stream(
+        tmpl, "synthesize", meta, q=state["question"], e=evidence
+    ):
+        pieces.append(tok)
+        write({"token": tok})
+    answer_raw = "".join(pieces)
     # remove any role prefixes the model may add
     answer = answer_raw.lstrip().removeprefix("Human:").removeprefix("Assistant:")
 
     citations = [
         {"id": i + 1, "title": d.metadata.get("title"), "url": d.metadata["url"]}
-        for i, d in enumerate(docs[:3])
+        for i, (d, _) in enumerate(packed)
     ]
-    return {"answer": answer.strip(), "citations": citations}
+    # an error fallback must not end up in the answer cache either
+    return {
+        "answer": answer.strip(),
+        "citations": citations,
+        "cacheable": meta["cacheable"],
+    }
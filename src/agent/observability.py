@@ -1,29 +1,69 @@
 """
 OpenTelemetry tracing + Prometheus metrics bootstrap.
 
-Imported exactly once from agent/__init__.py so that every CLI invocation
-and every test run emits spans/metrics.  The init() function is idempotent..
+Nothing starts at import time: ``init()`` (idempotent) installs the tracer
+provider on the first graph run, and ``use_server_mode()`` additionally
+opens the Prometheus scrape port for the long-running server.
+
+Instrumentation helpers:
+
+* ``@traced("phase")`` – wraps an async graph node: one span around the
+  awaited body (tagged with ``agent.iteration``), ``agent_requests_total``
+  and ``agent_phase_latency_seconds`` with the trace id as exemplar.
+* ``span(name, **attrs)`` – child span around a provider call, cache
+  lookup or LLM call; ``open_span`` is the non-current variant for async
+  generators, which may resume in another context.
+
+Export pipeline (read once, in init()):
+
+    OTEL_SAMPLE_RATIO        head-sampled share of traces               (1.0)
+    OTEL_TAIL_LATENCY_MS     also keep traces whose root took longer   (2000)
+                             (0 = off)
+    OTEL_TAIL_ERRORS         also keep traces with an error span          (1)
+    OTEL_CONSOLE_EXPORTER    1 | 0; unset = on for the CLI, off once
+                             ``use_server_mode()`` has been called
+    OTEL_EXPORTER_OTLP_ENDPOINT  collector; resolved in the background
+
+Below ratio 1.0 with a tail rule on, un-sampled traces are still recorded
+(not exported) until their root span ends, so slow or failed requests are
+kept whatever the head decision was.
 """
 
 from __future__ import annotations
 
+import functools
 import os
 import sys
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
 
 # ────────────────── OpenTelemetry (traces) ──────────────────
 from opentelemetry import trace
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import (
+    ReadableSpan,
+    SpanProcessor,
+    SynchronousMultiSpanProcessor,
+    TracerProvider,
+)
 from opentelemetry.sdk.trace.export import (
     BatchSpanProcessor,
     ConsoleSpanExporter,
     SpanExporter,
 )
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import SpanContext, StatusCode, TraceFlags
 
 # ────────────────── Prometheus (metrics) ────────────────────
-from prometheus_client import Counter, Histogram, start_http_server
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 
 
 # ───────────── Safe console exporter ─────────────
@@ -59,63 +99,388 @@ LATENCY_HISTO = Histogram(
     buckets=(0.01, 0.05, 0.1, 0.3, 1, 2, 5),
 )
 
+# Search-cache effectiveness, per tier ("l1" = in-process LRU, "l2" = Redis)
+CACHE_HITS = Counter("agent_cache_hits_total", "Cache hits", ["tier"])
+CACHE_MISSES = Counter("agent_cache_misses_total", "Cache misses", ["tier"])
+CACHE_EVICTIONS = Counter(
+    "agent_cache_evictions_total",
+    "Entries dropped by capacity limits or expiry",
+    ["tier"],
+)
+
+# Work abandoned because the streaming client disconnected (kind="provider_call"
+# / LLM kinds) or dropped on purpose by a streaming search round ("search_straggler")
+CANCELLED_WORK = Counter(
+    "agent_cancelled_work_total",
+    "Provider / LLM calls cancelled before completion",
+    ["kind"],
+)
+CANCELLED_LLM_TOKENS = Counter(
+    "agent_cancelled_llm_tokens_total",
+    "Estimated prompt tokens of LLM calls cancelled in flight",
+)
+
+# Streaming search rounds that ended before every query had finished
+SEARCH_EARLY_EXITS = Counter(
+    "agent_search_early_exits_total",
+    "Search rounds cut short by the early-exit policy (stragglers cancelled)",
+)
+
+# Search providers: raw call latency (drives hedging) and hedge outcomes
+PROVIDER_LATENCY = Histogram(
+    "agent_provider_latency_seconds",
+    "Latency of successful search-provider calls",
+    ["provider"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5),
+)
+HEDGE_REQUESTS = Counter(
+    "agent_hedge_requests_total",
+    "Hedged searches: backup fired and which provider won",
+    ["outcome"],
+)
+
+# Per-provider client-side protection (agent.resilience)
+BREAKER_STATE = Gauge(
+    "agent_provider_breaker_state",
+    "Circuit breaker state: 0=closed, 1=open, 2=half-open",
+    ["provider"],
+)
+LIMITER_WAIT = Histogram(
+    "agent_provider_limiter_wait_seconds",
+    "Time spent waiting for a rate-limiter token",
+    ["provider"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+
+# LLM completion cache, per pipeline node
+LLM_CACHE_REQUESTS = Counter(
+    "agent_llm_cache_requests_total",
+    "LLM cache lookups by node and result (hit/miss)",
+    ["node", "result"],
+)
+LLM_TOKENS_SAVED = Counter(
+    "agent_llm_tokens_saved_total",
+    "Tokens not spent thanks to LLM cache hits",
+    ["node"],
+)
+
+# Semantic (paraphrase) cache lookups, per namespace
+SEMANTIC_LOOKUPS = Counter(
+    "agent_semantic_lookups_total",
+    "Semantic cache lookups by namespace and result (hit/miss)",
+    ["namespace", "result"],
+)
+
+# Local re-ranking of merged search results (agent.rank)
+RERANK_LATENCY = Histogram(
+    "agent_rerank_seconds",
+    "Time spent re-ranking one search round",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+DEDUP_RATIO = Histogram(
+    "agent_dedup_ratio",
+    "Share of a round's candidate snippets dropped as near-duplicates",
+    buckets=(0, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1),
+)
+
+# Reflect-loop policy decisions (agent.policy)
+LOOP_DECISIONS = Counter(
+    "agent_loop_decisions_total",
+    "Loop policy outcomes: skip_reflect / another_round / stop",
+    ["decision"],
+)
+
+# Speculative synthesis started alongside reflect (agent.graph)
+SPECULATION_RESULTS = Counter(
+    "agent_speculative_synthesis_total",
+    "Speculative synthesize runs kept (no further round) or discarded",
+    ["outcome"],
+)
+SPECULATION_SAVED = Histogram(
+    "agent_speculative_synthesis_saved_seconds",
+    "Synthesize time overlapped with reflect by kept speculative runs",
+    buckets=(0, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+
+# Tail-sampling stage outcomes per finished trace (OTEL_SAMPLE_RATIO < 1)
+TRACE_SAMPLING = Counter(
+    "agent_trace_sampling_total",
+    "Finished traces by sampling outcome: head / slow / error / dropped",
+    ["outcome"],
+)
+
+
+# ───────────── Async-aware instrumentation ─────────────
+# A proxy until init() installs the real provider, then delegates to it.
+_TRACER = trace.get_tracer("agent")
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[trace.Span]:
+    """Child span of whatever is current (node, provider call, …)."""
+    with _TRACER.start_as_current_span(name, attributes=attrs) as s:
+        yield s
+
+
+def open_span(name: str, **attrs: Any) -> trace.Span:
+    """Started, *not* current span; the caller must ``end()`` it."""
+    return _TRACER.start_span(name, attributes=attrs)
+
+
+def _exemplar(s: trace.Span) -> Optional[Dict[str, str]]:
+    ctx = s.get_span_context()
+    if not (ctx.is_valid and ctx.trace_flags.sampled):
+        return None  # no exported trace to link to
+    return {"trace_id": format(ctx.trace_id, "032x")}
+
+
+def traced(phase: str) -> Callable[[F], F]:
+    """
+    Instrument an async node ``fn(state)``.  Unlike decorating with
+    ``tracer.start_as_current_span`` (which only spans coroutine creation)
+    the span and the latency sample cover the awaited body.
+    """
+
+    def _wrap(fn: F) -> F:
+        @functools.wraps(fn)
+        async def _inner(state: Dict[str, Any], *args: Any, **kwargs: Any) -> Any:
+            REQUEST_COUNTER.labels(phase).inc()
+            with span(phase, **{"agent.iteration": state.get("iter", 0)}) as s:
+                t0 = time.perf_counter()
+                try:
+                    return await fn(state, *args, **kwargs)
+                finally:
+                    LATENCY_HISTO.labels(phase).observe(
+                        time.perf_counter() - t0, exemplar=_exemplar(s)
+                    )
+
+        return _inner  # type: ignore[return-value]
+
+    return _wrap
+
+
+# ───────────── Sampling + export pipeline ─────────────
+SAMPLE_RATIO = float(os.getenv("OTEL_SAMPLE_RATIO", "1.0"))
+TAIL_LATENCY_SECS = float(os.getenv("OTEL_TAIL_LATENCY_MS", "2000")) / 1000
+TAIL_ERRORS = os.getenv("OTEL_TAIL_ERRORS", "1") != "0"
+TAIL_MAX_PENDING = 1000  # un-sampled traces buffered at once (oldest dropped)
+
+
+class _HeadSampler(Sampler):
+    """
+    Trace-id ratio sampling at the root, inherited by local children.
+    With ``record_unsampled`` the rest are RECORD_ONLY – recorded for the
+    tail stage but not exported – instead of dropped outright.
+    """
+
+    def __init__(self, ratio: float, record_unsampled: bool):
+        self._bound = TraceIdRatioBased.get_bound_for_rate(ratio)
+        self._ratio = ratio
+        self._unsampled = Decision.RECORD_ONLY if record_unsampled else Decision.DROP
+
+    def should_sample(
+        self,
+        parent_context,
+        trace_id,
+        name,
+        kind=None,
+        attributes=None,
+        links=None,
+        trace_state=None,
+    ):  # type: ignore[override]
+        parent = trace.get_current_span(parent_context).get_span_context()
+        if parent.is_valid:
+            sampled = parent.trace_flags.sampled
+            trace_state = parent.trace_state
+        else:
+            sampled = trace_id & TraceIdRatioBased.TRACE_ID_LIMIT < self._bound
+        decision = Decision.RECORD_AND_SAMPLE if sampled else self._unsampled
+        # RECORD_ONLY spans keep their attributes: the tail stage may export them
+        keep = decision != Decision.DROP
+        return SamplingResult(decision, attributes if keep else None, trace_state)
+
+    def get_description(self) -> str:
+        return f"AgentHeadSampler{{{self._ratio}}}"
+
+
+class _Rescued:
+    """A recorded span re-flagged as sampled so exporters accept it."""
+
+    def __init__(self, span: ReadableSpan):
+        self._span = span
+        ctx = span.context
+        self.context = SpanContext(
+            ctx.trace_id,
+            ctx.span_id,
+            ctx.is_remote,
+            TraceFlags(TraceFlags.SAMPLED),
+            ctx.trace_state,
+        )
+
+    def get_span_context(self) -> SpanContext:
+        return self.context
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._span, name)
+
+
+class _TailSampler(SpanProcessor):
+    """
+    Passes head-sampled spans straight on; buffers the rest per trace until
+    the local root ends and forwards them only if the trace was slow or
+    failed.
+    """
+
+    def __init__(self, downstream: SpanProcessor, latency_secs: float, errors: bool):
+        self._downstream = downstream
+        self._latency_ns = latency_secs * 1e9
+        self._errors = errors
+        self._pending: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _keep(self, root: ReadableSpan, spans: List[ReadableSpan]) -> Optional[str]:
+        if self._latency_ns and root.end_time - root.start_time >= self._latency_ns:
+            return "slow"
+        if self._errors and any(
+            s.status.status_code is StatusCode.ERROR for s in spans
+        ):
+            return "error"
+        return None
+
+    def on_end(self, span: ReadableSpan) -> None:
+        is_root = span.parent is None or span.parent.is_remote
+        if span.context.trace_flags.sampled:
+            if is_root:
+                TRACE_SAMPLING.labels("head").inc()
+            self._downstream.on_end(span)
+            return
+        tid = span.context.trace_id
+        with self._lock:
+            self._pending.setdefault(tid, []).append(span)
+            if not is_root:
+                while len(self._pending) > TAIL_MAX_PENDING:
+                    self._pending.popitem(last=False)
+                return
+            spans = self._pending.pop(tid)
+        outcome = self._keep(span, spans)
+        TRACE_SAMPLING.labels(outcome or "dropped").inc()
+        if outcome:
+            for s in spans:
+                self._downstream.on_end(_Rescued(s))  # type: ignore[arg-type]
+
+    def shutdown(self) -> None:
+        self._downstream.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._downstream.force_flush(timeout_millis)
+
+
+class _Switch(SpanProcessor):
+    """A processor that can be turned off after the pipeline is built."""
+
+    def __init__(self, inner: SpanProcessor, enabled: bool):
+        self.inner = inner
+        self.enabled = enabled
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if self.enabled:
+            self.inner.on_end(span)
+
+    def shutdown(self) -> None:
+        self.inner.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.inner.force_flush(timeout_millis)
+
+
 # Module-level globals
 _tracer: Optional[trace.Tracer] = None
+_exporters = SynchronousMultiSpanProcessor()  # fan-out behind the samplers
+_console: Optional[_Switch] = None
+_server_mode = False
+
+
+def _console_wanted() -> bool:
+    flag = os.getenv("OTEL_CONSOLE_EXPORTER")
+    return flag == "1" if flag is not None else not _server_mode
+
+
+def use_server_mode() -> None:
+    """
+    Long-running server: tracing on, Prometheus scrape port open, console
+    span dump off unless explicitly enabled.
+    """
+    global _server_mode
+    _server_mode = True
+    init()
+    if _console is not None:
+        _console.enabled = _console_wanted()
+    start_metrics_server()
+
+
+def _attach_otlp(endpoint: str) -> None:
+    """Resolve the collector off the import path; attach it if reachable."""
+    import socket, urllib.parse as _url
+
+    try:
+        socket.getaddrinfo(_url.urlparse(endpoint).hostname, None)
+    except (socket.gaierror, UnicodeError):
+        print(
+            f"[observability] OTLP exporter skipped – collector unreachable: {endpoint}",
+            file=sys.stderr,
+        )
+        return
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    _exporters.add_span_processor(
+        BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint))
+    )
 
 
 def init() -> trace.Tracer:
     """
-    Initialise tracing + metrics exactly once.
+    Initialise tracing exactly once (first graph run or server start).
     Returns a Tracer you can import and use in nodes.py / tools.py.
     """
-    global _tracer
+    global _tracer, _console
     if _tracer:  # already initialised
         return _tracer
 
     # ──────────────── Tracer provider ────────────────
+    tail = SAMPLE_RATIO < 1 and bool(TAIL_LATENCY_SECS or TAIL_ERRORS)
     resource = Resource.create({"service.name": "llm-research-agent"})
-    provider = TracerProvider(resource=resource)
+    provider = TracerProvider(
+        resource=resource, sampler=_HeadSampler(SAMPLE_RATIO, record_unsampled=tail)
+    )
     trace.set_tracer_provider(provider)
+    provider.add_span_processor(
+        _TailSampler(_exporters, TAIL_LATENCY_SECS, TAIL_ERRORS) if tail else _exporters
+    )
 
-    # Always register the guarded console exporter
-    provider.add_span_processor(BatchSpanProcessor(_SafeConsoleExporter()))
+    # Guarded console exporter – always built, so server mode can mute it
+    _console = _Switch(BatchSpanProcessor(_SafeConsoleExporter()), _console_wanted())
+    _exporters.add_span_processor(_console)
 
     # ------------------------------------------------------------------
-    # OTLP exporter: only attach if the collector hostname actually
-    # resolves *and* we’re not inside a pytest run (tests run the CLI
-    # offline, so a missing collector would crash at shutdown).
+    # OTLP exporter: attached from a daemon thread once the collector
+    # hostname resolves (a slow DNS lookup must not stall startup), and
+    # never inside a pytest run (tests run offline, so a missing collector
+    # would crash at shutdown).  Spans ended before then go unexported.
     # ------------------------------------------------------------------
-
-    import socket, urllib.parse as _url
-
-    def _collector_resolves(url: str) -> bool:
-        host = _url.urlparse(url).hostname
-        try:
-            socket.getaddrinfo(host, None)
-            return True
-        except socket.gaierror:
-            return False
-
     otlp_ep = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
-
-    if (
-        otlp_ep
-        and _collector_resolves(otlp_ep)
-        and "PYTEST_CURRENT_TEST" not in os.environ
-    ):
-        provider.add_span_processor(
-            BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_ep))
-        )
-    elif otlp_ep:  # endpoint set but unusable
-        print(
-            f"[observability] OTLP exporter skipped – collector unreachable: {otlp_ep}",
-            file=sys.stderr,
-        )
+    if otlp_ep and "PYTEST_CURRENT_TEST" not in os.environ:
+        threading.Thread(
+            target=_attach_otlp, args=(otlp_ep,), name="otlp-discovery", daemon=True
+        ).start()
 
     _tracer = trace.get_tracer(__name__)
+    return _tracer
 
-    # ──────────────── Prometheus scrape port ────────────────
-    #
+
+def start_metrics_server() -> None:
+    """Expose /metrics on PROM_PORT (server mode only; idempotent)."""
     # Multiple agent processes may start in quick succession during `pytest`.
     # If the port is already in use we simply skip exposing a second HTTP
     # server instead of crashing.
@@ -133,5 +498,3 @@ def init() -> trace.Tracer:
                 "skipping duplicate server",
                 file=sys.stderr,
             )
-
-    return _tracer
@@ -0,0 +1,151 @@
+"""
+Token-aware evidence packing for the LLM prompts.
+
+``pack(docs, budget)`` walks docs in relevance order and fills a token
+budget greedily: a doc goes in whole if it fits, otherwise as many of its
+leading sentences as fit, so nothing is cut mid-sentence.  Token counts
+are memoised per text, so a snippet counted for reflect is free for
+synthesize.
+
+Counting uses a ≈4 chars/token estimate unless TOKENIZER=tiktoken opts
+in to tiktoken's encoding (read from tiktoken's cache, downloaded by
+tiktoken on a cold one – so offline runs and CI never touch the network
+by default).  The encoding loads on a background thread (``preload``,
+called when the graph is built); counts are estimated until it is ready,
+and a failed load is retried after TOKENIZER_RETRY_SECS.
+
+    PACK_TOKENS_REFLECT      evidence budget for the reflect prompt     (1000)
+    PACK_TOKENS_SYNTHESIZE   evidence budget for the synthesize prompt  (400)
+    TOKENIZER                estimate | tiktoken                    (estimate)
+    TOKENIZER_ENCODING       tiktoken encoding name            (cl100k_base)
+    TOKENIZER_RETRY_SECS     wait before retrying a failed load          (60)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+BUDGETS = {
+    "reflect": int(os.getenv("PACK_TOKENS_REFLECT", "1000")),
+    "synthesize": int(os.getenv("PACK_TOKENS_SYNTHESIZE", "400")),
+}
+TIKTOKEN = os.getenv("TOKENIZER", "estimate") == "tiktoken"
+ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+RETRY_SECS = float(os.getenv("TOKENIZER_RETRY_SECS", "60"))
+OVERHEAD = 4  # tokens per packed doc for the separator / citation marker
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+# ─────────────────────────── token counting ───────────────────────────
+def _approx(text: str) -> int:
+    return (len(text) + 3) // 4  # ≈4 chars/token
+
+
+_enc: Optional[Any] = None  # tiktoken Encoding once loaded
+_loader: Optional[threading.Thread] = None
+_failed_at = -float("inf")
+_lock = threading.Lock()
+
+
+def _get_encoding() -> Any:
+    import tiktoken
+
+    return tiktoken.get_encoding(ENCODING)
+
+
+def _load() -> None:
+    global _enc, _failed_at
+    try:
+        enc = _get_encoding()
+    except Exception as e:  # missing package, offline, corrupt cache, …
+        print(
+            f"[packing] tiktoken unavailable, estimating tokens ({e})", file=sys.stderr
+        )
+        _failed_at = time.monotonic()
+        return
+    _enc = enc
+    count_tokens.cache_clear()  # drop counts estimated while loading
+
+
+def preload() -> None:
+    """Start loading the encoding in the background (no-op unless opted in)."""
+    global _loader
+    if not TIKTOKEN or _enc is not None:
+        return
+    with _lock:
+        busy = _loader is not None and _loader.is_alive()
+        if busy or time.monotonic() - _failed_at < RETRY_SECS:
+            return
+        # daemon thread: a hanging download never blocks the loop or exit
+        _loader = threading.Thread(target=_load, name="tiktoken-load", daemon=True)
+        _loader.start()
+
+
+def _encoding() -> Optional[Any]:
+    """The tiktoken encoding if it is loaded; never waits for it."""
+    if _enc is None:
+        preload()
+    return _enc
+
+
+@lru_cache(maxsize=16384)
+def count_tokens(text: str) -> int:
+    """Tokens in *text* (memoised across nodes)."""
+    enc = _encoding()
+    return _approx(text) if enc is None else len(enc.encode_ordinary(text))
+
+
+def truncate(text: str, budget: int) -> str:
+    """Leading part of *text* within *budget* tokens – may cut mid-sentence."""
+    text = text.strip()
+    enc = _encoding()
+    if enc is None:
+        return text[: max(0, budget) * 4]
+    return enc.decode(enc.encode_ordinary(text)[: max(0, budget)]).rstrip("\ufffd")
+
+
+# ─────────────────────────── packing ───────────────────────────
+def sentences(text: str) -> List[str]:
+    return [s for s in _SENTENCE_END.split(text.strip()) if s]
+
+
+def pack(
+    docs: Sequence[Document], budget: int, overhead: int = OVERHEAD
+) -> List[Tuple[Document, str]]:
+    """
+    ``(doc, text)`` pairs whose texts fit *budget* tokens, in the given
+    (relevance) order.  *overhead* is charged per doc for the separator /
+    citation marker the caller adds.
+    """
+    left = budget
+    packed: List[Tuple[Document, str]] = []
+    for doc in docs:
+        if left <= overhead:
+            break
+        text = doc.page_content.strip()
+        if count_tokens(text) + overhead <= left:
+            packed.append((doc, text))
+            left -= count_tokens(text) + overhead
+            continue
+        # doc too long for what's left: keep its leading sentences
+        taken: List[str] = []
+        used = overhead
+        for sentence in sentences(text):
+            cost = count_tokens(sentence) + 1  # joining space
+            if used + cost > left:
+                break
+            taken.append(sentence)
+            used += cost
+        if taken:
+            packed.append((doc, " ".join(taken)))
+            left -= used
+    return packed
@@ -0,0 +1,123 @@
+"""
+Reflect-loop policy: is another search round worth paying for?
+
+The graph asks the active policy twice per round:
+
+* ``skip_reflect(state)`` – before reflect's LLM call.  True means reflect
+  returns ``need_more=False`` without calling the model.
+* ``another_round(state, next_iter)`` – in the router after reflect.
+
+``LLMPolicy`` (default) trusts reflect's ``need_more`` flag and only skips
+the call when no round could follow anyway (iteration cap or budget).
+``AdaptivePolicy`` adds cheap signals:
+
+* question coverage – share of the question's terms found in the evidence;
+  with enough docs and high coverage the reflect call is skipped entirely;
+* slot coverage – ``len(filled) / len(slots)`` from reflect's answer;
+* novelty – share of the last round's results that were new evidence;
+  a follow-up round that mostly re-found known stories is not repeated.
+
+Configured per deployment from env:
+
+    AGENT_MAX_ITER           search + reflect rounds at most            (2)
+    LOOP_POLICY              "llm" | "adaptive"                        (llm)
+    LOOP_CONFIDENT_DOCS      docs needed to skip reflect                (5)
+    LOOP_CONFIDENT_COVERAGE  question-term coverage to skip reflect    (0.8)
+    LOOP_SLOTS_DONE          slot coverage that ends the loop          (1.0)
+    LOOP_MIN_NOVELTY         novelty below which we stop searching     (0.2)
+
+``set_policy(obj)`` installs any object with the two methods.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from typing import Any, Dict, Optional
+
+from . import budget, rank
+
+MAX_ITER = int(os.getenv("AGENT_MAX_ITER", "2"))
+LOOP_POLICY = os.getenv("LOOP_POLICY", "llm")
+CONFIDENT_DOCS = int(os.getenv("LOOP_CONFIDENT_DOCS", "5"))
+CONFIDENT_COVERAGE = float(os.getenv("LOOP_CONFIDENT_COVERAGE", "0.8"))
+SLOTS_DONE = float(os.getenv("LOOP_SLOTS_DONE", "1.0"))
+MIN_NOVELTY = float(os.getenv("LOOP_MIN_NOVELTY", "0.2"))
+
+
+# ─────────────────────────── signals ───────────────────────────
+def question_coverage(state: Dict[str, Any]) -> float:
+    """Share of the question's terms that occur somewhere in the evidence."""
+    terms = set(rank.tokenize(state.get("question", "")))
+    if not terms:
+        return 1.0
+    seen = set()
+    for d in state.get("docs", []):
+        seen.update(rank.tokenize(d.page_content))
+    return len(terms & seen) / len(terms)
+
+
+def slot_coverage(state: Dict[str, Any]) -> Optional[float]:
+    """``filled / slots`` from the last reflect, or None before the first."""
+    slots = state.get("slots") or []
+    if not slots:
+        return None
+    return min(1.0, len(state.get("filled") or []) / len(slots))
+
+
+def novelty(state: Dict[str, Any]) -> float:
+    """Share of the last round's results that became new evidence."""
+    return state.get("novelty", 1.0)
+
+
+# ─────────────────────────── policies ───────────────────────────
+class LLMPolicy:
+    """Loop whenever reflect asks for it and the cap / budget allow."""
+
+    def can_loop(self, state: Dict[str, Any], next_iter: int) -> bool:
+        return next_iter < MAX_ITER and budget.can_loop(state)
+
+    def skip_reflect(self, state: Dict[str, Any]) -> bool:
+        return not self.can_loop(state, state.get("iter", 0) + 1)
+
+    def another_round(self, state: Dict[str, Any], next_iter: int) -> bool:
+        return bool(state.get("need_more")) and self.can_loop(state, next_iter)
+
+
+class AdaptivePolicy(LLMPolicy):
+    """``LLMPolicy`` plus coverage / novelty short-cuts."""
+
+    def skip_reflect(self, state: Dict[str, Any]) -> bool:
+        if super().skip_reflect(state):
+            return True
+        return (
+            len(state.get("docs", [])) >= CONFIDENT_DOCS
+            and question_coverage(state) >= CONFIDENT_COVERAGE
+        )
+
+    def another_round(self, state: Dict[str, Any], next_iter: int) -> bool:
+        if not super().another_round(state, next_iter):
+            return False
+        covered = slot_coverage(state)
+        if covered is not None and covered >= SLOTS_DONE:
+            return False  # reflect says "more" but every slot is filled
+        # a follow-up round that mostly re-found known stories won't improve
+        return next_iter <= 1 or novelty(state) >= MIN_NOVELTY
+
+
+POLICIES = {"llm": LLMPolicy, "adaptive": AdaptivePolicy}
+if LOOP_POLICY not in POLICIES:
+    print(
+        f"[policy] unknown LOOP_POLICY={LOOP_POLICY!r} – using 'llm'", file=sys.stderr
+    )
+_policy: Any = POLICIES.get(LOOP_POLICY, LLMPolicy)()
+
+
+def current() -> Any:
+    return _policy
+
+
+def set_policy(policy: Any) -> None:
+    """Install a policy object (``skip_reflect`` + ``another_round``)."""
+    global _policy
+    _policy = policy
@@ -0,0 +1,98 @@
+"""
+Local re-ranking of merged search results.
+
+``rerank(question, docs)`` scores every candidate snippet (title + content)
+against the question with BM25, vectorised over a docs × query-terms
+count matrix, collapses near-duplicate snippets (SimHash, see
+``agent.fingerprint``; the best-ranked copy survives) and returns the
+best ``RERANK_TOP_K``.  Pure NumPy, no network; ties keep provider order.
+Callers that order a batch more than once (the search node ranks a round,
+then the whole evidence store) score it once with ``scored`` and pass
+the scores along.
+
+    RERANK_TOP_K          docs kept after ranking          (5)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from collections import Counter
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from . import fingerprint
+from .observability import RERANK_LATENCY
+
+TOP_K = int(os.getenv("RERANK_TOP_K", "5"))
+
+# standard BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    """a an the is are was were be been of in on at to for by with and or
+    what which who how when where why do does did it its this that""".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def _doc_text(doc: Document) -> str:
+    title = (doc.metadata or {}).get("title") or ""
+    return f"{title} {doc.page_content}"
+
+
+def bm25_scores(query: str, docs: Sequence[Document]) -> np.ndarray:
+    """BM25 score of every doc for *query* (``float64[len(docs)]``)."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not docs or not terms:
+        return np.zeros(len(docs))
+    counts = [Counter(tokenize(_doc_text(d))) for d in docs]
+    tf = np.array([[c[t] for t in terms] for c in counts], dtype=np.float64)
+    lengths = np.array([sum(c.values()) for c in counts], dtype=np.float64)
+
+    n = len(docs)
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    norm = K1 * (1 - B + B * lengths / max(lengths.mean(), 1.0))
+    return (idf * tf * (K1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+
+def scored(question: str, docs: Sequence[Document]) -> np.ndarray:
+    """:func:`bm25_scores`, timed – one ``agent_rerank_seconds`` sample per call."""
+    started = time.perf_counter()
+    try:
+        return bm25_scores(question, docs)
+    finally:
+        RERANK_LATENCY.observe(time.perf_counter() - started)
+
+
+def by_relevance(
+    question: str, docs: Sequence[Document], scores: Optional[Sequence[float]] = None
+) -> List[Document]:
+    """*docs* sorted by BM25 score for *question* (stable); pass *scores* to reuse them."""
+    if scores is None:
+        scores = scored(question, docs)
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    return [docs[i] for i in order]
+
+
+def rerank(
+    question: str,
+    docs: Sequence[Document],
+    top_k: Optional[int] = None,
+    scores: Optional[Sequence[float]] = None,
+) -> List[Document]:
+    """Best *top_k* distinct docs for *question*, most relevant first."""
+    top_k = TOP_K if top_k is None else top_k
+    ranked = by_relevance(question, docs, scores)
+    # same story under another URL / from another query or loop
+    kept = fingerprint.unique([fingerprint.simhash(d.page_content) for d in ranked])
+    return [ranked[i] for i in kept[:top_k]]
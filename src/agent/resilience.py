@@ -0,0 +1,177 @@
+"""
+Client-side protection for the search providers.
+
+* ``TokenBucket`` – shared async rate limiter; a 429 with ``Retry-After``
+  blocks the whole bucket, so parallel queries back off together instead
+  of each discovering the throttle on its own.
+* ``CircuitBreaker`` – after N consecutive failures the provider is
+  skipped for a cooldown, then a single half-open probe decides whether
+  to close again.
+
+Both are per provider and configured from env, e.g. for Bing:
+
+    BING_RPS (10)  BING_BURST (20)            token bucket, 0 = unlimited
+    BREAKER_FAILURES (5)  BREAKER_COOLDOWN_SECS (30)   shared by all providers
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+from .observability import BREAKER_STATE, LIMITER_WAIT
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_SECS = float(os.getenv("BREAKER_COOLDOWN_SECS", "30"))
+
+
+class RateLimited(RuntimeError):
+    """HTTP 429 from a provider; ``retry_after`` is in seconds if known."""
+
+    def __init__(self, msg: str, retry_after: Optional[float] = None):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+class ProviderUnavailable(RuntimeError):
+    """Circuit open, or the limiter can't admit us within the time we have."""
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """``Retry-After`` as seconds (delta-seconds or HTTP-date form)."""
+    raw = headers.get("Retry-After")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(raw).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ─────────────────────────── token bucket ───────────────────────────
+class TokenBucket:
+    """
+    Lock-free async token bucket.  Each ``acquire`` reserves a token
+    immediately (the balance may go negative) and sleeps until its slot,
+    which is safe because nothing awaits between read and update.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, max_wait: float = float("inf")) -> None:
+        now = time.monotonic()
+        wait = max(0.0, self.blocked_until - now)
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens -= 1
+            wait = max(wait, -self.tokens / self.rate)
+        if wait > max_wait:
+            if self.rate > 0:
+                self.tokens += 1  # give the reservation back
+            raise ProviderUnavailable(f"{self.name} rate-limited for {wait:.2f}s")
+        LIMITER_WAIT.labels(self.name).observe(wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after: Optional[float]) -> None:
+        """Honour a server-side ``Retry-After`` for every caller."""
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+
+# ─────────────────────────── circuit breaker ────────────────────────
+CLOSED, OPEN, HALF_OPEN = 0, 1, 2  # also the BREAKER_STATE gauge values
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failures: int, cooldown: float):
+        self.name = name
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self._set(CLOSED)
+
+    def _set(self, state: int) -> None:
+        self.state = state
+        BREAKER_STATE.labels(self.name).set(state)
+
+    def available(self) -> bool:
+        """Would ``allow`` admit a call right now?  (no state change)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at >= self.cooldown
+        return not self.probing
+
+    def allow(self) -> bool:
+        """Admit a call; the first one after the cooldown becomes the probe."""
+        if not self.available():
+            return False
+        if self.state != CLOSED:
+            self._set(HALF_OPEN)
+            self.probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.probing = False
+        if self.state != CLOSED:
+            self._set(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.state == HALF_OPEN or self.failures >= self.max_failures:
+            self.opened_at = time.monotonic()
+            self._set(OPEN)
+
+    def release(self) -> None:
+        """Call abandoned (cancelled) – neither success nor failure."""
+        self.probing = False
+
+
+# ─────────────────────────── registry ───────────────────────────────
+class ProviderGuard:
+    def __init__(self, name: str):
+        prefix = name.upper()
+        self.limiter = TokenBucket(
+            name,
+            rate=float(os.getenv(f"{prefix}_RPS", "10")),
+            burst=float(os.getenv(f"{prefix}_BURST", "20")),
+        )
+        self.breaker = CircuitBreaker(name, BREAKER_FAILURES, BREAKER_COOLDOWN_SECS)
+
+
+_guards: Dict[str, ProviderGuard] = {}
+
+
+def guard(name: str) -> ProviderGuard:
+    """Process-wide limiter + breaker for provider *name*."""
+    g = _guards.get(name)
+    if g is None:
+        g = _guards[name] = ProviderGuard(name)
+    return g
+
+
+def reset() -> None:
+    """Forget all limiter / breaker state (tests)."""
+    _guards.clear()
@@ -0,0 +1,260 @@
+"""
+Semantic (near-duplicate) lookup for questions and search queries.
+
+Exact cache keys only hit when a question is repeated verbatim.  This
+module maps a new text onto a *previously seen* text that says the same
+thing, so the caller can reuse that text's cache key:
+
+* ``embed`` – CPU-only hashed feature vectorizer (content words + in-word
+  character trigrams, signed feature hashing, L2-normalised).  No model
+  download, runs offline.
+* ``Index`` – NumPy matrix of unit vectors plus an inverted list from
+  content-word bucket to rows.  A lookup only scores the rows that share
+  a content word with the query (one gathered mat-vec + argmax), so cost
+  tracks the candidate set rather than the index size.
+* One index per namespace (``"answer"``, ``"web_search"`` …), optionally
+  persisted with ``np.savez`` and reloaded on first use.
+
+    SEMANTIC_CACHE=1            opt in (off by default)
+    SEMANTIC_THRESHOLD          cosine similarity needed for a hit  (0.85)
+    SEMANTIC_DIM                hashed feature dimensions           (1024)
+    SEMANTIC_MAX_ENTRIES        per namespace, oldest overwritten   (5000)
+    SEMANTIC_CACHE_PATH         .npz file to load / ``save()`` to   (unset)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import zlib
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .observability import SEMANTIC_LOOKUPS
+
+ENABLED = os.getenv("SEMANTIC_CACHE", "0") == "1"
+THRESHOLD = float(os.getenv("SEMANTIC_THRESHOLD", "0.85"))
+DIM = int(os.getenv("SEMANTIC_DIM", "1024"))
+MAX_ENTRIES = int(os.getenv("SEMANTIC_MAX_ENTRIES", "5000"))
+PATH = os.getenv("SEMANTIC_CACHE_PATH")
+
+# ───────────────────────────── vectorizer ─────────────────────────────
+_WORD_WEIGHT = 1.0
+_TRIGRAM_WEIGHT = 0.35
+_INTENT_WEIGHT = 0.5  # who / when / how … separate "who invented X" from "what is X"
+
+_STOPWORDS = frozenset(
+    """a an the is are was were be been do does did of in on at to for by with
+    and or what whats which whom whose can could would
+    should will shall may might must please tell me us i you we it its this that
+    these those about explain give list some any there their""".split()
+)
+_CONTRACTIONS = (
+    (re.compile(r"'s\b"), " is"),
+    (re.compile(r"'re\b"), " are"),
+    (re.compile(r"n't\b"), " not"),
+)
+_INTENT = frozenset("who when where why how".split())
+_SUFFIXES = ("ing", "ed", "es", "or", "er", "s")
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def _stem(word: str) -> str:
+    """Crude suffix strip so "works" / "work", "inventor" / "invented" meet."""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[: -len(suffix)]
+    return word
+
+
+def _tokens(text: str) -> List[str]:
+    text = text.lower().replace("’", "'")
+    for pattern, repl in _CONTRACTIONS:
+        text = pattern.sub(repl, text)
+    words = _NON_WORD.sub(" ", text).split()
+    content = [_stem(w) for w in words if w not in _STOPWORDS]
+    return content or words  # an all-stopword text still needs features
+
+
+def _bucket(feature: str) -> Tuple[int, float]:
+    h = zlib.crc32(feature.encode())  # stable across processes, unlike hash()
+    return h % DIM, 1.0 if h & 0x80000000 else -1.0
+
+
+@lru_cache(maxsize=4096)
+def _embed_cached(text: str) -> np.ndarray:
+    vec = np.zeros(DIM, dtype=np.float32)
+    for word in _tokens(text):
+        idx, sign = _bucket("w:" + word)
+        if word in _INTENT:
+            vec[idx] += sign * _INTENT_WEIGHT
+            continue
+        vec[idx] += sign * _WORD_WEIGHT
+        padded = f"<{word}>"
+        for i in range(len(padded) - 2):
+            idx, sign = _bucket(padded[i : i + 3])
+            vec[idx] += sign * _TRIGRAM_WEIGHT
+    norm = float(np.linalg.norm(vec))
+    if norm:
+        vec /= norm
+    vec.setflags(write=False)
+    return vec
+
+
+def embed(text: str) -> np.ndarray:
+    """Unit-length ``float32[DIM]`` vector for *text* (read-only, memoised)."""
+    return _embed_cached(text)
+
+
+@lru_cache(maxsize=4096)
+def _word_buckets(text: str) -> FrozenSet[int]:
+    """Content-word feature buckets: the inverted-list keys for *text*."""
+    return frozenset(_bucket("w:" + w)[0] for w in _tokens(text) if w not in _INTENT)
+
+
+# ───────────────────────────── index ─────────────────────────────
+class Index:
+    """
+    Cosine-similarity index over unit vectors.  Rows grow by doubling up
+    to ``max_entries``; after that the oldest row is overwritten.  Only rows
+    sharing a (not too common) content word with the query are scored –
+    a paraphrase that shares none would not clear the threshold anyway.
+    """
+
+    def __init__(self, dim: int = DIM, max_entries: int = MAX_ENTRIES):
+        self.dim = dim
+        self.max_entries = max(1, max_entries)
+        self._vecs = np.zeros((min(64, self.max_entries), dim), dtype=np.float32)
+        self._texts: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._postings: Dict[int, Set[int]] = {}
+        self._next = 0  # ring position once full
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def add(self, text: str, vec: Optional[np.ndarray] = None) -> None:
+        if text in self._rows:
+            return
+        vec = embed(text) if vec is None else vec
+        n = len(self._texts)
+        if n < self.max_entries:
+            if n == len(self._vecs):
+                grown = np.zeros(
+                    (min(2 * n, self.max_entries), self.dim), dtype=np.float32
+                )
+                grown[:n] = self._vecs
+                self._vecs = grown
+            row = n
+            self._texts.append(text)
+        else:
+            row = self._next
+            self._next = (row + 1) % self.max_entries
+            old = self._texts[row]
+            del self._rows[old]
+            for b in _word_buckets(old):
+                self._postings[b].discard(row)
+            self._texts[row] = text
+        self._vecs[row] = vec
+        self._rows[text] = row
+        for b in _word_buckets(text):
+            self._postings.setdefault(b, set()).add(row)
+
+    def nearest(self, text: str) -> Tuple[Optional[str], float]:
+        """Most similar stored text and its cosine similarity."""
+        lists = sorted(
+            (self._postings.get(b, set()) for b in _word_buckets(text)), key=len
+        )
+        # words shared by a large slice of the index say little about the
+        # match; skip them unless nothing rarer is left
+        cap = max(64, len(self._texts) // 16)
+        rows: Set[int] = set(lists[0]) if lists else set()
+        for posting in lists[1:]:
+            if len(posting) > cap:
+                break
+            rows |= posting
+        if not rows:
+            return None, 0.0
+        cand = np.fromiter(rows, dtype=np.intp, count=len(rows))
+        scores = self._vecs[cand] @ embed(text)
+        best = int(np.argmax(scores))
+        return self._texts[cand[best]], float(scores[best])
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """``(vectors, texts)`` for persistence."""
+        return self._vecs[: len(self._texts)].copy(), np.array(self._texts, dtype=str)
+
+
+_indexes: Dict[str, Index] = {}
+_loaded = False
+
+
+def index(namespace: str) -> Index:
+    """Process-wide index for *namespace* (loads ``PATH`` on first use)."""
+    global _loaded
+    if not _loaded:
+        _loaded = True
+        if PATH and os.path.exists(PATH):
+            load(PATH)
+    idx = _indexes.get(namespace)
+    if idx is None:
+        idx = _indexes[namespace] = Index()
+    return idx
+
+
+def nearest(namespace: str, text: str) -> Optional[str]:
+    """
+    A previously remembered text that means the same as *text* (similarity
+    ≥ THRESHOLD), or ``None``.  Never returns *text* itself.
+    """
+    match, score = index(namespace).nearest(text)
+    hit = match is not None and match != text and score >= THRESHOLD
+    SEMANTIC_LOOKUPS.labels(namespace, "hit" if hit else "miss").inc()
+    return match if hit else None
+
+
+def remember(namespace: str, text: str) -> None:
+    """Make *text* a lookup target for future paraphrases."""
+    index(namespace).add(text)
+
+
+# ───────────────────────────── persistence ─────────────────────────────
+def save(path: Optional[str] = None) -> None:
+    """Write every index to *path* (default ``SEMANTIC_CACHE_PATH``)."""
+    path = path or PATH
+    if not path or not _indexes:
+        return
+    arrays: Dict[str, np.ndarray] = {"dim": np.array(DIM)}
+    for ns, idx in _indexes.items():
+        arrays[f"{ns}.vecs"], arrays[f"{ns}.texts"] = idx.arrays()
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:  # file object: np.savez won't append ".npz"
+        np.savez(fh, **arrays)
+    os.replace(tmp, path)
+
+
+def load(path: str) -> None:
+    """Merge the indexes stored at *path* into the process-wide ones."""
+    try:
+        with np.load(path) as data:
+            if int(data["dim"]) != DIM:
+                raise ValueError(f"dimension {int(data['dim'])} != {DIM}")
+            for name in data.files:
+                if not name.endswith(".vecs"):
+                    continue
+                ns = name[: -len(".vecs")]
+                idx = _indexes.setdefault(ns, Index())
+                for vec, text in zip(data[name], data[f"{ns}.texts"]):
+                    idx.add(str(text), vec)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"[semantic] ignoring index file {path!r}: {e}", file=sys.stderr)
+
+
+def reset() -> None:
+    """Forget every index (tests)."""
+    global _loaded
+    _indexes.clear()
+    _loaded = False
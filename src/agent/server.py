@@ -1,69 +1,224 @@
 import asyncio, json
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse
-from .graph import answer_question  # existing helper
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from . import batch, budget, jobs, observability, semantic
+from .graph import invalidate_answer, stream_answer
+from .http_pool import close_sessions
 
-app = FastAPI(title="LLM Research Agent (streaming)")
+observability.use_server_mode()  # no per-span console dump under load
 
 
-# ---- internal helper -------------------------------------------------
-async def _run_stream(question: str):
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    yield
+    await jobs.shutdown()  # queued / running jobs die with the process
+    # release pooled provider connections on shutdown
+    await close_sessions()
+    semantic.save()  # keep learned paraphrases across restarts (if configured)
+
+
+app = FastAPI(title="LLM Research Agent (streaming)", lifespan=_lifespan)
+
+
+# ---- internal helpers ------------------------------------------------
+DISCONNECT_POLL_SECS = 0.25
+_END = object()
+
+
+async def _until_client_gone(
+    events: AsyncIterator[Any], client_gone: Callable[[], Awaitable[None]]
+) -> AsyncIterator[Any]:
     """
-    Async generator that yields incremental JSON strings.
+    Re-yield *events* while racing them against ``client_gone()``.
 
-    For now we fake token streaming by sending the final answer in
-    50-character chunks. Replace with real token callbacks later.
+    The graph runs in its own task; as soon as the client disconnects that
+    task is cancelled, which cancels the running LangGraph nodes and their
+    pending ``web_search`` / ``call_llm`` awaits (see CANCELLED_WORK).
     """
-    result = await answer_question(question)
-    answer = result["answer"]
-    citations = result["citations"]
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
 
-    # naive chunking for PoC
-    for i in range(0, len(answer), 50):
-        chunk = answer[i : i + 50]
-        yield f"event: token\ndata: {json.dumps({'text': chunk})}\n\n"
-        await asyncio.sleep(0.02)  # tiny delay so clients see streaming
+    async def _pump():
+        async for item in events:
+            queue.put_nowait(item)
 
-    payload = {"answer": answer, "citations": citations}
-    yield f"event: done\ndata: {json.dumps(payload)}\n\n"
+    pump = asyncio.create_task(_pump())
+    pump.add_done_callback(lambda _t: queue.put_nowait(_END))
+    watcher = asyncio.create_task(client_gone())
+    watcher.add_done_callback(lambda _t: pump.cancel())
+    try:
+        while (item := await queue.get()) is not _END:
+            yield item
+        if not watcher.done():
+            pump.result()  # re-raise graph errors
+    finally:
+        pump.cancel()
+        watcher.cancel()
+
+
+async def _run_stream(
+    question: str,
+    client_gone: Callable[[], Awaitable[None]],
+    budget_ms: Optional[float] = None,
+):
+    """
+    Async generator that yields SSE frames as the graph runs:
+    ``progress`` after each phase, ``token`` per synthesized chunk and a
+    final ``done`` with answer + citations.
+    """
+    events = stream_answer(question, budget_ms)
+    async for event, data in _until_client_gone(events, client_gone):
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 # ---- SSE endpoint ----------------------------------------------------
 @app.get("/api/stream")
-async def sse_endpoint(question: str, request: Request):
-    async def _event_gen():
-        try:
-            async for chunk in _run_stream(question):
-                # Drop connection if client went away
-                if await request.is_disconnected():
-                    break
-                yield chunk
-        finally:
-            # ensures generator close
-            pass
+async def sse_endpoint(
+    question: str,
+    request: Request,
+    budget_ms: Optional[float] = Query(None, gt=0, allow_inf_nan=False),
+):
+    async def _client_gone():
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECS)
 
     headers = {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
-    return StreamingResponse(_event_gen(), headers=headers)
+    return StreamingResponse(
+        _run_stream(question, _client_gone, budget_ms), headers=headers
+    )
+
+
+# ---- Answer-cache invalidation -------------------------------------
+@app.delete("/api/cache")
+async def invalidate_endpoint(question: str):
+    return {"question": question, "invalidated": await invalidate_answer(question)}
+
+
+# ---- Bulk questions ---------------------------------------------------
+class BatchRequest(BaseModel):
+    """Body of ``/api/batch`` and ``/api/jobs`` (see ``agent.batch``)."""
+
+    questions: List[Union[str, Dict[str, Any]]]
+    concurrency: Optional[int] = None
+    budget_ms: Optional[float] = None
+
+
+def _batch_items(req: BatchRequest) -> List[batch.Item]:
+    if len(req.questions) > batch.MAX_QUESTIONS:
+        raise HTTPException(413, f"at most {batch.MAX_QUESTIONS} questions per batch")
+    # checked here rather than by pydantic: a 422 body echoing an inf input can't be JSON-encoded
+    budgets = [("budget_ms", req.budget_ms)] + [
+        (f"questions[{i}].budget", q.get("budget"))
+        for i, q in enumerate(req.questions)
+        if isinstance(q, dict)
+    ]
+    for where, value in budgets:
+        if value is not None:
+            try:
+                budget.checked(value)
+            except (TypeError, ValueError) as e:
+                raise HTTPException(422, f"{where}: {e}")
+    return [batch.parse_request(i, q) for i, q in enumerate(req.questions)]
+
+
+def _concurrency(req: BatchRequest) -> int:
+    return max(1, min(req.concurrency or batch.CONCURRENCY, batch.MAX_CONCURRENCY))
+
+
+def _ndjson(records: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+
+
+@app.post("/api/batch")
+async def batch_endpoint(req: BatchRequest, request: Request):
+    """NDJSON: one record per question as it finishes, then ``{"summary": …}``."""
+    items = _batch_items(req)
+
+    async def _client_gone():
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECS)
+
+    async def _lines():
+        tally = batch.Tally()
+        records = batch.answer_stream(items, _concurrency(req), req.budget_ms)
+        async for rec in _until_client_gone(records, _client_gone):
+            tally.add(rec)
+            yield _ndjson([rec])
+        yield _ndjson([{"summary": tally.summary()}])
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(req: BatchRequest):
+    job = jobs.submit(_batch_items(req), _concurrency(req), req.budget_ms)
+    return job.info()
+
+
+def _job(job_id: str) -> jobs.Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "unknown or expired job")
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+async def poll_job(job_id: str):
+    return _job(job_id).info()
+
+
+@app.get("/api/jobs/{job_id}/results")
+async def job_results(job_id: str):
+    """Finished job's records in input order (NDJSON), then its summary."""
+    job = _job(job_id)
+    if job.status not in (jobs.DONE, jobs.FAILED):
+        return JSONResponse(job.info(), status_code=409)
+    records = sorted(job.results, key=lambda r: r["index"])
+    tail = [{"summary": job.summary}] if job.summary is not None else []
+    return StreamingResponse(
+        iter([_ndjson(records + tail)]), media_type="application/x-ndjson"
+    )
 
 
 # ---- WebSocket endpoint ---------------------------------------------
 @app.websocket("/api/ws")
 async def websocket_endpoint(ws: WebSocket):
     await ws.accept()
+
+    async def _client_gone():
+        try:
+            while (await ws.receive())["type"] != "websocket.disconnect":
+                pass  # clients don't send anything meaningful mid-stream
+        except (WebSocketDisconnect, RuntimeError):
+            pass  # socket already closed
+
     try:
         query = ws.query_params.get("question")
         if not query:
             await ws.close(code=4000)
             return
 
-        async for chunk in _run_stream(query):
-            # strip the SSE framing so WS just gets JSON objects
-            if chunk.startswith("event: token"):
-                _, data_line, _ = chunk.splitlines()
-                await ws.send_text(data_line[6:])  # after "data: "
-            elif chunk.startswith("event: done"):
-                _, data_line, _ = chunk.splitlines()
-                await ws.send_text(data_line[6:])
+        try:
+            raw = ws.query_params.get("budget_ms")
+            budget_ms = budget.checked(raw) if raw else None
+        except ValueError:
+            await ws.close(code=4000, reason="budget_ms must be a positive number")
+            return
+        events = stream_answer(query, budget_ms)
+
+        # WS clients get the bare JSON objects (no SSE framing)
+        async for event, data in _until_client_gone(events, _client_gone):
+            await ws.send_text(json.dumps(data))
+            if event == "done":
                 await ws.close(code=1000)
     except WebSocketDisconnect:
         pass
@@ -2,20 +2,41 @@
 Web-search helper.  Uses Bing API when BING_API_KEY is set;
 otherwise returns deterministic mock docs so tests and
 offline usage still work.
+
+With SEARCH_HEDGE=1 and both keys present, a search starts on the primary
+provider and fires a backup request at the other one once the primary is
+slower than its own SEARCH_HEDGE_PERCENTILE latency; the first good
+answer wins and the loser is cancelled.
 """
 
-import os, asyncio, aiohttp
-from typing import List
-from langchain.schema import Document
+import os, asyncio, time
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Tuple
+from langchain_core.documents import Document
 from dotenv import load_dotenv
+from . import budget, evidence, resilience
 from .cache import cached
+from .http_pool import get_session
+from .observability import CANCELLED_WORK, HEDGE_REQUESTS, PROVIDER_LATENCY, span
 
 load_dotenv()  # load .env file if present
 
 BING_KEY = os.getenv("BING_API_KEY")
 SERPER_KEY = os.getenv("SERPER_API_KEY")
 
+# Overridable so benchmarks can point the providers at a local stub server
+BING_ENDPOINT = os.getenv("BING_ENDPOINT", "https://api.bing.microsoft.com/v7.0/search")
+SERPER_ENDPOINT = os.getenv("SERPER_ENDPOINT", "https://google.serper.dev/search")
+
 TIMEOUT_SECS = 1.0  # short because we retry/fallback quickly
+# the provider request always keeps this much of its timeout after the rate
+# limiter's wait; only a timeout it had at least this long for is its fault
+PROVIDER_MIN_SECS = 0.5
+
+HEDGE = os.getenv("SEARCH_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("SEARCH_HEDGE_PERCENTILE", "0.9"))
+HEDGE_DEFAULT_SECS = float(os.getenv("SEARCH_HEDGE_DELAY_MS", "300")) / 1000
+HEDGE_MIN_SAMPLES = 20  # below this the default delay is used
 
 # --- Mock fallback ----------------------------------------------------------
 MOCK_POOL = [
@@ -47,14 +68,17 @@ async def _mock_search(query: str) -> List[Document]:
 
 # --- Bing call ---------------------------------------------------------
 async def _bing_search(query: str) -> List[Document]:
-    url = "https://api.bing.microsoft.com/v7.0/search"
     headers = {"Ocp-Apim-Subscription-Key": BING_KEY}
     params = {"q": query, "count": 5}
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers, params=params, timeout=10) as resp:
-            if resp.status == 429:  # rate-limit
-                raise RuntimeError("HTTP 429 from Bing")
-            data = await resp.json()
+    session = get_session("bing")  # pooled keep-alive connections
+    async with session.get(
+        BING_ENDPOINT, headers=headers, params=params, timeout=10
+    ) as resp:
+        if resp.status == 429:  # rate-limit
+            raise resilience.RateLimited(
+                "HTTP 429 from Bing", resilience.parse_retry_after(resp.headers)
+            )
+        data = await resp.json()
     docs = []
     for item in data.get("webPages", {}).get("value", []):
         docs.append(
@@ -66,24 +90,162 @@ async def _bing_search(query: str) -> List[Document]:
     return docs
 
 
+# --- Provider selection & hedging -------------------------------------------
+SearchFn = Callable[[str], Awaitable[List[Document]]]
+Provider = Tuple[str, SearchFn]
+
+# recent successful latencies per provider (seconds), newest last
+_latency: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=256))
+
+
+def _providers() -> List[Provider]:
+    """Configured providers in preference order (looked up at call time)."""
+    out: List[Provider] = []
+    if BING_KEY:
+        out.append(("bing", _bing_search))
+    if SERPER_KEY:
+        out.append(("serper", _serper_search))
+    return out
+
+
+async def _call_provider(
+    provider: Provider, query: str, timeout: float
+) -> List[Document]:
+    """
+    One provider request behind its circuit breaker and rate limiter.
+    Successful latencies feed the hedge threshold and Prometheus.
+    """
+    name, fn = provider
+    with span("provider", **{"provider.name": name}):
+        return await _guarded_call(name, fn, query, timeout)
+
+
+def _provider_fault(e: Exception, left: float) -> bool:
+    """Should *e* count against the provider's circuit breaker?"""
+    if isinstance(e, resilience.ProviderUnavailable):
+        return False  # circuit open / rate-limited on our side
+    if isinstance(e, asyncio.TimeoutError):
+        return left >= PROVIDER_MIN_SECS  # a budget-shrunk timeout isn't
+    return True
+
+
+async def _guarded_call(
+    name: str, fn: SearchFn, query: str, timeout: float
+) -> List[Document]:
+    g = resilience.guard(name)
+    if not g.breaker.allow():
+        raise resilience.ProviderUnavailable(f"{name} circuit open")
+    t0 = time.perf_counter()
+    left = 0.0
+    try:
+        # our own throttling must not eat the request's time (ProviderUnavailable)
+        await g.limiter.acquire(max_wait=max(0.0, timeout - PROVIDER_MIN_SECS))
+        left = timeout - (time.perf_counter() - t0)
+        docs = await asyncio.wait_for(fn(query), left)
+    except Exception as e:  # timeouts, 429s, aiohttp.ClientError, bad bodies
+        if isinstance(e, resilience.RateLimited):
+            g.limiter.penalize(e.retry_after)
+        if _provider_fault(e, left):
+            g.breaker.record_failure()
+        raise
+    finally:
+        # cancelled (hedge loser / client gone) or anything else unrecorded:
+        # never leave a half-open probe outstanding
+        g.breaker.release()
+    g.breaker.record_success()
+    elapsed = time.perf_counter() - t0
+    _latency[name].append(elapsed)
+    PROVIDER_LATENCY.labels(name).observe(elapsed)
+    return docs
+
+
+def hedge_delay(name: str) -> float:
+    """Seconds to wait on *name* before firing a backup request."""
+    samples = sorted(_latency[name])
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_SECS
+    return samples[min(len(samples) - 1, int(HEDGE_PERCENTILE * len(samples)))]
+
+
+async def _hedged(
+    query: str, primary: Provider, backup: Provider, timeout: float
+) -> List[Document]:
+    """Primary first, backup after ``hedge_delay``; first success wins."""
+    deadline = time.monotonic() + timeout
+    first = asyncio.create_task(_call_provider(primary, query, timeout))
+    tasks = {first: primary[0]}
+    try:
+        done, _ = await asyncio.wait(
+            {first}, timeout=min(hedge_delay(primary[0]), timeout)
+        )
+        if first in done and first.exception() is None:
+            HEDGE_REQUESTS.labels("not_needed").inc()
+            return first.result()
+
+        HEDGE_REQUESTS.labels("fired").inc()
+        left = deadline - time.monotonic()
+        tasks[asyncio.create_task(_call_provider(backup, query, left))] = backup[0]
+        pending = {t for t in tasks if not t.done()}
+        error: BaseException = asyncio.TimeoutError()
+        for t in tasks.keys() - pending:
+            error = t.exception() or error
+        while pending:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=left, return_when=asyncio.FIRST_COMPLETED
+            )
+            for t in done:
+                if t.exception() is None:
+                    HEDGE_REQUESTS.labels(f"{tasks[t]}_won").inc()
+                    return t.result()
+                error = t.exception()  # type: ignore[assignment]
+        raise error
+    finally:
+        for t in tasks:
+            t.cancel()  # the loser (no-op for finished tasks)
+
+
+async def _search_providers(query: str, timeout: float) -> List[Document]:
+    # providers whose breaker is open sit this one out
+    providers = [p for p in _providers() if resilience.guard(p[0]).breaker.available()]
+    if not providers:
+        raise resilience.ProviderUnavailable("all provider circuits open")
+    if HEDGE and len(providers) > 1:
+        return await _hedged(query, providers[0], providers[1], timeout)
+    return await _call_provider(providers[0], query, timeout)
+
+
 # --- a non‑cached helper for tests / benchmarks -----------------------------
 async def _web_search_uncached(query: str, retries: int = 2) -> List[Document]:
-    """Single‑shot search -> Bing/Serper/mock, no Redis layer."""
+    """
+    Single‑shot search -> Bing/Serper/mock, no Redis layer.
+    Timeouts and retries shrink to fit the request's remaining budget.
+    """
     attempt = 0
     while True:
+        time_left = budget.search_time_left()
+        if time_left <= 0:
+            break  # synthesize's reserve is all that's left
+        timeout = min(TIMEOUT_SECS, time_left)
+        if not _providers():
+            break
         try:
-            if BING_KEY:
-                return await asyncio.wait_for(_bing_search(query), TIMEOUT_SECS)
-            if SERPER_KEY:
-                return await asyncio.wait_for(_serper_search(query), TIMEOUT_SECS)
-        except (asyncio.TimeoutError, RuntimeError) as e:
-            if attempt < retries and (
-                "429" in str(e) or isinstance(e, asyncio.TimeoutError)
+            return await _search_providers(query, timeout)
+        except Exception as e:
+            backoff = 0.2 * (attempt + 1)
+            if (
+                attempt < retries
+                and ("429" in str(e) or isinstance(e, asyncio.TimeoutError))
+                and budget.search_time_left() > backoff
             ):
                 attempt += 1
-                await asyncio.sleep(0.2 * attempt)
+                await asyncio.sleep(backoff)
                 continue
-        return await _mock_search(query)
+        break
+    # No key, retries / budget exhausted, or other error -> mock
+    return await _mock_search(query)
 
 
 # ------ NEW: real Google SERP via Serper.dev ---------------------------------
@@ -94,17 +256,20 @@ async def _serper_search(query: str) -> List[Document]:
     """
     if not SERPER_KEY:
         raise RuntimeError("No SERPER_API_KEY")
-    url = "https://google.serper.dev/search"
     headers = {"X-API-KEY": SERPER_KEY, "Content-Type": "application/json"}
     payload = {"q": query, "num": 5}
 
-    async with aiohttp.ClientSession() as sess:
-        async with sess.post(url, headers=headers, json=payload, timeout=10) as resp:
-            if resp.status == 429:
-                raise RuntimeError("HTTP 429 from Serper")
-            if resp.status != 200:
-                raise RuntimeError(f"Serper {resp.status}")
-            data = await resp.json()
+    sess = get_session("serper")
+    async with sess.post(
+        SERPER_ENDPOINT, headers=headers, json=payload, timeout=10
+    ) as resp:
+        if resp.status == 429:
+            raise resilience.RateLimited(
+                "HTTP 429 from Serper", resilience.parse_retry_after(resp.headers)
+            )
+        if resp.status != 200:
+            raise RuntimeError(f"Serper {resp.status}")
+        data = await resp.json()
 
     docs: List[Document] = []
     for item in data.get("organic", []):
@@ -118,27 +283,25 @@ async def _serper_search(query: str) -> List[Document]:
 
 
 # --- Public API -------------------------------------------------------------
-@cached(ttl=3600)  # 1-hour cache
+# cancel message for searches a streaming round no longer needs (see web_search)
+STRAGGLER = "search_straggler"
+
+
+# 1-hour cache; spellings that differ only in case / spacing and (with
+# SEMANTIC_CACHE=1) paraphrases share entries, the provider sees the query as written
+@cached(ttl=3600, semantic="web_search", normalize=evidence.query_key)
 async def web_search(query: str, retries: int = 2) -> List[Document]:
     """
     Try Bing first (if key present), else Serper.dev, both with:
-    • 1-second timeout wrapper
+    • 1-second timeout wrapper (less if the request budget is tighter)
     • up to `retries` retry attempts on HTTP 429 or timeout
     Fall back to deterministic mock docs when everything fails.
     """
-    attempt = 0
-    while True:
-        try:
-            if BING_KEY:
-                return await asyncio.wait_for(_bing_search(query), TIMEOUT_SECS)
-            if SERPER_KEY:
-                return await asyncio.wait_for(_serper_search(query), TIMEOUT_SECS)
-        except (asyncio.TimeoutError, RuntimeError) as e:
-            if attempt < retries and (
-                "429" in str(e) or isinstance(e, asyncio.TimeoutError)
-            ):
-                attempt += 1
-                await asyncio.sleep(0.2 * attempt)
-                continue
-        # No key, retries exhausted, or other error -> mock
-        return await _mock_search(query)
+    try:
+        return await _web_search_uncached(query, retries)
+    except asyncio.CancelledError as e:
+        # caller went away (client disconnect) – this provider call is saved;
+        # stragglers dropped on purpose by a streaming round count apart
+        straggler = e.args[:1] == (STRAGGLER,)
+        CANCELLED_WORK.labels(STRAGGLER if straggler else "provider_call").inc()
+        raise
@@ -3,11 +3,23 @@ Pytest bootstrap.
 
 * Prepends the project’s *src/* directory to ``sys.path`` so that a plain
   ``import agent`` works even when the user hasn’t set PYTHONPATH.
-* No fixtures are defined here – it is purely path‑setup.
+* Resets process-wide provider state (rate limiters, circuit breakers)
+  between tests, so one test's simulated outages can't leak into the next.
 """
 
 import sys, pathlib
 
+import pytest
+
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 SRC_DIR = ROOT / "src"
 sys.path.insert(0, str(SRC_DIR))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_provider_guards():
+    from agent import resilience
+
+    resilience.reset()
+    yield
+    resilience.reset()
@@ -0,0 +1,116 @@
+"""
+Whole-answer cache: repeats (in any casing / spacing) are served without
+running the graph, stale entries are served at once and refreshed in the
+background, and invalidation forces a fresh run.
+"""
+import asyncio
+
+from agent import answer_cache
+from agent import graph as g
+
+
+class _CountingGraph:
+    def __init__(self):
+        self.runs = 0
+
+    async def ainvoke(self, state):
+        self.runs += 1
+        return {"answer": f"run {self.runs}", "citations": [{"id": 1, "url": "u"}]}
+
+
+def test_fresh_hit_and_invalidate(monkeypatch):
+    graph = _CountingGraph()
+    monkeypatch.setattr(g, "_GRAPH", graph)
+
+    async def _run():
+        first = await g.answer_question("Answer cache: fresh?")
+        again = await g.answer_question("  answer CACHE:   fresh ")
+        dropped = await g.invalidate_answer("answer cache: fresh")
+        after = await g.answer_question("Answer cache: fresh?")
+        return first, again, dropped, after
+
+    first, again, dropped, after = asyncio.run(_run())
+    assert first["cached"] is False and again == {**first, "cached": True, "stale": False}
+    assert dropped and after["answer"] == "run 2" and graph.runs == 2
+
+
+def test_stale_served_then_refreshed(monkeypatch):
+    graph = _CountingGraph()
+    monkeypatch.setattr(g, "_GRAPH", graph)
+    monkeypatch.setattr(answer_cache, "FRESH_SECS", 0)
+
+    async def _run():
+        await g.answer_question("Answer cache: stale?")
+        stale = await g.answer_question("Answer cache: stale?")
+        await g.drain_refreshes()
+        entry, _ = await answer_cache.get("Answer cache: stale?")
+        return stale, entry
+
+    stale, entry = asyncio.run(_run())
+    assert stale["stale"] is True and stale["answer"] == "run 1"
+    assert entry["answer"] == "run 2" and graph.runs == 2
+
+
+def test_stream_served_from_cache():
+    async def _run():
+        first = [e async for e in g.stream_answer("Answer cache: stream?")]
+        second = [e async for e in g.stream_answer("Answer cache: stream?")]
+        return first, second
+
+    first, second = asyncio.run(_run())
+    assert first[-1][1]["cached"] is False
+    assert second[0] == ("progress", {"phase": "cache", "stale": False})
+    assert second[-1][1]["cached"] is True
+    assert second[-1][1]["answer"] == first[-1][1]["answer"]
+
+
+def test_llm_fallback_answers_are_not_cached(monkeypatch):
+    graph = _CountingGraph()
+    ainvoke = graph.ainvoke
+
+    async def fallback(state):
+        return {**await ainvoke(state), "cacheable": False}
+
+    monkeypatch.setattr(graph, "ainvoke", fallback)
+    monkeypatch.setattr(g, "_GRAPH", graph)
+
+    async def _run():
+        first = await g.answer_question("Answer cache: rate limited?")
+        again = await g.answer_question("Answer cache: rate limited?")
+        return first, again
+
+    first, again = asyncio.run(_run())
+    assert first["cached"] is again["cached"] is False
+    assert again["answer"] == "run 2" and graph.runs == 2
+
+
+def test_callers_cannot_mutate_cached_citations(monkeypatch):
+    monkeypatch.setattr(g, "_GRAPH", _CountingGraph())
+
+    async def _run():
+        first = await g.answer_question("Answer cache: mutate?")
+        first["citations"][0]["url"] = "tampered"
+        first["citations"].clear()
+        return await g.answer_question("Answer cache: mutate?")
+
+    again = asyncio.run(_run())
+    assert again["cached"] is True and again["citations"] == [{"id": 1, "url": "u"}]
+
+
+def test_invalidation_reaches_other_workers(monkeypatch):
+    import fakeredis.aioredis
+
+    from agent import cache
+
+    async def _run():
+        monkeypatch.setattr(cache, "_pool", fakeredis.aioredis.FakeRedis())
+        entry = answer_cache.make_entry({"answer": "old", "citations": []})
+        await answer_cache.put("Answer cache: shared?", entry)
+        before, _ = await answer_cache.get("Answer cache: shared?")
+        # another worker's DELETE /api/cache only touches Redis and its own L1
+        await cache._pool.delete(answer_cache.key_for("Answer cache: shared?"))
+        after, _ = await answer_cache.get("Answer cache: shared?")
+        return before, after
+
+    before, after = asyncio.run(_run())
+    assert before["answer"] == "old" and after is None
@@ -0,0 +1,169 @@
+"""
+Batch mode: questions run concurrently under the limit, every line gets a
+streamed JSONL record (bad lines an ``error``), and the summary reports
+throughput and latency percentiles.
+"""
+import asyncio
+import io
+import json
+
+from agent import batch
+
+LINES = [
+    '{"id": "a", "question": "first?"}',
+    '"second?"',
+    "not json",
+    "",
+    '{"question": "third?", "budget": 5}',
+    '{"question": "boom?"}',
+    '{"id": 7}',
+    '"fourth?"',
+]
+
+
+def test_bounded_concurrency_and_streamed_records(monkeypatch):
+    live = {"now": 0, "peak": 0}
+    budgets = {}
+
+    async def fake_answer(question, budget_ms=None, use_cache=True):
+        live["now"] += 1
+        live["peak"] = max(live["peak"], live["now"])
+        await asyncio.sleep(0.05)
+        live["now"] -= 1
+        if question == "boom?":
+            raise RuntimeError("provider exploded")
+        budgets[question] = budget_ms
+        return {"answer": question.upper(), "citations": [], "cached": question == "second?"}
+
+    monkeypatch.setattr(batch, "answer_question", fake_answer)
+    out = io.StringIO()
+    summary = asyncio.run(batch.run_batch(batch.parse_lines(LINES), out, concurrency=2))
+
+    records = {r["index"]: r for r in map(json.loads, out.getvalue().splitlines())}
+    assert sorted(records) == [0, 1, 2, 4, 5, 6, 7]
+    assert records[0]["id"] == "a" and records[0]["answer"] == "FIRST?"
+    assert "error" in records[2] and "error" in records[6]
+    assert records[5]["error"].startswith("RuntimeError")
+    assert budgets["third?"] == 5000 and budgets["first?"] is None
+    assert live["peak"] == 2
+
+    assert (summary["ok"], summary["errors"], summary["cached"]) == (4, 3, 1)
+    lat = summary["latency_ms"]
+    assert 50 <= lat["p50"] <= lat["p99"] <= lat["max"] < 200
+    assert summary["throughput_qps"] > 0
+
+
+def test_percentile_nearest_rank():
+    vals = [float(v) for v in range(1, 101)]
+    assert batch.percentile(vals, 50) == 50 and batch.percentile(vals, 99) == 99
+    assert batch.percentile([], 90) == 0.0
+
+
+def test_real_pipeline_batch():
+    out = io.StringIO()
+    src = io.StringIO('"Batch pipeline one?"\n"Batch pipeline two?"\n')
+    summary = asyncio.run(batch.main(src, concurrency=2, out=out))
+    answers = [json.loads(line)["answer"] for line in out.getvalue().splitlines()]
+    assert len(answers) == 2 and all(answers) and summary["ok"] == 2
+
+
+def test_normalised_duplicates_run_once(monkeypatch):
+    calls = []
+
+    async def fake_answer(question, budget_ms=None, use_cache=True):
+        calls.append(question)
+        await asyncio.sleep(0.02)
+        return {"answer": "raft", "citations": []}
+
+    monkeypatch.setattr(batch, "answer_question", fake_answer)
+    items = batch.parse_lines(['"What is Raft?"', '"what is  raft"', '"WHAT IS RAFT!"', '"Paxos?"'])
+    out = io.StringIO()
+    summary = asyncio.run(batch.run_batch(items, out, concurrency=4))
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert sorted(calls) == ["Paxos?", "What is Raft?"]
+    assert sum(r.get("deduplicated", False) for r in records) == 2
+    assert summary["ok"] == 4 and summary["deduplicated"] == 2
+
+
+def test_shared_subquery_searched_once(monkeypatch):
+    from agent import nodes, tools
+
+    subqueries = {
+        "Batch overlap one?": ["Batch Overlap Shared", "batch overlap only-one"],
+        "Batch overlap two?": ["batch overlap  shared", "batch overlap only-two"],
+    }
+    searched = []
+
+    async def fake_llm(prompt, node="llm", **kwargs):
+        if node == "generate":
+            return json.dumps(subqueries[kwargs["q"]])
+        return json.dumps({"need_more": False})
+
+    async def fake_provider(query, retries=2):
+        searched.append(query)
+        await asyncio.sleep(0.05)
+        return tools.MOCK_POOL[:1]
+
+    monkeypatch.setattr(nodes, "call_llm", fake_llm)
+    monkeypatch.setattr(tools, "_web_search_uncached", fake_provider)
+    items = batch.parse_lines(json.dumps(q) for q in subqueries)
+    summary = asyncio.run(batch.run_batch(items, io.StringIO(), concurrency=2))
+    assert summary["ok"] == 2
+    # one search per normalised sub-query, sent in a spelling the LLM wrote
+    assert len(searched) == 3
+    assert {"batch overlap only-one", "batch overlap only-two"} < set(searched)
+    assert set(searched) & {"Batch Overlap Shared", "batch overlap  shared"}
+
+
+def test_subqueries_sent_as_written(monkeypatch):
+    from agent import tools
+
+    searched = []
+
+    async def fake_provider(query, retries=2):
+        searched.append(query)
+        return tools.MOCK_POOL[:1]
+
+    monkeypatch.setattr(tools, "_web_search_uncached", fake_provider)
+
+    async def _run():
+        await tools.web_search('"Rust" OR Go  sub-query')
+        await tools.web_search('"rust" or go sub-query')  # same cache entry
+
+    asyncio.run(_run())
+    assert searched == ['"Rust" OR Go  sub-query']
+
+
+def test_slow_stdin_does_not_stall_questions_in_flight(monkeypatch):
+    import os, threading, time
+
+    async def fake_answer(question, budget_ms=None, use_cache=True):
+        return {"answer": question, "citations": []}
+
+    monkeypatch.setattr(batch, "answer_question", fake_answer)
+    read_fd, write_fd = os.pipe()
+
+    def producer():  # second line only after a long pause
+        with os.fdopen(write_fd, "w") as w:
+            w.write('"first?"\n')
+            w.flush()
+            time.sleep(0.5)
+            w.write('"second?"\n')
+
+    async def _run():
+        finished = {}
+        with os.fdopen(read_fd) as src:
+            t0 = time.perf_counter()
+            async for rec in batch.answer_stream(batch.read_items(src), concurrency=2):
+                finished[rec["question"]] = time.perf_counter() - t0
+        return finished
+
+    threading.Thread(target=producer, daemon=True).start()
+    finished = asyncio.run(_run())
+    assert finished["first?"] < 0.3 <= finished["second?"]
+
+
+def test_bad_line_budget_is_an_error_record():
+    items = dict(batch.parse_lines(['{"id": "x", "question": "q?", "budget": "inf"}', '{"question": "q?", "budget": "2"}']))
+    assert items[0] == {"id": "x", "error": items[0]["error"]} and "finite" in items[0]["error"]
+    assert items[1]["budget"] == 2.0
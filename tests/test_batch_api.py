@@ -0,0 +1,72 @@
+"""
+Bulk HTTP API: /api/batch streams NDJSON records then a summary, and the
+async job variant can be submitted, polled and fetched.
+"""
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from agent import batch
+from agent.server import app
+
+
+def _ndjson(text):
+    return [json.loads(line) for line in text.splitlines() if line]
+
+
+def test_batch_streams_ndjson_with_summary():
+    body = {"questions": ["API batch one?", {"id": "b", "question": "API batch two?"},
+                          "api batch one", {"nope": 1}], "concurrency": 2}
+    with TestClient(app) as client:
+        resp = client.post("/api/batch", json=body)
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = _ndjson(resp.text)
+    records, summary = lines[:-1], lines[-1]["summary"]
+    by_index = {r["index"]: r for r in records}
+    assert sorted(by_index) == [0, 1, 2, 3]
+    assert by_index[1]["id"] == "b" and by_index[1]["answer"]
+    assert by_index[2]["deduplicated"] and "error" in by_index[3]
+    assert (summary["ok"], summary["errors"], summary["deduplicated"]) == (3, 1, 1)
+
+
+def test_batch_size_limit(monkeypatch):
+    monkeypatch.setattr(batch, "MAX_QUESTIONS", 2)
+    with TestClient(app) as client:
+        resp = client.post("/api/batch", json={"questions": ["a?", "b?", "c?"]})
+    assert resp.status_code == 413
+
+
+def test_job_submit_poll_fetch():
+    with TestClient(app) as client:
+        resp = client.post("/api/jobs", json={"questions": ["Job one?", "Job two?"]})
+        assert resp.status_code == 202
+        job_id = resp.json()["job_id"]
+
+        deadline = time.time() + 10
+        while (info := client.get(f"/api/jobs/{job_id}").json())["status"] != "done":
+            assert time.time() < deadline
+            time.sleep(0.05)
+        assert info["completed"] == 2 and info["summary"]["ok"] == 2
+
+        lines = _ndjson(client.get(f"/api/jobs/{job_id}/results").text)
+        assert [r["index"] for r in lines[:-1]] == [0, 1]
+        assert lines[-1]["summary"]["questions"] == 2
+        assert client.get("/api/jobs/nope").status_code == 404
+
+
+def test_bad_budgets_are_rejected():
+    with TestClient(app) as client:
+        for bad in ("nan", "-5", "inf"):
+            resp = client.get("/api/stream", params={"question": "q?", "budget_ms": bad})
+            assert resp.status_code == 422, bad
+        for body in (
+            '{"questions": ["q?"], "budget_ms": Infinity}',
+            '{"questions": ["q?"], "budget_ms": -1}',
+            '{"questions": [{"question": "q?", "budget": "inf"}]}',
+            '{"questions": [{"question": "q?", "budget": 0}]}',
+        ):
+            headers = {"Content-Type": "application/json"}
+            for path in ("/api/batch", "/api/jobs"):
+                resp = client.post(path, content=body, headers=headers)
+                assert resp.status_code == 422, (path, body)
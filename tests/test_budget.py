@@ -0,0 +1,67 @@
+"""
+Latency budget: a slow provider must not push a bounded request past its
+deadline, and the reflect loop is skipped when there is no time for it.
+"""
+import asyncio, time
+
+from agent import answer_sync, budget, nodes, tools
+from agent import graph as g
+
+
+async def slow_search(_):
+    await asyncio.sleep(2)
+    return []
+
+
+def test_tight_budget_bounds_slow_provider(monkeypatch):
+    monkeypatch.setattr(tools, "BING_KEY", "fake")
+    monkeypatch.setattr(tools, "_bing_search", slow_search)
+    monkeypatch.setattr(budget, "SYNTH_RESERVE_SECS", 0.2)
+
+    t0 = time.perf_counter()
+    out = answer_sync("Budget test: slow provider?", budget_ms=600)
+    elapsed = time.perf_counter() - t0
+
+    # unbounded this is 1 s timeout ×3 + back-off ≈ 3.6 s
+    assert "answer" in out and elapsed < 1.0
+
+
+def test_no_extra_loop_when_budget_tight():
+    state = {"need_more": True, "iter": 0, "deadline": budget.deadline_for(500)}
+    assert g.route_after_reflect(state) == "synthesize"
+
+    state = {"need_more": True, "iter": 0, "deadline": budget.deadline_for(60_000)}
+    assert g.route_after_reflect(state) == "search"
+
+
+def test_reflect_skips_llm_without_time(monkeypatch):
+    async def boom(*_a, **_kw):
+        raise AssertionError("reflect LLM should not be called")
+
+    monkeypatch.setattr(nodes, "call_llm", boom)
+    state = {"question": "q", "queries": [], "docs": [], "iter": 0,
+             "deadline": budget.deadline_for(100)}
+    out = asyncio.run(nodes.reflect_node(state))
+    assert out["need_more"] is False and out["deadline"] == state["deadline"]
+
+
+def test_budgeted_callers_only_share_runs_that_fit(monkeypatch):
+    budgets = []
+
+    async def fake_compute(question, budget_ms):
+        budgets.append(budget_ms)
+        await asyncio.sleep(0.05)
+        return {"answer": "a", "citations": [], "ts": time.time()}
+
+    monkeypatch.setattr(g, "_compute", fake_compute)
+
+    async def _run():
+        return await asyncio.gather(
+            g.answer_question("Budget test: flights?", 1100, use_cache=False),
+            g.answer_question("Budget test: flights?", 1200, use_cache=False),
+            g.answer_question("Budget test: flights?", 60_000, use_cache=False),
+        )
+
+    asyncio.run(_run())
+    # 1100 / 1200 ms share one run on the 1000 ms budget; 60 s runs alone
+    assert sorted(budgets) == [1000, 60_000]
@@ -0,0 +1,67 @@
+"""
+Batched round: ``fn.many`` must send only misses to the provider, read
+L2 with one MGET and leave every computed value in Redis.
+"""
+import asyncio
+
+import fakeredis.aioredis
+
+from agent import cache
+
+
+def test_many_mget_and_pipelined_write(monkeypatch):
+    calls = []
+
+    @cache.cached(ttl=60)
+    async def provider(q):
+        calls.append(q)
+        return [q, len(q)]
+
+    async def _run():
+        r = fakeredis.aioredis.FakeRedis()
+        monkeypatch.setattr(cache, "_pool", r)
+        await r.set(cache._make_key(provider, ("warm",), {}), cache._maybe_encode(["w", 0]))
+
+        mgets = []
+        real_mget, real_pipeline = r.mget, r.pipeline
+
+        def spy_pipeline(*args, **kwargs):  # MGET is pipelined with the PTTLs
+            pipe = real_pipeline(*args, **kwargs)
+            pipe_mget = pipe.mget
+
+            def spy_mget(keys):
+                mgets.append(list(keys))
+                return pipe_mget(keys)
+
+            pipe.mget = spy_mget
+            return pipe
+
+        monkeypatch.setattr(r, "pipeline", spy_pipeline)
+        out = await provider.many(["warm", "a", "bb", "a"])
+        stored = await real_mget([cache._make_key(provider, (q,), {}) for q in ("a", "bb")])
+        return out, mgets, stored
+
+    out, mgets, stored = asyncio.run(_run())
+    assert out == [["w", 0], ["a", 1], ["bb", 2], ["a", 1]]
+    assert sorted(calls) == ["a", "bb"]  # warm key & duplicate not recomputed
+    assert len(mgets) == 1
+    assert all(v is not None for v in stored)
+
+
+def test_promoted_entry_expires_with_redis(monkeypatch):
+    async def _run():
+        r = fakeredis.aioredis.FakeRedis()
+        monkeypatch.setattr(cache, "_pool", r)
+        await r.set("short", cache._maybe_encode("v"), px=200)
+        await r.set("forever", cache._maybe_encode("w"))
+        assert await cache.lookup("short") == "v"
+        assert await cache._lookup_many(["forever"]) == ["w"]
+        await r.delete("short", "forever")
+        fresh = cache._l1.get("short"), cache._l1.get("forever")
+        await asyncio.sleep(0.25)
+        return fresh, cache._l1.get("short"), cache._l1.get("forever")
+
+    fresh, short, forever = asyncio.run(_run())
+    assert fresh == ("v", "w")
+    assert short is cache._MISS  # lived no longer than its 200 ms in Redis
+    assert forever == "w"  # no Redis expiry: the L1 TTL applies
@@ -0,0 +1,62 @@
+"""
+Binary cache format: round-trips with an explicit type tag, compresses
+large payloads, and still reads legacy JSON entries.
+"""
+import json
+
+from langchain_core.documents import Document
+
+from agent import cache
+
+
+def _docs(n, size=40):
+    return [
+        Document(
+            page_content=f"snippet {i} " + "x" * size,
+            metadata={"title": f"t{i}", "url": f"https://e/{i}"},
+        )
+        for i in range(n)
+    ]
+
+
+def test_roundtrip_docs_and_values():
+    docs = _docs(5)
+    out = cache._maybe_decode(cache._maybe_encode(docs))
+    assert [d.page_content for d in out] == [d.page_content for d in docs]
+    assert out[0].metadata == {"title": "t0", "url": "https://e/0"}
+
+    # looks like a docs payload, but the tag says "plain value"
+    lookalike = [{"content": "c", "url": "u"}]
+    assert cache._maybe_decode(cache._maybe_encode(lookalike)) == lookalike
+
+
+def test_large_payload_compressed():
+    docs = _docs(5, size=400)
+    raw = cache._maybe_encode(docs)
+    assert raw[4] != cache._CODEC_NONE
+    legacy = json.dumps([{"content": d.page_content} for d in docs])
+    assert len(raw) < len(legacy)
+    assert len(cache._maybe_decode(raw)) == 5
+
+
+def test_legacy_json_still_readable():
+    legacy = json.dumps([{"content": "c", "title": "t", "url": "u"}]).encode()
+    (doc,) = cache._maybe_decode(legacy)
+    assert doc.page_content == "c" and doc.metadata["url"] == "u"
+    assert cache._maybe_decode(b'{"a": 1}') == {"a": 1}
+
+
+def test_unknown_version_is_a_miss():
+    raw = cache._MAGIC + bytes((99, 0, 0)) + b"?"
+    assert cache._promote("k", raw) is cache._MISS
+
+
+def test_corrupt_or_truncated_entries_are_misses():
+    raw = cache._maybe_encode(_docs(5, size=400))
+    assert raw[4] != cache._CODEC_NONE
+    for codec in (cache._CODEC_ZLIB, cache._CODEC_ZSTD):
+        corrupt = raw[:4] + bytes((codec,)) + b"not a compressed body"
+        assert cache._promote("k", corrupt) is cache._MISS
+    assert cache._promote("k", raw[:-20]) is cache._MISS  # truncated body
+    assert cache._promote("k", cache._MAGIC + b"\x01") is cache._MISS  # short header
+    assert cache._promote("k", cache._MAGIC + bytes((1, 7, 0)) + b"\x90") is cache._MISS
@@ -0,0 +1,49 @@
+"""
+In-process L1 tier: the decorator must cache even without Redis, stay
+within its entry / byte limits, expire on TTL and report per-tier counters.
+"""
+import asyncio
+
+from prometheus_client import REGISTRY
+
+from agent import cache
+from agent.tools import MOCK_POOL
+
+
+def _metric(name, tier):
+    return REGISTRY.get_sample_value(name, {"tier": tier}) or 0.0
+
+
+def test_l1_hit_without_redis(monkeypatch):
+    monkeypatch.setattr(cache, "_REDIS_URL", None)
+    calls = []
+
+    @cache.cached(ttl=60)
+    async def lookup(q):
+        calls.append(q)
+        return [MOCK_POOL[0]]
+
+    hits0 = _metric("agent_cache_hits_total", "l1")
+    first = asyncio.run(lookup("l1-only"))
+    second = asyncio.run(lookup("l1-only"))
+
+    assert calls == ["l1-only"]  # second call served from L1
+    assert second[0] is first[0]  # decoded Document, no JSON round-trip
+    assert _metric("agent_cache_hits_total", "l1") == hits0 + 1
+
+
+def test_lru_limits_and_ttl(monkeypatch):
+    lru = cache._LRU(max_entries=2, max_bytes=10_000)
+    lru.set("a", "x", ttl=60)
+    lru.set("b", "y", ttl=60)
+    lru.get("a")  # a is now most-recently used
+    lru.set("c", "z", ttl=60)
+    assert lru.get("b") is cache._MISS and lru.get("a") == "x"
+
+    small = cache._LRU(max_entries=10, max_bytes=5)
+    small.set("a", "abc", ttl=60)
+    small.set("b", "abc", ttl=60)  # 6 bytes > 5 → oldest evicted
+    assert len(small) == 1 and small.bytes <= 5
+
+    lru.set("old", "v", ttl=-1)  # already expired
+    assert lru.get("old") is cache._MISS
@@ -0,0 +1,43 @@
+"""
+A disconnecting client must cancel the running graph: pending searches
+are abandoned (and counted) instead of running to completion.
+"""
+import asyncio, time
+
+from prometheus_client import REGISTRY
+
+from agent import tools
+from agent.graph import stream_answer
+from agent.server import _until_client_gone
+
+
+def _cancelled_provider_calls():
+    return REGISTRY.get_sample_value(
+        "agent_cancelled_work_total", {"kind": "provider_call"}
+    ) or 0.0
+
+
+def test_disconnect_cancels_pending_search(monkeypatch):
+    finished = []
+
+    async def slow_search(q):
+        await asyncio.sleep(5)
+        finished.append(q)
+        return []
+
+    monkeypatch.setattr(tools, "_mock_search", slow_search)
+    before = _cancelled_provider_calls()
+
+    async def client_gone():
+        await asyncio.sleep(0.1)
+
+    async def _run():
+        return [ev async for ev in _until_client_gone(stream_answer("Cancel me?"), client_gone)]
+
+    t0 = time.perf_counter()
+    events = asyncio.run(_run())
+
+    assert time.perf_counter() - t0 < 2
+    assert [e for e, _ in events] == ["progress"]  # only generate got through
+    assert finished == []
+    assert _cancelled_provider_calls() == before + 1
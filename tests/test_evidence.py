@@ -0,0 +1,54 @@
+"""
+Evidence accumulates across reflect loops: the second search issues only
+queries it hasn't run yet, keeps round-one docs, and reflect's prompt
+carries just the new docs plus the slots already filled.
+"""
+import asyncio
+import json
+
+from langchain_core.documents import Document
+
+from agent import nodes, policy
+
+
+def _doc(q):
+    return Document(
+        page_content=f"Findings about {q}: a distinct snippet on {q} only.",
+        metadata={"title": q, "url": f"https://example.com/{q}"},
+    )
+
+
+def test_second_loop_searches_and_reflects_on_delta(monkeypatch):
+    searched, prompts = [], []
+
+    async def fake_search(q):
+        searched.append(q)
+        return [_doc(q)]
+
+    async def fake_complete(prompt, **kwargs):
+        prompts.append(kwargs)
+        reply = {"slots": ["s"], "filled": ["alpha"], "need_more": True,
+                 "new_queries": ["Beta ", "gamma"]}
+        return json.dumps(reply), 1, False
+
+    monkeypatch.setattr(nodes, "web_search", fake_search)
+    monkeypatch.setattr(nodes, "_complete", fake_complete)
+    monkeypatch.setattr(policy, "MAX_ITER", 3)  # let the second reflect call the LLM
+
+    async def _run():
+        state = {"question": "alpha beta gamma", "queries": ["alpha", "beta"], "iter": 0}
+        state = await nodes.search_node(state)
+        state = await nodes.reflect_node(state)
+        state = await nodes.search_node(state)
+        await nodes.reflect_node(state)
+        return state
+
+    state = asyncio.run(_run())
+    assert searched == ["alpha", "beta", "gamma"]
+    assert len(state["evidence"]["docs"]) == 3 and len(state["docs"]) == 3
+    assert [d.metadata["title"] for d in state["new_docs"]] == ["gamma"]
+
+    first, second = prompts
+    assert "alpha" in first["ctx"] and "beta" in first["ctx"]
+    assert "gamma" in second["ctx"] and "alpha" not in second["ctx"]
+    assert json.loads(second["filled"]) == ["alpha"]
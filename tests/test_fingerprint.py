@@ -0,0 +1,54 @@
+"""
+SimHash near-duplicates: edited copies of a snippet land within the
+distance threshold, different stories don't, and a second search loop
+collapses repeats of evidence kept by the first.
+"""
+import asyncio
+
+from langchain_core.documents import Document
+from prometheus_client import REGISTRY
+
+from agent import evidence, fingerprint, nodes
+
+STORY = (
+    "Argentina won the 2022 World Cup final against France on penalties after "
+    "a 3-3 draw, with Lionel Messi scoring twice at the Lusail Stadium in Qatar."
+)
+BYLINE = "Reuters - " + STORY
+TRUNCATED = STORY.rsplit(" ", 4)[0] + " ..."
+OTHER = (
+    "France reached the 2022 World Cup final after beating Morocco 2-0 in the "
+    "semi-final, with goals from Theo Hernandez and Randal Kolo Muani."
+)
+
+
+def _doc(text, url):
+    return Document(page_content=text, metadata={"title": "", "url": url})
+
+
+def test_edited_copies_are_near():
+    fp = fingerprint.simhash(STORY)
+    assert fingerprint.distance(fp, fingerprint.simhash(BYLINE)) <= fingerprint.MAX_DISTANCE
+    assert fingerprint.distance(fp, fingerprint.simhash(TRUNCATED)) <= fingerprint.MAX_DISTANCE
+    assert fingerprint.distance(fp, fingerprint.simhash(OTHER)) > fingerprint.MAX_DISTANCE
+    fps = [fingerprint.simhash(t) for t in (STORY, OTHER, BYLINE, TRUNCATED)]
+    assert fingerprint.unique(fps) == [0, 1]
+
+
+def test_second_loop_collapses_earlier_evidence(monkeypatch):
+    async def fake_search(q):
+        return [_doc(BYLINE, "wire"), _doc(OTHER, "other")]
+
+    monkeypatch.setattr(nodes, "web_search", fake_search)
+    state = {
+        "question": "Who won the 2022 World Cup final?",
+        "queries": ["world cup final"],
+        "evidence": evidence.add(None, [_doc(STORY, "original")])[0],
+        "iter": 1,
+    }
+    sum0 = REGISTRY.get_sample_value("agent_dedup_ratio_sum") or 0.0
+    out = asyncio.run(nodes.search_node(state))
+    urls = [d.metadata["url"] for d in out["docs"]]
+    assert sorted(urls) == ["original", "other"]
+    assert out["new_docs"] == [_doc(OTHER, "other")]
+    assert REGISTRY.get_sample_value("agent_dedup_ratio_sum") == sum0 + 0.5
@@ -0,0 +1,57 @@
+"""
+Hedged search with local stub providers: a slow primary gets a backup
+request after the hedge delay, the fast answer wins and the loser is
+cancelled; a fast primary never triggers the backup.
+"""
+import asyncio, time
+
+from langchain_core.documents import Document
+
+from agent import tools
+
+
+def _stub(name, delay, log):
+    async def _search(q):
+        log.append(f"{name}:start")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log.append(f"{name}:cancelled")
+            raise
+        return [Document(page_content=name, metadata={"title": name, "url": name})]
+
+    return _search
+
+
+def _setup(monkeypatch, bing_delay, serper_delay):
+    log = []
+    monkeypatch.setattr(tools, "HEDGE", True)
+    monkeypatch.setattr(tools, "HEDGE_DEFAULT_SECS", 0.05)
+    monkeypatch.setattr(tools, "BING_KEY", "fake")
+    monkeypatch.setattr(tools, "SERPER_KEY", "fake")
+    monkeypatch.setattr(tools, "_bing_search", _stub("bing", bing_delay, log))
+    monkeypatch.setattr(tools, "_serper_search", _stub("serper", serper_delay, log))
+    monkeypatch.setattr(tools, "_latency", tools.defaultdict(lambda: tools.deque(maxlen=256)))
+    return log
+
+
+def test_slow_primary_is_hedged(monkeypatch):
+    log = _setup(monkeypatch, bing_delay=0.8, serper_delay=0.02)
+    t0 = time.perf_counter()
+    docs = asyncio.run(tools._web_search_uncached("hedge me"))
+    assert docs[0].page_content == "serper"
+    assert time.perf_counter() - t0 < 0.4
+    assert "bing:cancelled" in log
+
+
+def test_fast_primary_not_hedged(monkeypatch):
+    log = _setup(monkeypatch, bing_delay=0.01, serper_delay=0.01)
+    docs = asyncio.run(tools._web_search_uncached("no hedge"))
+    assert docs[0].page_content == "bing" and log == ["bing:start"]
+
+
+def test_hedge_delay_tracks_latency_percentile(monkeypatch):
+    _setup(monkeypatch, 0, 0)
+    assert tools.hedge_delay("bing") == 0.05  # too few samples → default
+    tools._latency["bing"].extend(i / 100 for i in range(1, 101))  # 10 ms … 1 s
+    assert abs(tools.hedge_delay("bing") - tools.HEDGE_PERCENTILE) < 0.02
@@ -0,0 +1,65 @@
+"""
+The provider HTTP layer must hand out *one* session per provider and loop,
+and ``close_sessions`` must release it.
+"""
+import asyncio
+
+from agent import http_pool
+
+
+def test_session_reused_and_closed():
+    async def _run():
+        a = http_pool.get_session("bing")
+        b = http_pool.get_session("bing")
+        other = http_pool.get_session("serper")
+        assert a is b and a is not other
+        await http_pool.close_sessions()
+        return a, other
+
+    a, other = asyncio.run(_run())
+    assert a.closed and other.closed
+
+
+def test_new_loop_gets_new_session():
+    async def _get():
+        sess = http_pool.get_session("bing")
+        await http_pool.close_sessions()
+        return sess
+
+    assert asyncio.run(_get()) is not asyncio.run(_get())
+
+
+def test_replaced_session_is_released():
+    import gc, warnings
+
+    from aiohttp import web
+
+    async def hello(_request):
+        return web.Response(text="hi")
+
+    async def _first():  # leaves a pooled keep-alive connection behind
+        app = web.Application()
+        app.router.add_get("/", hello)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        sess = http_pool.get_session("bing")
+        async with sess.get(f"http://127.0.0.1:{runner.addresses[0][1]}/") as resp:
+            await resp.text()
+        await runner.cleanup()
+        return sess
+
+    async def _second():
+        sess = http_pool.get_session("bing")
+        await http_pool.close_sessions()
+        return sess
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        old = asyncio.run(_first())
+        new = asyncio.run(_second())
+        assert new is not old and old.closed
+        del old
+        gc.collect()
+    assert not [w for w in caught if "Unclosed" in str(w.message)]
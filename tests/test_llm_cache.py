@@ -0,0 +1,58 @@
+"""
+LLM completion cache: identical rendered prompts are answered once per
+node TTL, hits are counted with the tokens they saved, fallbacks are
+never cached and a node TTL of 0 opts out.
+"""
+import asyncio
+
+from langchain_core.prompts import ChatPromptTemplate
+from prometheus_client import REGISTRY
+
+from agent import nodes
+
+TMPL = ChatPromptTemplate.from_messages([("user", "Say hi to {q}")])
+
+
+def _patch_complete(monkeypatch, cacheable=True):
+    calls = []
+
+    async def fake_complete(prompt, **kwargs):
+        calls.append(kwargs["q"])
+        return f"hi {kwargs['q']}", 42, cacheable
+
+    monkeypatch.setattr(nodes, "_complete", fake_complete)
+    return calls
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_repeat_prompt_hits_cache(monkeypatch):
+    calls = _patch_complete(monkeypatch)
+    saved0 = _sample("agent_llm_tokens_saved_total", node="generate")
+    hits0 = _sample("agent_llm_cache_requests_total", node="generate", result="hit")
+
+    async def _run():
+        return [await nodes.call_llm(TMPL, "generate", q="llm-cache") for _ in range(3)]
+
+    assert asyncio.run(_run()) == ["hi llm-cache"] * 3
+    assert calls == ["llm-cache"]
+    assert _sample("agent_llm_cache_requests_total", node="generate", result="hit") == hits0 + 2
+    assert _sample("agent_llm_tokens_saved_total", node="generate") == saved0 + 84
+
+
+def test_fallback_not_cached_and_opt_out(monkeypatch):
+    calls = _patch_complete(monkeypatch, cacheable=False)
+
+    async def _twice(node, q):
+        await nodes.call_llm(TMPL, node, q=q)
+        await nodes.call_llm(TMPL, node, q=q)
+
+    asyncio.run(_twice("reflect", "fallback"))
+    assert calls == ["fallback", "fallback"]
+
+    calls = _patch_complete(monkeypatch)
+    monkeypatch.setitem(nodes.LLM_CACHE_TTL, "generate", 0)
+    asyncio.run(_twice("generate", "opt-out"))
+    assert calls == ["opt-out", "opt-out"]
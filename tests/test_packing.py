@@ -0,0 +1,104 @@
+"""
+Evidence packing: docs are taken whole in relevance order while they fit,
+the first one that doesn't is cut at a sentence boundary, token counts
+are memoised, and synthesize cites exactly the docs it packed.
+"""
+import asyncio
+
+from langchain_core.documents import Document
+
+from agent import nodes, packing
+
+
+def _doc(text, url):
+    return Document(page_content=text, metadata={"title": url, "url": url})
+
+
+SHORT = _doc("Raft is a consensus algorithm.", "a")
+LONG = _doc(
+    "Leaders are elected by majority vote. Followers time out and start elections. "
+    "Log entries are replicated to every follower before they are committed.",
+    "b",
+)
+
+
+def test_whole_docs_then_sentence_boundary():
+    tokens = packing.count_tokens
+    budget = tokens(SHORT.page_content) + tokens("Leaders are elected by majority vote.") + 10
+    packed = packing.pack([SHORT, LONG], budget)
+    assert [d.metadata["url"] for d, _ in packed] == ["a", "b"]
+    assert packed[0][1] == SHORT.page_content
+    assert packed[1][1] == "Leaders are elected by majority vote."
+    assert packing.pack([LONG, SHORT], 2) == []
+
+
+def test_counts_are_memoised():
+    packing.pack([LONG], 10_000)
+    hits = packing.count_tokens.cache_info().hits
+    packing.pack([LONG], 10_000)
+    assert packing.count_tokens.cache_info().hits > hits
+
+
+def test_synthesize_cites_packed_docs(monkeypatch):
+    monkeypatch.setattr(nodes, "get_stream_writer", lambda: lambda _chunk: None)
+    monkeypatch.setitem(packing.BUDGETS, "synthesize", packing.count_tokens(SHORT.page_content) + 6)
+    state = {"question": "What is Raft?", "docs": [SHORT, LONG]}
+    out = asyncio.run(nodes.synthesize_node(state))
+    assert [c["url"] for c in out["citations"]] == ["a"]
+
+
+def test_unpackable_top_doc_is_cut_to_budget(monkeypatch):
+    monkeypatch.setattr(nodes, "get_stream_writer", lambda: lambda _chunk: None)
+    monkeypatch.setitem(packing.BUDGETS, "synthesize", 10)
+    run_on = _doc("word " * 200 + "and no sentence end anywhere", "c")
+    seen = {}
+
+    async def fake_stream(prompt, node="llm", meta=None, **kwargs):
+        seen["evidence"] = kwargs["e"]
+        yield "ok"
+
+    monkeypatch.setattr(nodes, "call_llm_stream", fake_stream)
+    out = asyncio.run(nodes.synthesize_node({"question": "q?", "docs": [run_on]}))
+    assert [c["url"] for c in out["citations"]] == ["c"]
+    text = seen["evidence"].removeprefix("[1] ")
+    assert run_on.page_content.startswith(text)
+    assert 0 < packing.count_tokens(text) <= 10 - packing.OVERHEAD
+
+
+def test_encoder_loads_in_background(monkeypatch):
+    import threading, time
+
+    release = threading.Event()
+    enc = type("Enc", (), {"encode_ordinary": lambda self, text: text.split()})()
+
+    def slow_load():
+        release.wait(5)
+        return enc
+
+    monkeypatch.setattr(packing, "TIKTOKEN", True)
+    monkeypatch.setattr(packing, "_get_encoding", slow_load)
+    monkeypatch.setattr(packing, "_enc", None)
+    monkeypatch.setattr(packing, "_failed_at", -float("inf"))
+    packing.count_tokens.cache_clear()
+    text = "one two three four five six seven eight"
+    try:
+        t0 = time.perf_counter()
+        assert packing.count_tokens(text) == packing._approx(text)  # estimate, no wait
+        assert time.perf_counter() - t0 < 0.1
+        release.set()
+        packing._loader.join(1)
+        assert packing.count_tokens(text) == 8  # the encoding once it's there
+    finally:
+        release.set()
+        packing.count_tokens.cache_clear()
+
+
+def test_tiktoken_is_opt_in(monkeypatch):
+    def no_network():
+        raise AssertionError("tiktoken must not load by default")
+
+    monkeypatch.setattr(packing, "_get_encoding", no_network)
+    monkeypatch.setattr(packing, "_enc", None)
+    assert not packing.TIKTOKEN
+    packing.preload()
+    assert packing._encoding() is None
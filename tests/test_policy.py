@@ -0,0 +1,62 @@
+"""
+Loop policy: the adaptive policy skips reflect on confident evidence and
+stops on filled slots or a stale follow-up round; the real pipeline loops
+exactly once when reflect asks for more.
+"""
+import asyncio
+import json
+
+from langchain_core.documents import Document
+
+from agent import nodes, policy
+from agent import graph as g
+
+
+def _docs(*texts):
+    return [Document(page_content=t, metadata={"url": f"u{i}"}) for i, t in enumerate(texts)]
+
+
+def test_adaptive_skips_reflect_on_confident_evidence():
+    adaptive, llm = policy.AdaptivePolicy(), policy.LLMPolicy()
+    many = {"question": "raft leader election", "iter": 0,
+            "docs": _docs(*(f"raft leader election detail {i}" for i in range(5)))}
+    few = {**many, "docs": many["docs"][:2]}
+    assert adaptive.skip_reflect(many) and not adaptive.skip_reflect(few)
+    assert not llm.skip_reflect(many)
+    assert llm.skip_reflect({**many, "iter": policy.MAX_ITER - 1})  # no round could follow
+
+
+def test_adaptive_stops_on_full_slots_or_stale_round(monkeypatch):
+    monkeypatch.setattr(policy, "MAX_ITER", 3)
+    adaptive = policy.AdaptivePolicy()
+    state = {"need_more": True, "slots": ["a", "b"], "filled": ["a"], "novelty": 1.0}
+    assert adaptive.another_round(state, 1)
+    assert not adaptive.another_round({**state, "filled": ["a", "b"]}, 1)
+    stale = {**state, "novelty": 0.1}
+    assert adaptive.another_round(stale, 1)  # first round: nothing was known yet
+    assert not adaptive.another_round(stale, 2)
+    assert policy.LLMPolicy().another_round(stale, 2)
+
+
+def test_pipeline_loops_once_when_reflect_wants_more(monkeypatch):
+    calls = {"reflect": 0, "search": []}
+
+    async def fake_llm(prompt, node="llm", **kwargs):
+        if node == "generate":
+            return json.dumps(["first"])
+        calls["reflect"] += 1
+        return json.dumps({"slots": ["x", "y"], "filled": ["x"],
+                           "need_more": True, "new_queries": ["second"]})
+
+    async def fake_search(q):
+        calls["search"].append(q)
+        return _docs(f"{q} result about the loop policy")
+
+    monkeypatch.setattr(policy, "_policy", policy.LLMPolicy())
+    monkeypatch.setattr(policy, "MAX_ITER", 2)
+    monkeypatch.setattr(nodes, "call_llm", fake_llm)
+    monkeypatch.setattr(nodes, "web_search", fake_search)
+    out = asyncio.run(g.answer_question("Does the loop policy loop?", use_cache=False))
+    assert "answer" in out
+    assert calls["search"] == ["first", "second"]
+    assert calls["reflect"] == 1  # the capped second reflect skips its LLM call
@@ -0,0 +1,53 @@
+"""
+Re-ranking: relevant snippets move ahead of provider order, repeats of
+the same snippet under another URL are dropped and only top-k survive.
+"""
+import asyncio
+
+from langchain_core.documents import Document
+from prometheus_client import REGISTRY
+
+from agent import nodes, rank
+
+
+def _doc(text, url):
+    return Document(page_content=text, metadata={"title": "", "url": url})
+
+
+OFF_TOPIC = _doc("Recipes for a quick weeknight pasta with garlic and olive oil.", "u0")
+ON_TOPIC = _doc("Raft elects a leader and replicates a log across the consensus cluster.", "u1")
+REPEAT = _doc("Raft elects a leader and replicates a log across the consensus cluster!", "u2")
+PARTIAL = _doc("Paxos and Raft are consensus algorithms.", "u3")
+
+
+def test_bm25_orders_and_drops_repeats():
+    ranked = rank.rerank("How does Raft consensus elect a leader?", [OFF_TOPIC, ON_TOPIC, REPEAT, PARTIAL])
+    assert [d.metadata["url"] for d in ranked] == ["u1", "u3", "u0"]
+    assert rank.rerank("raft leader", [OFF_TOPIC, ON_TOPIC, PARTIAL], top_k=1) == [ON_TOPIC]
+
+
+def test_search_node_keeps_ranked_top_k(monkeypatch):
+    async def fake_search(q):
+        return [OFF_TOPIC, REPEAT, ON_TOPIC, PARTIAL] + [
+            _doc(f"Filler snippet number {i} about nothing.", f"f{i}") for i in range(6)
+        ]
+
+    monkeypatch.setattr(nodes, "web_search", fake_search)
+    state = {"question": "raft leader election", "queries": ["raft"], "iter": 0}
+    out = asyncio.run(nodes.search_node(state))
+    assert len(out["docs"]) == rank.TOP_K
+    assert out["docs"][0].metadata["url"] in ("u1", "u2")
+    assert {"u1", "u2"} - {d.metadata["url"] for d in out["docs"]}  # one repeat dropped
+
+
+def test_search_round_scores_once(monkeypatch):
+    async def fake_search(q):
+        return [OFF_TOPIC, ON_TOPIC, PARTIAL]
+
+    monkeypatch.setattr(nodes, "web_search", fake_search)
+    samples = lambda: REGISTRY.get_sample_value("agent_rerank_seconds_count") or 0.0
+    before = samples()
+    state = {"question": "raft leader election", "queries": ["raft"], "iter": 0}
+    out = asyncio.run(nodes.search_node(state))
+    assert samples() == before + 1
+    assert out["docs"] == rank.rerank(state["question"], [OFF_TOPIC, ON_TOPIC, PARTIAL])
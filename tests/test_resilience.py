@@ -0,0 +1,127 @@
+"""
+Per-provider protection: the token bucket paces callers and honours
+Retry-After; the circuit breaker opens after repeated failures, skips
+the provider during its cooldown and half-opens to probe it.
+"""
+import asyncio, time
+
+from agent import resilience, tools
+from agent.resilience import CLOSED, HALF_OPEN, OPEN
+
+
+def test_token_bucket_paces_and_honours_retry_after():
+    bucket = resilience.TokenBucket("t", rate=20, burst=2)
+
+    async def _run():
+        t0 = time.perf_counter()
+        await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+        paced = time.perf_counter() - t0  # 2 burst + 2 × 50 ms
+
+        bucket.penalize(0.2)
+        t0 = time.perf_counter()
+        await bucket.acquire()
+        return paced, time.perf_counter() - t0
+
+    paced, blocked = asyncio.run(_run())
+    assert 0.08 <= paced < 0.3
+    assert blocked >= 0.19
+
+
+def test_limiter_refuses_waits_longer_than_allowed():
+    bucket = resilience.TokenBucket("w", rate=1, burst=1)
+
+    async def _run():
+        await bucket.acquire()
+        await bucket.acquire(max_wait=0.1)  # next token is ~1 s away
+
+    try:
+        asyncio.run(_run())
+    except resilience.ProviderUnavailable:
+        return
+    raise AssertionError("expected ProviderUnavailable")
+
+
+def test_retry_after_header_parsing():
+    assert resilience.parse_retry_after({"Retry-After": "3"}) == 3.0
+    assert resilience.parse_retry_after({}) is None
+    assert resilience.parse_retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0.0
+
+
+def test_breaker_opens_skips_and_probes(monkeypatch):
+    calls = []
+
+    async def failing_bing(q):
+        calls.append(q)
+        raise RuntimeError("Bing 500")
+
+    monkeypatch.setattr(tools, "BING_KEY", "fake")
+    monkeypatch.setattr(tools, "_bing_search", failing_bing)
+    monkeypatch.setattr(resilience, "BREAKER_FAILURES", 2)
+    monkeypatch.setattr(resilience, "BREAKER_COOLDOWN_SECS", 30)
+
+    for i in range(4):  # 2 failures open the circuit, then it's skipped
+        asyncio.run(tools._web_search_uncached(f"q{i}"))
+    breaker = resilience.guard("bing").breaker
+    assert len(calls) == 2 and breaker.state == OPEN
+
+    breaker.opened_at -= 30  # cooldown over → next call is the half-open probe
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_connection_error_on_probe_reopens_the_breaker(monkeypatch):
+    import aiohttp
+
+    async def refused_bing(q):
+        raise aiohttp.ClientConnectionError("connection refused")
+
+    monkeypatch.setattr(tools, "BING_KEY", "fake")
+    monkeypatch.setattr(tools, "_bing_search", refused_bing)
+    monkeypatch.setattr(resilience, "BREAKER_FAILURES", 2)
+    monkeypatch.setattr(resilience, "BREAKER_COOLDOWN_SECS", 30)
+
+    for i in range(2):  # client errors count toward opening the circuit
+        asyncio.run(tools._web_search_uncached(f"q{i}"))
+    breaker = resilience.guard("bing").breaker
+    assert breaker.state == OPEN
+
+    breaker.opened_at -= 30  # the probe fails too: back to OPEN, not stuck
+    asyncio.run(tools._web_search_uncached("probe"))
+    assert breaker.state == OPEN and not breaker.probing
+    breaker.opened_at -= 30
+    assert breaker.available()
+
+
+def test_own_throttling_never_trips_the_breaker(monkeypatch):
+    async def healthy_bing(q):
+        await asyncio.sleep(0.01)
+        return []
+
+    monkeypatch.setenv("BING_RPS", "2")
+    monkeypatch.setenv("BING_BURST", "1")
+    monkeypatch.setattr(tools, "_bing_search", healthy_bing)
+
+    async def _run():
+        calls = [tools._guarded_call("bing", healthy_bing, f"q{i}", 1.0) for i in range(6)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(_run())
+    assert [type(r).__name__ for r in results[:2]] == ["list", "list"]
+    assert all(isinstance(r, resilience.ProviderUnavailable) for r in results[2:])
+    breaker = resilience.guard("bing").breaker
+    assert breaker.failures == 0 and breaker.state == CLOSED
+
+    async def _too_short():  # budget-shrunk timeout: not the provider's fault
+        async def slow(q):
+            await asyncio.sleep(1)
+
+        await tools._guarded_call("bing", slow, "late", 0.05)
+
+    resilience.reset()  # fresh bucket
+    try:
+        asyncio.run(_too_short())
+    except asyncio.TimeoutError:
+        pass
+    assert resilience.guard("bing").breaker.failures == 0
@@ -0,0 +1,94 @@
+"""
+Telemetry sampling: head ratio sampling, with un-sampled traces rescued
+by the tail stage when slow or failed; server mode mutes the console
+exporter; an unreachable collector is skipped without attaching.
+"""
+import time
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from agent import observability as obs
+
+obs.init()  # builds the console switch
+
+
+def _pipeline(ratio, latency=0.05):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(sampler=obs._HeadSampler(ratio, record_unsampled=True))
+    provider.add_span_processor(
+        obs._TailSampler(SimpleSpanProcessor(exporter), latency, errors=True)
+    )
+    return provider.get_tracer("test"), exporter
+
+
+def _names(exporter):
+    return sorted(s.name for s in exporter.get_finished_spans())
+
+
+def test_unsampled_fast_trace_is_dropped():
+    tracer, exporter = _pipeline(0.0)
+    with tracer.start_as_current_span("root"):
+        with tracer.start_as_current_span("child"):
+            pass
+    assert _names(exporter) == []
+
+
+def test_slow_and_failed_traces_are_rescued():
+    tracer, exporter = _pipeline(0.0)
+    with tracer.start_as_current_span("slow"):
+        with tracer.start_as_current_span("slow-child"):
+            time.sleep(0.06)
+    with tracer.start_as_current_span("failed"):
+        with tracer.start_as_current_span("failed-child") as s:
+            s.set_status(Status(StatusCode.ERROR))
+    assert _names(exporter) == ["failed", "failed-child", "slow", "slow-child"]
+    assert all(s.context.trace_flags.sampled for s in exporter.get_finished_spans())
+
+
+def test_rescued_spans_keep_their_attributes():
+    tracer, exporter = _pipeline(0.0)
+    with tracer.start_as_current_span("slow", attributes={"agent.iteration": 1}):
+        with tracer.start_as_current_span("provider", attributes={"provider.name": "bing"}):
+            time.sleep(0.06)
+    attrs = {s.name: dict(s.attributes) for s in exporter.get_finished_spans()}
+    assert attrs == {"slow": {"agent.iteration": 1}, "provider": {"provider.name": "bing"}}
+
+
+def test_head_sampled_traces_pass_straight_through():
+    tracer, exporter = _pipeline(1.0)
+    with tracer.start_as_current_span("root"):
+        with tracer.start_as_current_span("child"):
+            pass
+    assert _names(exporter) == ["child", "root"]
+
+
+def test_server_mode_mutes_console(monkeypatch):
+    monkeypatch.delenv("OTEL_CONSOLE_EXPORTER", raising=False)
+    monkeypatch.setattr(obs, "_server_mode", False)
+    monkeypatch.setattr(obs._console, "enabled", True)
+    monkeypatch.setattr(obs, "start_metrics_server", lambda: None)
+    obs.use_server_mode()
+    assert obs._console.enabled is False
+
+    monkeypatch.setenv("OTEL_CONSOLE_EXPORTER", "1")
+    obs.use_server_mode()
+    assert obs._console.enabled is True
+
+
+def test_unreachable_collector_is_skipped(capsys):
+    before = len(obs._exporters._span_processors)
+    obs._attach_otlp("http://collector.invalid:4318")
+    assert len(obs._exporters._span_processors) == before
+    assert "collector unreachable" in capsys.readouterr().err
+
+
+def test_resolvable_collector_is_attached(monkeypatch):
+    monkeypatch.setattr(obs._exporters, "_span_processors", obs._exporters._span_processors)
+    before = len(obs._exporters._span_processors)
+    obs._attach_otlp("http://localhost:4318/v1/traces")
+    added = obs._exporters._span_processors[before:]
+    assert len(added) == 1
+    added[0].shutdown()
@@ -0,0 +1,86 @@
+"""
+Semantic cache: paraphrases land above the threshold and different
+subjects below it, the index survives a save/load round-trip, and both
+the search decorator and the answer cache reuse a paraphrase's entry.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from agent import cache, semantic
+from agent import graph as g
+
+
+@pytest.fixture
+def semantic_on(monkeypatch):
+    monkeypatch.setattr(semantic, "ENABLED", True)
+    semantic.reset()
+    yield
+    semantic.reset()
+
+
+def _sim(a, b):
+    return float(semantic.embed(a) @ semantic.embed(b))
+
+
+def test_paraphrase_vs_other_subject():
+    assert _sim("How does garbage collection work?", "how garbage collection works") >= semantic.THRESHOLD
+    assert _sim("What's webassembly", "What is WebAssembly?") >= semantic.THRESHOLD
+    assert _sim("Who invented the telephone?", "Who invented the radio?") < semantic.THRESHOLD
+    assert _sim("Who invented the telephone?", "What is the telephone?") < semantic.THRESHOLD
+
+
+def test_index_ring_and_persistence(semantic_on, tmp_path):
+    idx = semantic.Index(max_entries=2)
+    for text in ("rust ownership rules", "redis streams", "python generators"):
+        idx.add(text)
+    assert len(idx) == 2 and idx.nearest("rust ownership rules")[0] != "rust ownership rules"
+
+    semantic.remember("q", "how do vaccines work")
+    path = tmp_path / "index.npz"
+    semantic.save(str(path))
+    semantic.reset()
+    semantic.load(str(path))
+    vecs, texts = semantic.index("q").arrays()
+    assert list(texts) == ["how do vaccines work"]
+    assert np.allclose(vecs[0], semantic.embed("how do vaccines work"))
+    assert semantic.nearest("q", "How do vaccines work??") == "how do vaccines work"
+
+
+def test_cached_decorator_reuses_paraphrase(semantic_on):
+    calls = []
+
+    @cache.cached(ttl=60, semantic="probe")
+    async def search(q):
+        calls.append(q)
+        return [q]
+
+    async def _run():
+        first = await search("how does tcp congestion control work")
+        para = await search("How does TCP congestion control work?")
+        batch = await search.many(["tcp congestion control, how does it work", "bloom filter"])
+        return first, para, batch
+
+    first, para, batch = asyncio.run(_run())
+    assert first == para == batch[0] == ["how does tcp congestion control work"]
+    assert calls == ["how does tcp congestion control work", "bloom filter"]
+
+
+def test_answer_cache_serves_paraphrase(semantic_on, monkeypatch):
+    runs = []
+
+    class _Graph:
+        async def ainvoke(self, state):
+            runs.append(state["question"])
+            return {"answer": "fusion", "citations": []}
+
+    monkeypatch.setattr(g, "_GRAPH", _Graph())
+
+    async def _run():
+        await g.answer_question("Semantic probe: how does nuclear fusion work?")
+        return await g.answer_question("semantic probe - how nuclear fusion works")
+
+    again = asyncio.run(_run())
+    assert again["cached"] is True and again["answer"] == "fusion"
+    assert len(runs) == 1
@@ -0,0 +1,72 @@
+"""
+Stampede protection: concurrent identical misses must reach the provider
+once – within one process via a shared task, across workers via the
+Redis fill lease – and identical questions must run the graph once.
+"""
+import asyncio
+
+import fakeredis.aioredis
+
+from agent import cache
+from agent import graph as g
+
+
+def test_concurrent_misses_share_one_call(monkeypatch):
+    monkeypatch.setattr(cache, "_REDIS_URL", None)
+    calls = []
+
+    @cache.cached(ttl=60)
+    async def slow(q):
+        calls.append(q)
+        await asyncio.sleep(0.05)
+        return q.upper()
+
+    async def _run():
+        return await asyncio.gather(*(slow("stampede") for _ in range(10)))
+
+    assert asyncio.run(_run()) == ["STAMPEDE"] * 10
+    assert calls == ["stampede"]
+
+
+def test_waits_for_peer_worker_lease(monkeypatch):
+    calls = []
+
+    @cache.cached(ttl=60)
+    async def fetch(q):
+        calls.append(q)
+        return "mine"
+
+    async def _run():
+        r = fakeredis.aioredis.FakeRedis()
+        monkeypatch.setattr(cache, "_pool", r)
+        key = cache._make_key(fetch, ("lease",), {})
+        await r.set(f"lock:{key}", "other-worker", px=2000)
+
+        async def _peer_fills():
+            await asyncio.sleep(0.1)
+            await r.set(key, cache._maybe_encode("theirs"))
+
+        peer = asyncio.create_task(_peer_fills())
+        out = await fetch("lease")
+        await peer
+        return out
+
+    assert asyncio.run(_run()) == "theirs" and calls == []
+
+
+def test_identical_questions_run_graph_once(monkeypatch):
+    class _Graph:
+        runs = 0
+
+        async def ainvoke(self, state):
+            _Graph.runs += 1
+            await asyncio.sleep(0.05)
+            return {"answer": state["question"], "citations": []}
+
+    monkeypatch.setattr(g, "_GRAPH", _Graph())
+
+    async def _run():
+        return await asyncio.gather(*(g.answer_question("same?") for _ in range(5)))
+
+    outs = asyncio.run(_run())
+    assert _Graph.runs == 1 and all(o["answer"] == "same?" for o in outs)
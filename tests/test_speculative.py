@@ -0,0 +1,75 @@
+"""
+Speculative synthesis: synthesize overlaps reflect and is kept when no
+further round follows (tokens still reach streaming clients), and is
+cancelled when reflect asks for another search.
+"""
+import asyncio
+import time
+
+from prometheus_client import REGISTRY
+
+from agent import nodes
+from agent import graph as g
+
+DELAY = 0.3
+
+
+def _setup(monkeypatch, need_more_first):
+    calls = {"reflect": 0, "synth_started": 0, "synth_cancelled": 0}
+
+    async def slow_reflect(state):
+        calls["reflect"] += 1
+        await asyncio.sleep(DELAY)
+        more = need_more_first and calls["reflect"] == 1
+        return {**state, "need_more": more, "queries": ["again"], "iter": state["iter"] + 1}
+
+    async def slow_stream(prompt, node="llm", meta=None, **kwargs):
+        calls["synth_started"] += 1
+        try:
+            await asyncio.sleep(DELAY)
+        except asyncio.CancelledError:
+            calls["synth_cancelled"] += 1
+            raise
+        for tok in ("spec ", "answer"):
+            yield tok
+
+    monkeypatch.setattr(g, "SPECULATIVE_SYNTHESIS", True)
+    monkeypatch.setattr(g, "reflect_node", slow_reflect)
+    monkeypatch.setattr(nodes, "call_llm_stream", slow_stream)
+    monkeypatch.setattr(g, "_GRAPH", g._build_graph())
+    return calls
+
+
+def _sample(outcome):
+    return REGISTRY.get_sample_value("agent_speculative_synthesis_total", {"outcome": outcome}) or 0.0
+
+
+def _synth_runs():
+    return REGISTRY.get_sample_value("agent_requests_total", {"phase": "synthesize"}) or 0.0
+
+
+def test_kept_overlaps_reflect_and_streams(monkeypatch):
+    calls = _setup(monkeypatch, need_more_first=False)
+    kept0, synth0 = _sample("kept"), _synth_runs()
+
+    async def _run():
+        t0 = time.perf_counter()
+        events = [e async for e in g.stream_answer("Speculative kept?", use_cache=False)]
+        return events, time.perf_counter() - t0
+
+    events, elapsed = asyncio.run(_run())
+    tokens = "".join(d["text"] for e, d in events if e == "token")
+    assert tokens == "spec answer" and events[-1][1]["answer"] == "spec answer"
+    assert elapsed < 2 * DELAY  # reflect and synthesize overlapped
+    assert calls["synth_started"] == 1 and _sample("kept") == kept0 + 1
+    assert _synth_runs() == synth0 + 1  # per-phase metrics still see synthesize
+
+
+def test_discarded_when_another_round(monkeypatch):
+    calls = _setup(monkeypatch, need_more_first=True)
+    discarded0 = _sample("discarded")
+
+    out = asyncio.run(g.answer_question("Speculative discarded?", use_cache=False))
+    assert out["answer"] == "spec answer" and calls["reflect"] == 2
+    assert calls["synth_started"] == 2 and calls["synth_cancelled"] == 1
+    assert _sample("discarded") == discarded0 + 1
@@ -0,0 +1,49 @@
+"""
+Cold start: ``import agent`` / ``import agent.cli`` stay free of the heavy
+pipeline stack and of side effects (no tracer provider, no Prometheus
+server, no compiled graph), guarded with ``python -X importtime``.
+"""
+import os
+import pathlib
+import subprocess
+import sys
+
+SRC_DIR = pathlib.Path(__file__).resolve().parents[1] / "src"
+
+CLI_IMPORT_BUDGET_SECS = 0.4  # ~0.07 s locally; was ~1.6 s with eager imports
+HEAVY = ("langgraph", "langchain_core", "openai", "redis", "aiohttp", "fastapi",
+         "opentelemetry.exporter")
+
+
+def _python(*args):
+    env = {**os.environ, "PYTHONPATH": str(SRC_DIR)}
+    return subprocess.run([sys.executable, *args], env=env, capture_output=True,
+                          text=True, check=True)
+
+
+def _importtime(module):
+    """``{module: cumulative seconds}`` from ``-X importtime`` output."""
+    times = {}
+    for line in _python("-X", "importtime", "-c", f"import {module}").stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = line.split("|")
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_cli_import_is_light():
+    times = _importtime("agent.cli")
+    heavy = [m for m in times if m.split(".")[0] in HEAVY or m.startswith(HEAVY)]
+    assert heavy == []
+    assert times["agent.cli"] < CLI_IMPORT_BUDGET_SECS
+
+
+def test_package_import_has_no_side_effects():
+    _python("-c", """
+import agent
+from agent import graph, observability
+assert graph._GRAPH is None
+assert observability._tracer is None
+assert not observability.__dict__.get("_prom_started")
+assert agent.answer_question is graph.answer_question
+""")
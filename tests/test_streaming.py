@@ -0,0 +1,58 @@
+"""
+Real streaming: /api/stream must emit per-phase progress, then the stub
+answer token by token, then ``done`` – with no artificial chunking.
+"""
+import json
+
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from agent.server import app
+
+
+def _sse_events(body: str):
+    for frame in body.strip().split("\n\n"):
+        event, data = frame.split("\n")
+        yield event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def test_sse_streams_progress_and_tokens():
+    with TestClient(app) as client:
+        resp = client.get("/api/stream", params={"question": "Streaming test?"})
+    events = list(_sse_events(resp.text))
+
+    phases = [d["phase"] for e, d in events if e == "progress"]
+    assert phases[:3] == ["generate", "search", "reflect"] and phases[-1] == "synthesize"
+
+    tokens = [d["text"] for e, d in events if e == "token"]
+    done = events[-1]
+    assert done[0] == "done"
+    assert len(tokens) > 1 and "".join(tokens).strip() == done[1]["answer"]
+    # tokens are forwarded while synthesize runs, not after it finished
+    first_token = [e for e, _ in events].index("token")
+    synth_done = events.index(("progress", {"phase": "synthesize"}))
+    assert first_token < synth_done
+
+
+def test_ws_streams_same_payloads():
+    with TestClient(app) as client:
+        with client.websocket_connect("/api/ws?question=WS+streaming+test") as ws:
+            msgs = []
+            while True:
+                msgs.append(json.loads(ws.receive_text()))
+                if "answer" in msgs[-1]:
+                    break
+    assert any("phase" in m for m in msgs) and any("text" in m for m in msgs)
+    assert msgs[-1]["citations"][0]["id"] == 1
+
+
+def test_ws_rejects_bad_budget():
+    with TestClient(app) as client:
+        for bad in ("soon", "-5", "nan"):
+            with client.websocket_connect(f"/api/ws?question=q&budget_ms={bad}") as ws:
+                try:
+                    ws.receive_text()
+                except WebSocketDisconnect as e:
+                    assert e.code == 4000
+                else:
+                    raise AssertionError("expected the socket to close")
@@ -0,0 +1,104 @@
+"""
+Streaming search mode: once enough distinct docs have arrived the round
+ends, the straggling query is cancelled and left un-issued, and the full
+graph still routes through to an answer.
+"""
+import asyncio
+import time
+
+from langchain_core.documents import Document
+from prometheus_client import REGISTRY
+
+from agent import answer_sync, nodes, tools
+from agent import graph as g
+
+TOPICS = {
+    "fast a": [
+        "Raft was first described in a conference paper about distributed logs.",
+        "Etcd and Consul use it to keep cluster metadata consistent.",
+        "A leader is elected whenever followers stop hearing heartbeats.",
+    ],
+    "fast b": [
+        "Paxos predates it and is notoriously hard to implement correctly.",
+        "Log entries commit once a majority of servers has stored them.",
+        "Membership changes go through a joint consensus configuration.",
+    ],
+    "slow": ["This snippet arrives far too late to matter."],
+}
+
+
+def _docs(q):
+    return [
+        Document(
+            page_content=text,
+            metadata={"title": q, "url": f"https://example.com/{q}/{i}"},
+        )
+        for i, text in enumerate(TOPICS[q])
+    ]
+
+
+def _patch(monkeypatch, slow="slow"):
+    cancelled = []
+
+    async def fake_search(q):
+        if q == slow:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(q)
+                raise
+        return _docs(q)
+
+    monkeypatch.setattr(nodes, "web_search", fake_search)
+    monkeypatch.setattr(nodes, "SEARCH_STREAMING", True)
+    monkeypatch.setattr(nodes, "SEARCH_EARLY_DOCS", 6)
+    return cancelled
+
+
+def test_early_exit_cancels_straggler(monkeypatch):
+    cancelled = _patch(monkeypatch)
+    state = {"question": "q", "queries": ["fast a", "slow", "fast b"], "iter": 0}
+
+    t0 = time.perf_counter()
+    out = asyncio.run(nodes.search_node(state))
+    assert time.perf_counter() - t0 < 1
+    assert cancelled == ["slow"]
+    assert sorted(out["issued"]) == ["fast a", "fast b"]
+    assert len(out["evidence"]["docs"]) == 6
+
+
+def _cancelled(kind):
+    return REGISTRY.get_sample_value("agent_cancelled_work_total", {"kind": kind}) or 0.0
+
+
+def test_stragglers_are_not_counted_as_disconnects(monkeypatch):
+    # through the real (cached, single-flighted) web_search this time
+    async def provider(q):
+        topic = q.removeprefix("straggler ")
+        if topic == "slow":
+            await asyncio.sleep(5)
+        return _docs(topic)
+
+    monkeypatch.setattr(tools, "_mock_search", provider)
+    monkeypatch.setattr(nodes, "SEARCH_STREAMING", True)
+    monkeypatch.setattr(nodes, "SEARCH_EARLY_DOCS", 6)
+    before = _cancelled("provider_call"), _cancelled("search_straggler")
+    queries = ["straggler fast a", "straggler slow", "straggler fast b"]
+
+    out = asyncio.run(nodes.search_node({"question": "q", "queries": queries, "iter": 0}))
+    assert "straggler slow" not in out["issued"]
+    assert _cancelled("provider_call") == before[0]
+    assert _cancelled("search_straggler") == before[1] + 1
+
+
+def test_graph_routes_with_streaming(monkeypatch):
+    _patch(monkeypatch)
+
+    async def three_queries(state):
+        return {**state, "queries": ["fast a", "slow", "fast b"], "iter": 0}
+
+    monkeypatch.setattr(g, "generate_node", three_queries)
+    monkeypatch.setattr(g, "_GRAPH", g._build_graph())
+    t0 = time.perf_counter()
+    out = answer_sync("Streaming search graph test?")
+    assert "answer" in out and time.perf_counter() - t0 < 5
@@ -0,0 +1,92 @@
+"""
+Async-aware instrumentation: node spans and phase-latency samples cover
+the awaited body (so they match injected delays), carry the graph
+iteration, parent the LLM / cache / provider child spans, and the
+histogram exemplar links back to the node's trace.
+"""
+import asyncio
+import json
+
+import pytest
+from langchain_core.documents import Document
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from prometheus_client import REGISTRY
+
+from agent import nodes, observability, tools
+
+DELAY = 0.2
+_EXPORTER = InMemorySpanExporter()
+observability.init()  # normally done by the first graph run
+trace.get_tracer_provider().add_span_processor(SimpleSpanProcessor(_EXPORTER))
+
+
+@pytest.fixture(autouse=True)
+def _clear_spans():
+    _EXPORTER.clear()
+    yield
+
+
+def _spans(name):
+    return [s for s in _EXPORTER.get_finished_spans() if s.name == name]
+
+
+def _secs(s):
+    return (s.end_time - s.start_time) / 1e9
+
+
+def _latency_sum(phase):
+    return REGISTRY.get_sample_value("agent_phase_latency_seconds_sum", {"phase": phase}) or 0.0
+
+
+def test_node_span_and_histogram_match_delay(monkeypatch):
+    async def slow_search(q):
+        await asyncio.sleep(DELAY)
+        return [Document(page_content=f"{q} tracing result", metadata={"url": q})]
+
+    monkeypatch.setattr(nodes, "web_search", slow_search)
+    before = _latency_sum("search")
+    asyncio.run(nodes.search_node({"question": "q", "queries": ["trace a"], "iter": 1}))
+
+    (node,) = _spans("search")
+    assert DELAY <= _secs(node) < DELAY + 0.1
+    assert DELAY <= _latency_sum("search") - before < DELAY + 0.1
+    assert node.attributes["agent.iteration"] == 1
+
+    trace_id = format(node.context.trace_id, "032x")
+    exemplars = [
+        s.exemplar.labels["trace_id"]
+        for metric in REGISTRY.collect() if metric.name == "agent_phase_latency_seconds"
+        for s in metric.samples if s.exemplar and s.labels.get("phase") == "search"
+    ]
+    assert trace_id in exemplars
+
+
+def test_llm_and_cache_spans_are_children_of_the_node(monkeypatch):
+    async def slow_complete(prompt, **kwargs):
+        await asyncio.sleep(DELAY)
+        return json.dumps({"slots": [], "filled": [], "need_more": False}), 1, True
+
+    monkeypatch.setattr(nodes, "_complete", slow_complete)
+    state = {"question": "Tracing parent test?", "queries": ["x"], "iter": 0,
+             "docs": [Document(page_content="tracing doc", metadata={"url": "u"})]}
+    asyncio.run(nodes.reflect_node(state))
+
+    (node,), (llm,) = _spans("reflect"), _spans("llm")
+    lookup = _spans("cache.lookup")[0]
+    assert llm.parent.span_id == node.context.span_id
+    assert lookup.parent.span_id == llm.context.span_id
+    assert llm.attributes["llm.node"] == "reflect" and llm.attributes["llm.cached"] is False
+    assert DELAY <= _secs(llm) <= _secs(node) < DELAY + 0.1
+
+
+def test_provider_call_span(monkeypatch):
+    async def slow_provider(q):
+        await asyncio.sleep(DELAY)
+        return []
+
+    asyncio.run(tools._call_provider(("stub", slow_provider), "q", timeout=1.0))
+    (call,) = _spans("provider")
+    assert call.attributes["provider.name"] == "stub"
+    assert DELAY <= _secs(call) < DELAY + 0.1